@@ -1,6 +1,8 @@
 # File: ecosky-back/ai_model/test_env.py
 
-from ai_model.rl_env import FlightEnv
+import numpy as np
+
+from rl_env import STATE_FIELDS, FlightEnv
 
 def test_flight_env():
     env = FlightEnv()
@@ -16,5 +18,21 @@ def test_flight_env():
 
     print(f"Episode finished. Total Reward: {total_reward}")
 
+def test_set_state_replays_the_same_trajectory():
+    env, clone = FlightEnv(), FlightEnv()
+    env.reset(seed=0)
+    actions = [np.array([1.0, 0.05, 20.0], dtype=np.float32)] * 20
+    for action in actions[:5]:
+        env.step(action)
+
+    state = env.get_state()
+    assert state.shape == (len(STATE_FIELDS),)
+    clone.set_state(state)
+    for action in actions[5:]:
+        expected = env.step(action)
+        replayed = clone.step(action)
+        assert np.array_equal(expected[0], replayed[0]) and expected[1] == replayed[1]
+    assert np.array_equal(env.get_state(), clone.get_state())
+
 if __name__ == "__main__":
     test_flight_env()
@@ -1,65 +1,216 @@
 # File: app.py
 
 import logging
-from flask import Flask, jsonify
+import math
+import os
+import time
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
 from apscheduler.schedulers.background import BackgroundScheduler
 import atexit
-from ingest_api import fetch_flight_data, fetch_weather_alerts
-from preprocess import preprocess_flight_data
+from flight_optimizer import flight_optimizer_bp
+from live_traffic import current_flight_snapshot, fetch_scheduler, refresh_flight_snapshot
+from metrics import HTTP_REQUEST_LATENCY, REGISTRY, span
+from dead_reckoning import extrapolate_positions
+from fetch_scheduler import bbox_contains, parse_bbox
+from logging_setup import configure_logging
 from dotenv import load_dotenv
-import os
 
 # Load environment variables
 load_dotenv()
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-    handlers=[
-        logging.FileHandler("app.log"),
-        logging.StreamHandler()
-    ]
-)
+configure_logging(log_file="app.log")
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 CORS(app)
+app.register_blueprint(flight_optimizer_bp)
 
-# Scheduler for periodic updates (optional)
+# Scheduler for periodic updates. Every worker ticks the fetch scheduler; only
+# the elected leader calls OpenSky, the others load the leader's snapshots.
 scheduler = BackgroundScheduler()
 
 def scheduled_data_update():
     try:
-        logger.info("Scheduled data update started...")
-        flight_raw = fetch_flight_data(
-            username=os.getenv('OPENSKY_USERNAME'),
-            password=os.getenv('OPENSKY_PASSWORD')
-        )
-        logger.info("Scheduled data update completed.")
+        refresh_flight_snapshot()
     except Exception as e:
         logger.error(f"Error during scheduled data update: {e}")
 
-scheduler.add_job(func=scheduled_data_update, trigger="interval", hours=1)
+scheduler.add_job(func=scheduled_data_update, trigger="interval", seconds=1,
+                  max_instances=1, coalesce=True)
 scheduler.start()
 atexit.register(lambda: scheduler.shutdown())
+atexit.register(fetch_scheduler.close)
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_latency(response):
+    start = g.pop("request_start", None)
+    if start is not None:
+        endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+        HTTP_REQUEST_LATENCY.labels(endpoint, request.method, response.status_code).observe(
+            time.perf_counter() - start
+        )
+    return response
+
+@app.route("/metrics", methods=["GET"])
+def get_metrics():
+    """
+    Endpoint exposing latency histograms and counters in Prometheus text format.
+    """
+    return Response(REGISTRY.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
 
 @app.route("/flights/all", methods=["GET"])
 def get_live_flights():
     """
     Endpoint to fetch all live flight data from OpenSky API.
+
+    Served from the fetch scheduler's latest snapshot; requests never call
+    OpenSky themselves once a snapshot is loaded.
+
+    Responses carry a weak ETag and Last-Modified derived from the snapshot
+    ``time``; a matching If-None-Match (or If-Modified-Since) gets a 304.
+    The body is served pre-compressed according to Accept-Encoding.
     """
     try:
-        flight_raw = fetch_flight_data(
-            username=os.getenv('OPENSKY_USERNAME'),
-            password=os.getenv('OPENSKY_PASSWORD')
-        )
-        processed_flights = preprocess_flight_data(flight_raw)
-        return jsonify({"status": "success", "data": processed_flights}), 200
+        snapshot = current_flight_snapshot()
+        if snapshot is None:
+            return jsonify({"status": "success", "data": []}), 200
+
+        if request.if_none_match:
+            not_modified = request.if_none_match.contains_weak(snapshot.etag)
+        else:
+            since = request.if_modified_since
+            not_modified = since is not None and since.timestamp() >= snapshot.time
+
+        if not_modified:
+            response = Response(status=304)
+        else:
+            encoding, body = snapshot.negotiate(request.accept_encodings)
+            response = Response(body, status=200, mimetype="application/json")
+            if encoding:
+                response.headers["Content-Encoding"] = encoding
+
+        response.set_etag(snapshot.etag, weak=True)
+        response.headers["Last-Modified"] = snapshot.last_modified
+        response.headers["Cache-Control"] = "no-cache"
+        response.vary.add("Accept-Encoding")
+        return response
     except Exception as e:
         logger.error(f"Error fetching live flights: {e}")
         return jsonify({"status": "error", "message": str(e)}), 500
 
+@app.route("/flights/live", methods=["GET"])
+def get_extrapolated_flights():
+    """
+    Endpoint returning the cached snapshot dead-reckoned to a requested time.
+
+    Positions and altitudes are projected from each aircraft's velocity,
+    true_track and vertical_rate, so clients get smooth motion between
+    OpenSky snapshots without extra upstream requests.
+
+    Query parameters:
+        t (float): Unix time to extrapolate to. Defaults to now.
+        lamin, lomin, lamax, lomax (float): Optional viewport. Only aircraft inside
+            it are returned, and the region is refreshed from OpenSky more often.
+    """
+    try:
+        at_time = request.args.get("t", default=time.time(), type=float)
+        try:
+            bbox = parse_bbox(request.args)
+        except ValueError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+        if bbox is not None:
+            fetch_scheduler.register_view(bbox)
+
+        snapshot = current_flight_snapshot()
+        if snapshot is None or "columns" not in snapshot.derived:
+            return jsonify({"status": "success", "data": []}), 200
+
+        with span("dead_reckoning"):
+            latitude, longitude, altitude = extrapolate_positions(
+                snapshot.derived["columns"], at_time, fallback_time=snapshot.time
+            )
+            data = [
+                dict(flight, latitude=lat, longitude=lon, baro_altitude=None if math.isnan(alt) else alt)
+                for flight, lat, lon, alt in zip(snapshot.flights, latitude.tolist(),
+                                                  longitude.tolist(), altitude.tolist())
+                if bbox is None or bbox_contains(bbox, lat, lon)
+            ]
+
+        return jsonify({"status": "success", "time": at_time,
+                        "snapshot_time": snapshot.time, "data": data}), 200
+    except Exception as e:
+        logger.error(f"Error extrapolating live flights: {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+@app.route("/flights/nearby", methods=["GET"])
+def get_nearby_flights():
+    """
+    Endpoint for proximity queries over the cached live snapshot.
+
+    Query parameters:
+        lat, lon (float): Query point in degrees (required).
+        k (int): Maximum number of aircraft to return, nearest first. Defaults to 10.
+        radius_km (float): Only return aircraft within this great-circle distance.
+            When given without ``k``, every aircraft inside the radius is returned.
+    """
+    try:
+        lat = request.args.get("lat", type=float)
+        lon = request.args.get("lon", type=float)
+        radius_km = request.args.get("radius_km", type=float)
+        k = request.args.get("k", type=int)
+
+        if lat is None or lon is None or not (-90.0 <= lat <= 90.0) or not (-180.0 <= lon <= 180.0):
+            return jsonify({"status": "error", "message": "Valid lat and lon are required"}), 400
+        if (radius_km is not None and radius_km <= 0) or (k is not None and k <= 0):
+            return jsonify({"status": "error", "message": "k and radius_km must be positive"}), 400
+
+        # Treat the query area as a viewed region so the leader refreshes it faster
+        half_deg = max(radius_km or 0.0, 100.0) / 111.0
+        fetch_scheduler.register_view((max(-90.0, lat - half_deg), max(-180.0, lon - half_deg),
+                                       min(90.0, lat + half_deg), min(180.0, lon + half_deg)))
+
+        snapshot = current_flight_snapshot()
+        if snapshot is None or "traffic_index" not in snapshot.derived:
+            return jsonify({"status": "success", "data": []}), 200
+
+        traffic_index = snapshot.derived["traffic_index"]
+        if radius_km is not None and k is None:
+            matches = traffic_index.within_radius(lat, lon, radius_km)
+        else:
+            matches = traffic_index.nearest(lat, lon, k=k or 10, max_radius_km=radius_km)
+
+        data = [dict(flight, distance_km=round(distance, 3)) for distance, flight in matches]
+        return jsonify({"status": "success", "time": snapshot.time, "data": data}), 200
+    except Exception as e:
+        logger.error(f"Error querying nearby flights: {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+@app.route("/flights/emissions", methods=["GET"])
+def get_fleet_emissions():
+    """
+    Endpoint returning estimated fuel burn and CO2 rates for all airborne aircraft,
+    aggregated by origin country, altitude band and region.
+
+    The aggregates are computed once when a snapshot is installed, so this
+    only reads the cached result.
+    """
+    try:
+        snapshot = current_flight_snapshot()
+        if snapshot is None or "emissions" not in snapshot.derived:
+            return jsonify({"status": "success", "data": None}), 200
+
+        return jsonify({"status": "success", "time": snapshot.time,
+                        "data": snapshot.derived["emissions"]}), 200
+    except Exception as e:
+        logger.error(f"Error estimating fleet emissions: {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
 if __name__ == "__main__":
-    logger.info("Starting Flask server on port 4000...")
-    app.run(host="0.0.0.0", port=4000)
+    port = int(os.getenv("PORT", 4000))
+    logger.info(f"Starting Flask server on port {port}...")
+    app.run(host="0.0.0.0", port=port)
@@ -0,0 +1,211 @@
+import logging
+import time
+
+import numpy as np
+
+from rl_env import ARRIVAL_BONUS, ARRIVAL_RADIUS_KM, FlightEnv
+
+logger = logging.getLogger(__name__)
+
+# Steps each branch is rolled out before the beams are re-ranked
+DEFAULT_HORIZON = 50
+# Standard deviation of sampled actions, as a fraction of each action's half-range
+DEFAULT_ACTION_NOISE = 0.1
+
+
+def env_actions(actions, action_space, normalize_actions=True, clip_actions=False):
+    """
+    Map policy outputs to env actions as ``Algorithm.compute_single_action`` does.
+
+    RLlib policies with ``normalize_actions`` act in [-1, 1] and are unsquashed
+    to the Box bounds (then clipped); otherwise ``clip_actions`` clips them.
+
+    Returns:
+        np.ndarray: (n, action_dim) actions in env units.
+    """
+    actions = np.asarray(actions, dtype=np.float32)
+    low, high = action_space.low, action_space.high
+    if normalize_actions:
+        actions = low + (actions + 1.0) * (high - low) / 2.0
+    if normalize_actions or clip_actions:
+        actions = np.clip(actions, low, high)
+    return actions.astype(np.float32)
+
+
+def compute_actions_batch(policy, obs_batch):
+    """
+    Actions for a batch of observations in as few policy calls as the policy allows.
+
+    RLlib algorithms go through their policy's batched ``compute_actions``,
+    whose actions are then unsquashed or clipped like ``compute_single_action``
+    does; policies with an array ``compute_actions`` (ONNX, GreatCirclePolicy)
+    are called once; anything else falls back to one ``compute_single_action`` per row.
+
+    Returns:
+        np.ndarray: (n, action_dim) actions in env units.
+    """
+    if hasattr(policy, "get_policy"):
+        rl_policy = policy.get_policy()
+        actions, _, _ = rl_policy.compute_actions(obs_batch, explore=False)
+        return env_actions(actions, rl_policy.action_space,
+                           normalize_actions=policy.config.normalize_actions,
+                           clip_actions=policy.config.clip_actions)
+    if hasattr(policy, "compute_actions"):
+        return np.asarray(policy.compute_actions(obs_batch), dtype=np.float32)
+    return np.array([policy.compute_single_action(obs) for obs in obs_batch], dtype=np.float32)
+
+
+class _Branch:
+    """
+    One trajectory in the search tree: the steps rolled out since its parent
+    plus the running totals and the FlightEnv state vector at its tip.
+    """
+
+    __slots__ = ("parent", "points", "obs", "state", "score", "fuel", "co2", "sampled",
+                 "done", "truncated", "arrived")
+
+    def __init__(self, parent, obs, state, score=0.0, fuel=0.0, co2=0.0, sampled=False):
+        self.parent = parent
+        self.points = []
+        self.obs = obs
+        self.state = state
+        self.score = score
+        self.fuel = fuel
+        self.co2 = co2
+        self.sampled = sampled
+        self.done = False
+        self.truncated = False
+        self.arrived = False
+
+    def route(self):
+        segments = []
+        branch = self
+        while branch is not None:
+            segments.append(branch.points)
+            branch = branch.parent
+        return [point for segment in reversed(segments) for point in segment]
+
+
+def beam_search_rollout(env_config, policy, beam_width=4, num_samples=4, horizon=DEFAULT_HORIZON,
+                        action_noise=DEFAULT_ACTION_NOISE, max_steps=None, deadline=None, seed=0):
+    """
+    Explore several candidate trajectories and keep the best by episode reward.
+
+    Every ``horizon`` steps each of the ``beam_width`` surviving beams branches
+    into ``num_samples`` children: one follows the policy's action, the others
+    add Gaussian noise to it. Children start from their parent's FlightEnv
+    state vector (``set_state``), all of them are stepped in lockstep with one
+    batched policy call per step, and the best ``beam_width`` by accumulated
+    reward survive. With ``horizon=None`` and ``beam_width=1`` this is
+    best-of-K sampling over full rollouts.
+
+    Branches that reach the target are kept as finished; branches that run out
+    of fuel or hit the env's step limit leave the beam and are only returned
+    when nothing arrived and they outscore every live beam.
+
+    Args:
+        env_config (dict): FlightEnv config, as from ``build_env_config``.
+        policy: Policy (see ``compute_actions_batch``).
+        beam_width (int, optional): Beams kept after each re-ranking.
+        num_samples (int, optional): Children per beam, including the unperturbed one.
+        horizon (int, optional): Steps between re-rankings; None for whole rollouts.
+        action_noise (float, optional): Noise std as a fraction of each action's half-range.
+        max_steps (int, optional): Maximum rollout depth in policy steps.
+        deadline (float, optional): ``time.perf_counter()`` value to stop at.
+        seed (int, optional): Seed for the sampled actions.
+
+    Raises:
+        ValueError: If ``beam_width > 1`` with ``num_samples == 1``; with one
+            unperturbed child per beam the search never widens past one beam.
+
+    Returns:
+        dict: "route" (observation points), "fuel", "co2", "steps", "stop_reason"
+        ("deadline", "step_budget" or None), "done" and "truncated" of the chosen
+        beam, and "policy_calls".
+    """
+    if beam_width > 1 and num_samples < 2:
+        raise ValueError("num_samples must be at least 2 when beam_width > 1")
+    rng = np.random.default_rng(seed)
+    envs = [FlightEnv(env_config) for _ in range(beam_width * num_samples)]
+    obs, _ = envs[0].reset(seed=seed)
+    low, high = envs[0].action_space.low, envs[0].action_space.high
+    noise_std = action_noise * (high - low) / 2.0
+
+    beams = [_Branch(None, obs, envs[0].get_state())]
+    finished = []
+    failed = []
+    depth = 0
+    policy_calls = 0
+    stop_reason = None
+
+    while beams and stop_reason is None:
+        children = []
+        for beam in beams:
+            for k in range(num_samples):
+                env = envs[len(children)]
+                env.set_state(beam.state)
+                children.append(_Branch(beam, beam.obs, None, beam.score, beam.fuel, beam.co2,
+                                        sampled=k > 0))
+        active = list(range(len(children)))
+
+        segment_steps = 0
+        while active and (horizon is None or segment_steps < horizon):
+            if max_steps is not None and depth >= max_steps:
+                stop_reason = "step_budget"
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                stop_reason = "deadline"
+                break
+
+            actions = compute_actions_batch(policy, np.stack([children[i].obs for i in active]))
+            policy_calls += 1
+            sampled = np.array([children[i].sampled for i in active])
+            if sampled.any():
+                actions[sampled] += rng.normal(0.0, noise_std, size=(int(sampled.sum()), len(noise_std)))
+
+            still_active = []
+            for i, action in zip(active, actions):
+                child = children[i]
+                obs, reward, done, truncated, info = envs[i].step(action)
+                child.obs = obs
+                child.points.append(obs.tolist())
+                child.score += float(reward)
+                child.fuel += float(info.get("fuel_used", 0))
+                child.co2 += float(info.get("co2_emissions", 0))
+                if done or truncated:
+                    child.done, child.truncated = True, truncated
+                    child.arrived = not truncated and info["dist_to_target"] < ARRIVAL_RADIUS_KM
+                else:
+                    still_active.append(i)
+            active = still_active
+            depth += 1
+            segment_steps += 1
+
+        for i, child in enumerate(children):
+            child.state = envs[i].get_state()
+        finished.extend(child for child in children if child.arrived)
+        failed.extend(child for child in children if child.done and not child.arrived)
+        beams = sorted((child for child in children if not child.done),
+                       key=lambda child: child.score, reverse=True)[:beam_width]
+
+        # Live beams only lose reward from here on, bar the arrival bonus they may still earn
+        best_finished = max(finished, key=lambda child: child.score, default=None)
+        if best_finished is not None and (not beams or best_finished.score >= beams[0].score + ARRIVAL_BONUS):
+            break
+
+    # Prefer an arrival; otherwise the best live beam or, failing that, failed branch
+    candidates = finished or beams + failed
+    best = max(candidates, key=lambda child: child.score)
+    route = best.route()
+    logger.info(f"Beam search ({beam_width}x{num_samples}) explored to depth {depth} "
+                f"with {policy_calls} batched policy calls.")
+    return {
+        "route": route,
+        "fuel": best.fuel,
+        "co2": best.co2,
+        "steps": len(route),
+        "stop_reason": None if best.done else stop_reason,
+        "done": best.done,
+        "truncated": best.truncated,
+        "policy_calls": policy_calls,
+    }
@@ -0,0 +1,118 @@
+# File: ecosky-back/ai_model/beam_search_test.py
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from beam_search import beam_search_rollout, compute_actions_batch
+from great_circle import GreatCirclePolicy
+from inference import build_env_config
+from rl_env import FlightEnv
+
+START = [51.4700, -0.4543]  # London Heathrow
+END = [49.0097, 2.5479]  # Paris CDG
+
+
+class CountingPolicy(GreatCirclePolicy):
+    def __init__(self):
+        super().__init__()
+        self.batch_sizes = []
+
+    def compute_actions(self, obs_batch):
+        self.batch_sizes.append(len(obs_batch))
+        return super().compute_actions(obs_batch)
+
+
+def test_batched_actions_match_single_actions():
+    policy = GreatCirclePolicy()
+    obs = np.array([[51.0, -1.0, 1500.0, 45.0, 120.0, 5000.0, 49.0, 2.5],
+                    [10.0, 100.0, 9000.0, 300.0, 240.0, 800.0, -33.9, 151.2]], dtype=np.float32)
+    expected = np.array([policy.compute_single_action(o) for o in obs])
+    assert np.allclose(compute_actions_batch(policy, obs), expected, atol=1e-4)
+
+
+class NormalizedActionsAlgo:
+    """
+    Stand-in for an RLlib Algorithm trained with normalize_actions: its policy
+    acts in [-1, 1] and compute_single_action unsquashes to the Box bounds.
+    """
+
+    def __init__(self):
+        self.config = SimpleNamespace(normalize_actions=True, clip_actions=False)
+        self.action_space = FlightEnv().action_space
+        self.policy = SimpleNamespace(action_space=self.action_space, compute_actions=self._raw_actions)
+
+    @staticmethod
+    def _raw_actions(obs_batch, explore=None):
+        obs_batch = np.asarray(obs_batch, dtype=np.float32)
+        raw = np.tanh(obs_batch[:, [3, 4, 2]] / np.array([180.0, 250.0, 10000.0]) - 0.5)
+        return raw, [], {}
+
+    def get_policy(self):
+        return self.policy
+
+    def compute_single_action(self, obs, explore=None):
+        raw = self._raw_actions(np.asarray(obs)[None, :])[0][0]
+        low, high = self.action_space.low, self.action_space.high
+        return np.clip(low + (raw + 1.0) * (high - low) / 2.0, low, high)
+
+
+def test_batched_rllib_actions_are_unsquashed_like_single_actions():
+    algo = NormalizedActionsAlgo()
+    obs = np.array([[51.0, -1.0, 1500.0, 45.0, 120.0, 5000.0, 49.0, 2.5],
+                    [10.0, 100.0, 9000.0, 300.0, 240.0, 800.0, -33.9, 151.2]], dtype=np.float32)
+    expected = np.array([algo.compute_single_action(o, explore=False) for o in obs])
+
+    actions = compute_actions_batch(algo, obs)
+
+    assert np.allclose(actions, expected, atol=1e-4)
+    # Env units: the altitude change spans ±50 m, not the normalized ±1
+    assert np.abs(actions[:, 2]).max() > 1.0
+
+
+def test_beam_search_batches_policy_calls_across_branches():
+    policy = CountingPolicy()
+    result = beam_search_rollout(build_env_config(START, END, []), policy, beam_width=2,
+                                 num_samples=3, horizon=20, seed=1)
+
+    assert result["done"] and not result["truncated"] and result["stop_reason"] is None
+    # One policy call per step of the search, each covering every live branch
+    assert result["policy_calls"] == len(policy.batch_sizes)
+    assert max(policy.batch_sizes) == 6
+    assert result["policy_calls"] < sum(policy.batch_sizes)
+    assert len(result["route"]) == result["steps"]
+
+
+def test_beam_search_stops_on_step_budget_with_best_partial_beam():
+    result = beam_search_rollout(build_env_config(START, END, []), GreatCirclePolicy(),
+                                 beam_width=2, num_samples=2, horizon=10, max_steps=25)
+    assert result["stop_reason"] == "step_budget"
+    assert result["steps"] == 25 and not result["done"]
+
+
+class CoastingPolicy(GreatCirclePolicy):
+    """
+    Great-circle steering with the throttle left alone, so sampled throttle
+    noise accumulates and branches drift apart in speed and fuel burn.
+    """
+
+    def compute_actions(self, obs_batch):
+        actions = np.array(super().compute_actions(obs_batch))
+        actions[:, 1] = 0.0
+        return actions
+
+
+def test_branches_that_run_out_of_fuel_do_not_count_as_finished():
+    config = build_env_config(START, END, [])
+    config.update(start_fuel=1.1, start_velocity=200.0)
+    result = beam_search_rollout(config, CoastingPolicy(), beam_width=2, num_samples=4, horizon=5,
+                                 max_steps=40, action_noise=0.5, seed=1)
+    # The faster branches burn out first; the slower live beam is returned instead
+    assert result["stop_reason"] == "step_budget"
+    assert result["steps"] == 40 and not result["done"]
+
+
+def test_beam_width_without_sampling_is_rejected():
+    with pytest.raises(ValueError):
+        beam_search_rollout(build_env_config(START, END, []), GreatCirclePolicy(), beam_width=4, num_samples=1)
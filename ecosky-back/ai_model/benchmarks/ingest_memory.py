@@ -0,0 +1,109 @@
+# File: ecosky-back/ai_model/benchmarks/ingest_memory.py
+"""
+Peak-memory benchmark for OpenSky snapshot ingestion.
+
+Run from ``ecosky-back/ai_model``:
+
+    python -m benchmarks.ingest_memory                  # 10k and 50k aircraft
+    python -m benchmarks.ingest_memory --states 20000
+
+Each mode runs in a fresh interpreter that reads a synthetic ``states/all``
+body from disk, standing in for the socket:
+
+- ``json``: the whole body, then ``json.loads``, ``preprocess_flight_data`` and
+  ``FlightColumns.from_flights``, as ``fetch_flight_data`` and the snapshot
+  store do.
+- ``stream``: 64 KiB chunks through ``parse_states_stream``, then the flight
+  dicts for the snapshot body, as ``fetch_flight_columns`` does.
+- ``columns``: the streamed columns alone, i.e. the cost of ingestion itself.
+
+Peak RSS is reported above the interpreter's footprint after imports (Linux
+resets the high-water mark first; elsewhere import-time peaks can mask small runs).
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.run_benchmarks import AI_MODEL_DIR, OPENSKY_FIXTURE, load_fixture, scale_flight_states
+
+INGEST = """
+import resource, sys, time
+from flight_columns import FlightColumns
+from opensky_stream import parse_states_stream
+from preprocess import preprocess_flight_data
+import json, logging
+logging.disable(logging.WARNING)
+
+def rss_kb(field):
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith(field))
+
+mode, path = sys.argv[1], sys.argv[2]
+try:
+    # Reset the high-water mark so import-time peaks don't hide the ingestion peak
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")
+    before, peak_of = rss_kb("VmRSS:"), lambda: rss_kb("VmHWM:")
+except OSError:
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_of = lambda: resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+if mode == "json":
+    with open(path, "rb") as f:
+        body = f.read()
+    flight_data = json.loads(body)
+    flights = preprocess_flight_data(flight_data)
+    columns = FlightColumns.from_flights(flights)
+else:
+    with open(path, "rb") as f:
+        flight_data = parse_states_stream(iter(lambda: f.read(65536), b""))
+    columns = flight_data["columns"]
+    if mode == "stream":
+        flights = preprocess_flight_data(flight_data)
+elapsed = time.perf_counter() - start
+peak = peak_of()
+print(len(columns), (peak - before) / 1024.0, elapsed)
+"""
+
+
+def measure(mode, path):
+    """
+    Returns:
+        dict: {"flights", "peak_rss_mb", "seconds"} for one ingestion mode.
+    """
+    env = dict(os.environ, PYTHONPATH=AI_MODEL_DIR)
+    result = subprocess.run([sys.executable, "-c", INGEST, mode, path], env=env,
+                            capture_output=True, text=True, check=True)
+    flights, peak_mb, seconds = result.stdout.split()
+    return {"flights": int(flights), "peak_rss_mb": round(float(peak_mb), 1),
+            "seconds": round(float(seconds), 3)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Peak RSS of OpenSky snapshot ingestion")
+    parser.add_argument("--states", type=int, nargs="+", default=[10000, 50000])
+    args = parser.parse_args(argv)
+
+    fixture = load_fixture(OPENSKY_FIXTURE)
+    report = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for num_states in args.states:
+            path = os.path.join(workdir, f"states_{num_states}.json")
+            with open(path, "w") as f:
+                json.dump(scale_flight_states(fixture, num_states), f)
+            results = {mode: measure(mode, path) for mode in ("json", "stream", "columns")}
+            report[num_states] = dict(results, body_mb=round(os.path.getsize(path) / 1e6, 1))
+            saved = 1.0 - results["stream"]["peak_rss_mb"] / max(results["json"]["peak_rss_mb"], 1e-9)
+            print(f"{num_states:>7} states ({report[num_states]['body_mb']} MB body): "
+                  f"json {results['json']['peak_rss_mb']:.1f} MB / {results['json']['seconds']:.3f}s, "
+                  f"stream {results['stream']['peak_rss_mb']:.1f} MB / {results['stream']['seconds']:.3f}s "
+                  f"({saved:.0%} lower peak), columns alone {results['columns']['peak_rss_mb']:.1f} MB")
+    return report
+
+
+if __name__ == "__main__":
+    main()
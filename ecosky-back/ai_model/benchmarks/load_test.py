@@ -0,0 +1,270 @@
+# File: ecosky-back/ai_model/benchmarks/load_test.py
+"""
+End-to-end load test for ``/flights/all`` and ``/optimize``.
+
+Run from ``ecosky-back/ai_model``. Against a backend that is already running:
+
+    python -m benchmarks.load_test --url http://localhost:4000 --concurrency 32 --duration 30
+
+Or let the harness start everything locally: the stub OpenSky/NOAA server
+(``benchmarks/stub_upstream.py``) and ``app.py`` pointed at it, in a scratch
+directory:
+
+    python -m benchmarks.load_test --start-stack --upstream-states 10000 \\
+        --upstream-latency-ms 300 --upstream-error-rate 0.05 --concurrency 32 --duration 30
+
+Closed-loop workers send requests back to back for ``--duration`` seconds,
+picking endpoints by ``--mix`` weights. The report gives, per endpoint, the
+request count, error rate (non-2xx/304 responses and transport errors),
+throughput and p50/p95/p99 latency. With ``--start-stack`` it also gives the
+upstream requests the backend made.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+import requests
+
+from benchmarks.run_benchmarks import AI_MODEL_DIR
+from benchmarks.stub_upstream import add_stub_arguments, build_stub, make_server
+from scenario_bank import CITIES
+
+DEFAULT_MIX = "flights_all=0.8,optimize=0.2"
+
+
+def parse_mix(text):
+    """
+    Parse ``"flights_all=0.8,optimize=0.2"`` into normalized endpoint weights.
+
+    Returns:
+        dict: endpoint -> weight, summing to 1.
+    """
+    weights = {}
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        if name.strip() not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint {name.strip()!r}; expected one of {sorted(ENDPOINTS)}")
+        weights[name.strip()] = float(weight or 1.0)
+    total = sum(weights.values())
+    if total <= 0:
+        raise ValueError("Endpoint weights must sum to a positive number")
+    return {name: weight / total for name, weight in weights.items()}
+
+
+def _flights_all(session, base_url, rng, options, timeout):
+    return session.get(f"{base_url}/flights/all", headers={"Accept-Encoding": "gzip"}, timeout=timeout)
+
+
+def _optimize(session, base_url, rng, options, timeout):
+    start, end = rng.sample(list(CITIES.values()), 2)
+    payload = dict(options.get("optimize_payload") or {}, start=start, end=end)
+    return session.post(f"{base_url}/optimize", json=payload, timeout=timeout)
+
+
+ENDPOINTS = {"flights_all": _flights_all, "optimize": _optimize}
+
+
+def _is_error(status):
+    # Transport failures are recorded as the exception name
+    return not isinstance(status, int) or not (200 <= status < 300 or status == 304)
+
+
+def summarize(samples, elapsed_s):
+    """
+    Aggregate (endpoint, status, latency_s) samples.
+
+    Args:
+        samples (list[tuple]): status is the HTTP status, or the exception name.
+        elapsed_s (float): Wall-clock length of the measured window.
+
+    Returns:
+        dict: endpoint -> requests, errors, error_rate, throughput_rps,
+        latency_ms (p50/p95/p99/max) and status counts.
+    """
+    report = {}
+    for endpoint in sorted({sample[0] for sample in samples}):
+        statuses = [status for name, status, _ in samples if name == endpoint]
+        latencies = np.array([latency for name, _, latency in samples if name == endpoint]) * 1000.0
+        errors = sum(1 for status in statuses if _is_error(status))
+        report[endpoint] = {
+            "requests": len(statuses),
+            "errors": errors,
+            "error_rate": round(errors / len(statuses), 4),
+            "throughput_rps": round(len(statuses) / elapsed_s, 2),
+            "latency_ms": {
+                "p50": round(float(np.percentile(latencies, 50)), 2),
+                "p95": round(float(np.percentile(latencies, 95)), 2),
+                "p99": round(float(np.percentile(latencies, 99)), 2),
+                "max": round(float(latencies.max()), 2),
+            },
+            "status": {str(status): count for status, count in sorted(Counter(statuses).items(),
+                                                                       key=lambda item: str(item[0]))},
+        }
+    return report
+
+
+def run_load(base_url, concurrency=8, duration_s=10.0, mix=None, timeout=30.0, seed=0, **options):
+    """
+    Drive the backend with ``concurrency`` closed-loop workers for ``duration_s`` seconds.
+
+    Args:
+        base_url (str): Backend root, e.g. "http://localhost:4000".
+        mix (dict, optional): endpoint -> weight (see ``parse_mix``).
+        timeout (float, optional): Per-request timeout in seconds.
+        seed (int, optional): Seed for endpoint choice and /optimize city pairs.
+        **options: ``optimize_payload`` (dict) is merged into every /optimize body.
+
+    Returns:
+        dict: ``summarize`` report plus "elapsed_s" and "concurrency".
+    """
+    mix = mix or parse_mix(DEFAULT_MIX)
+    names, weights = list(mix), list(mix.values())
+    samples = []
+    samples_lock = threading.Lock()
+    deadline = time.perf_counter() + duration_s
+
+    def worker(worker_id):
+        rng = random.Random(seed * 1000003 + worker_id)
+        local = []
+        with requests.Session() as session:
+            while time.perf_counter() < deadline:
+                endpoint = rng.choices(names, weights)[0]
+                start = time.perf_counter()
+                try:
+                    response = ENDPOINTS[endpoint](session, base_url, rng, options, timeout)
+                    response.content  # read the whole body, as a client would
+                    status = response.status_code
+                except requests.RequestException as e:
+                    status = type(e).__name__
+                local.append((endpoint, status, time.perf_counter() - start))
+        with samples_lock:
+            samples.extend(local)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed_s = time.perf_counter() - started
+
+    return {"concurrency": concurrency, "elapsed_s": round(elapsed_s, 2),
+            "endpoints": summarize(samples, elapsed_s)}
+
+
+def wait_until_ready(base_url, timeout_s=60.0):
+    """
+    Poll ``/flights/all`` until the backend serves a snapshot.
+    """
+    deadline = time.perf_counter() + timeout_s
+    while time.perf_counter() < deadline:
+        try:
+            if requests.get(f"{base_url}/flights/all", timeout=5).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"Backend at {base_url} did not become ready within {timeout_s:.0f}s")
+
+
+@contextlib.contextmanager
+def local_stack(args):
+    """
+    Start the stub upstream in-process and ``app.py`` in a subprocess pointed at it.
+
+    Yields:
+        tuple: (backend base URL, StubUpstream)
+    """
+    stub = build_stub(args, prefix="upstream-")
+    server = make_server(stub, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    upstream = f"http://127.0.0.1:{server.server_address[1]}"
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # Scratch cwd and state so app.log, routes.db and the fetch leader lock stay out of the tree
+        env = dict(os.environ,
+                   PYTHONPATH=AI_MODEL_DIR,
+                   PORT=str(args.app_port),
+                   OPENSKY_API_URL=f"{upstream}/api",
+                   NOAA_API_URL=upstream,
+                   FETCH_STATE_DIR=os.path.join(workdir, "fetch"),
+                   ROUTE_STORE_PATH=os.path.join(workdir, "routes.db"))
+        env.update(item.split("=", 1) for item in args.app_env)
+        app = subprocess.Popen([sys.executable, os.path.join(AI_MODEL_DIR, "app.py")], cwd=workdir, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        base_url = f"http://127.0.0.1:{args.app_port}"
+        try:
+            wait_until_ready(base_url)
+            yield base_url, stub
+        finally:
+            app.terminate()
+            try:
+                app.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                app.kill()
+            server.shutdown()
+            server.server_close()
+
+
+def print_report(report):
+    print(f"{report['concurrency']} workers, {report['elapsed_s']}s")
+    print(f"{'endpoint':<14}{'requests':>10}{'rps':>10}{'errors':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for endpoint, stats in report["endpoints"].items():
+        latency = stats["latency_ms"]
+        print(f"{endpoint:<14}{stats['requests']:>10}{stats['throughput_rps']:>10.1f}"
+              f"{stats['error_rate']:>9.1%}{latency['p50']:>10.1f}{latency['p95']:>10.1f}{latency['p99']:>10.1f}")
+    if "upstream" in report:
+        print("upstream requests: " + ", ".join(f"{key}: {count}" for key, count in report["upstream"].items()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test /flights/all and /optimize end to end")
+    parser.add_argument("--url", default="http://localhost:4000", help="Backend to test (ignored with --start-stack)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Endpoint weights, e.g. flights_all=0.8,optimize=0.2")
+    parser.add_argument("--optimize-payload", default="{}",
+                        help='Extra /optimize fields as JSON, e.g. \'{"max_ms": 250}\'')
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report here")
+    parser.add_argument("--start-stack", action="store_true",
+                        help="Start the stub upstream and app.py locally for the run")
+    parser.add_argument("--app-port", type=int, default=4100)
+    parser.add_argument("--app-env", action="append", default=[], metavar="KEY=VALUE",
+                        help="Extra environment for the started app, e.g. POLICY_RUNTIME=onnx")
+    add_stub_arguments(parser, prefix="upstream-")
+    args = parser.parse_args(argv)
+
+    mix = parse_mix(args.mix)
+    optimize_payload = json.loads(args.optimize_payload)
+
+    with contextlib.ExitStack() as stack:
+        base_url, stub = args.url.rstrip("/"), None
+        if args.start_stack:
+            base_url, stub = stack.enter_context(local_stack(args))
+        report = run_load(base_url, concurrency=args.concurrency, duration_s=args.duration, mix=mix,
+                          timeout=args.timeout, seed=args.seed, optimize_payload=optimize_payload)
+        if stub is not None:
+            report["upstream"] = {f"{path} {status}": count
+                                  for (path, status), count in sorted(stub.requests.items())}
+
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main()
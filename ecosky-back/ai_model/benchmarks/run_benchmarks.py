@@ -0,0 +1,335 @@
+# File: ecosky-back/ai_model/benchmarks/run_benchmarks.py
+"""
+Micro-benchmarks for the environment, preprocessing and inference hot paths.
+
+Run from ``ecosky-back/ai_model``:
+
+    python -m benchmarks.run_benchmarks                    # compare against baseline.json
+    python -m benchmarks.run_benchmarks --update-baseline  # re-record baseline.json
+    python -m benchmarks.run_benchmarks --record           # re-capture fixtures from the live APIs
+
+The run exits non-zero when any benchmark is slower than its baseline by more
+than ``--tolerance``.
+"""
+
+import argparse
+import copy
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from preprocess import preprocess_flight_data, preprocess_weather_alerts
+from rl_env import FlightEnv
+from logging_setup import configure_logging
+
+logger = logging.getLogger(__name__)
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+AI_MODEL_DIR = os.path.dirname(BENCH_DIR)
+FIXTURES_DIR = os.path.join(BENCH_DIR, "fixtures")
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+
+OPENSKY_FIXTURE = os.path.join(FIXTURES_DIR, "opensky_states.json")
+NOAA_FIXTURE = os.path.join(FIXTURES_DIR, "noaa_alerts.json")
+
+# Same configuration optimize_flight_route builds for an /optimize request
+ENV_CONFIG = {
+    "start": [51.5074, -0.1278],  # London
+    "target": [40.7128, -74.0060],  # NYC
+    "storms_data": [
+        {"center": [55.0, -10.0], "radius": 2.0},
+        {"center": [60.0, -20.0], "radius": 1.5}
+    ],
+    "max_steps": 2000,
+    "start_altitude": 1500.0,
+    "start_heading": 45.0,
+    "start_velocity": 120.0,
+    "start_fuel": 5000.0
+}
+
+
+def load_fixture(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def scale_flight_states(flight_data, num_states, seed=0):
+    """
+    Grow a recorded OpenSky payload to ``num_states`` rows by replicating its
+    states with jittered positions and fresh icao24 addresses.
+    """
+    rng = np.random.default_rng(seed)
+    source = flight_data["states"]
+    states = []
+    for i in range(num_states):
+        state = list(source[i % len(source)])
+        state[0] = f"{i:06x}"
+        if state[5] is not None and state[6] is not None:
+            state[5] = float(np.clip(state[5] + rng.normal(0, 5.0), -180.0, 180.0))
+            state[6] = float(np.clip(state[6] + rng.normal(0, 3.0), -90.0, 90.0))
+        states.append(state)
+    return {"time": flight_data["time"], "states": states}
+
+
+def scale_weather_alerts(weather_data, num_features):
+    """
+    Grow a recorded NOAA alerts payload to ``num_features`` features.
+    """
+    source = weather_data["features"]
+    features = [copy.deepcopy(source[i % len(source)]) for i in range(num_features)]
+    return {"type": "FeatureCollection", "features": features}
+
+
+class TinyPolicy:
+    """
+    Small random-weight MLP standing in for the PPO policy, so rollouts can be
+    timed without Ray or a checkpoint.
+    """
+
+    def __init__(self, obs_dim=8, hidden=64, seed=0):
+        rng = np.random.default_rng(seed)
+        self.w1 = rng.normal(0, 0.1, (obs_dim, hidden)).astype(np.float32)
+        self.w2 = rng.normal(0, 0.1, (hidden, 3)).astype(np.float32)
+        self.scale = np.array([10.0, 0.2, 50.0], dtype=np.float32)
+        self.obs_scale = np.array([90.0, 180.0, 20000.0, 360.0, 500.0, 10000.0, 90.0, 180.0],
+                                  dtype=np.float32)
+
+    def compute_single_action(self, obs):
+        hidden = np.maximum(0.0, (obs / self.obs_scale) @ self.w1)
+        return np.tanh(hidden @ self.w2) * self.scale
+
+
+def bench_env_step(num_steps=20000):
+    env = FlightEnv(ENV_CONFIG)
+    env.reset(seed=0)
+    action = np.array([0.5, 0.0, 10.0], dtype=np.float32)
+    start = time.perf_counter()
+    for _ in range(num_steps):
+        _, _, done, truncated, _ = env.step(action)
+        if done or truncated:
+            env.reset()
+    return num_steps, time.perf_counter() - start
+
+
+def bench_env_reset(num_resets=20000):
+    env = FlightEnv(ENV_CONFIG)
+    start = time.perf_counter()
+    for _ in range(num_resets):
+        env.reset()
+    return num_resets, time.perf_counter() - start
+
+
+def bench_env_reset_bank(num_resets=20000, bank_size=100000):
+    from scenario_bank import generate_scenario_bank, save_scenario_bank
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "scenario_bank.npy")
+        save_scenario_bank(path, generate_scenario_bank(bank_size))
+        env = FlightEnv(dict(ENV_CONFIG, scenario_bank=path))
+        env.reset(seed=0)
+        start = time.perf_counter()
+        for _ in range(num_resets):
+            env.reset()
+        elapsed = time.perf_counter() - start
+        del env
+    return num_resets, elapsed
+
+
+def bench_haversine(num_calls=50000):
+    haversine = FlightEnv._haversine
+    start = time.perf_counter()
+    for i in range(num_calls):
+        haversine(51.5074, -0.1278, 40.7128, -74.0060 + i * 1e-6)
+    return num_calls, time.perf_counter() - start
+
+
+def bench_preprocess_flights(flight_data, repeats=5):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        preprocess_flight_data(flight_data)
+    return repeats, time.perf_counter() - start
+
+
+def bench_parse_states_stream(body, repeats=5, chunk_size=65536):
+    from opensky_stream import parse_states_stream
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        parse_states_stream(body[i:i + chunk_size] for i in range(0, len(body), chunk_size))
+    return repeats, time.perf_counter() - start
+
+
+def bench_preprocess_weather(weather_data, repeats=5):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        preprocess_weather_alerts(weather_data)
+    return repeats, time.perf_counter() - start
+
+
+def bench_optimize_rollout(repeats=3):
+    from inference import optimize_flight_route
+
+    policy = TinyPolicy()
+    storms = ENV_CONFIG["storms_data"]
+    start = time.perf_counter()
+    for _ in range(repeats):
+        optimize_flight_route(ENV_CONFIG["start"], ENV_CONFIG["target"], [], storms, "clear",
+                              algo=policy)
+    return repeats, time.perf_counter() - start
+
+
+# Run in a fresh interpreter: the cold-start cost of a worker that only serves /flights/all
+TRAFFIC_WORKER_IMPORT = """
+import sys, time
+start = time.perf_counter()
+import app
+elapsed = time.perf_counter() - start
+app.scheduler.shutdown(wait=False)
+print(elapsed, ",".join(m for m in ("ray", "torch") if m in sys.modules))
+"""
+
+
+def bench_traffic_worker_import():
+    # Scratch working directory so the worker's app.log doesn't land in the tree
+    env = dict(os.environ, PYTHONPATH=AI_MODEL_DIR)
+    with tempfile.TemporaryDirectory() as workdir:
+        result = subprocess.run([sys.executable, "-c", TRAFFIC_WORKER_IMPORT], cwd=workdir, env=env,
+                                capture_output=True, text=True, check=True)
+    elapsed, heavy = (result.stdout.strip().splitlines()[-1].split(" ", 1) + [""])[:2]
+    if heavy:
+        raise RuntimeError(f"Importing app pulled in heavy modules: {heavy}")
+    return 1, float(elapsed)
+
+
+def build_benchmarks():
+    """
+    Returns:
+        list[tuple]: (name, unit, zero-argument callable returning (ops, seconds)).
+    """
+    flight_data = scale_flight_states(load_fixture(OPENSKY_FIXTURE), 10000)
+    weather_data = scale_weather_alerts(load_fixture(NOAA_FIXTURE), 5000)
+    return [
+        ("env_step", "steps/s", bench_env_step),
+        ("env_reset", "resets/s", bench_env_reset),
+        ("env_reset_bank", "resets/s", bench_env_reset_bank),
+        ("haversine", "calls/s", bench_haversine),
+        ("preprocess_flights_10k", "snapshots/s", lambda: bench_preprocess_flights(flight_data)),
+        ("parse_states_stream_10k", "snapshots/s",
+         lambda: bench_parse_states_stream(json.dumps(flight_data).encode())),
+        ("preprocess_weather_5k", "batches/s", lambda: bench_preprocess_weather(weather_data)),
+        ("optimize_rollout", "rollouts/s", bench_optimize_rollout),
+        ("traffic_worker_import", "imports/s", bench_traffic_worker_import),
+    ]
+
+
+def run_benchmarks(rounds=5):
+    """
+    Run every benchmark ``rounds`` times and keep the best throughput.
+
+    Returns:
+        dict: name -> {"ops_per_sec": float, "unit": str}, or {"skipped": reason}.
+    """
+    results = {}
+    for name, unit, bench in build_benchmarks():
+        best = 0.0
+        try:
+            for _ in range(rounds):
+                ops, seconds = bench()
+                best = max(best, ops / seconds)
+        except ImportError as e:
+            results[name] = {"skipped": str(e)}
+            continue
+        results[name] = {"ops_per_sec": round(best, 2), "unit": unit}
+    return results
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """
+    Returns:
+        list[str]: Names of benchmarks slower than baseline by more than ``tolerance``.
+    """
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name, {}).get("ops_per_sec")
+        if "ops_per_sec" not in result or not expected:
+            continue
+        if result["ops_per_sec"] < expected * (1.0 - tolerance):
+            regressions.append(name)
+    return regressions
+
+
+def record_fixtures(num_states=50, num_features=30):
+    """
+    Capture fresh OpenSky and NOAA payloads, trimmed to a small sample.
+    """
+    from ingest_api import fetch_flight_data, fetch_weather_alerts
+
+    flight_raw = fetch_flight_data(
+        username=os.getenv('OPENSKY_USERNAME'),
+        password=os.getenv('OPENSKY_PASSWORD')
+    )
+    weather_raw = fetch_weather_alerts()
+    if not flight_raw or not weather_raw:
+        raise RuntimeError("Could not fetch live data to record fixtures.")
+
+    flight_raw["states"] = flight_raw["states"][:num_states]
+    weather_raw["features"] = weather_raw["features"][:num_features]
+    with open(OPENSKY_FIXTURE, "w") as f:
+        json.dump(flight_raw, f)
+    with open(NOAA_FIXTURE, "w") as f:
+        json.dump(weather_raw, f, indent=1)
+    logger.info(f"Recorded fixtures to {FIXTURES_DIR}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="EcoSky hot-path micro-benchmarks")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--tolerance", type=float, default=0.3,
+                        help="Allowed fractional slowdown before a benchmark counts as a regression")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--record", action="store_true",
+                        help="Re-capture fixtures from the live OpenSky and NOAA APIs first")
+    args = parser.parse_args(argv)
+
+    configure_logging()
+    # Keep per-call log records out of the timings and the report
+    logging.disable(logging.WARNING)
+
+    if args.record:
+        record_fixtures()
+
+    results = run_benchmarks(rounds=args.rounds)
+    baseline = load_fixture(BASELINE_PATH) if os.path.exists(BASELINE_PATH) else {}
+
+    for name, result in results.items():
+        if "skipped" in result:
+            print(f"{name:<26} skipped ({result['skipped']})")
+            continue
+        expected = baseline.get(name, {}).get("ops_per_sec")
+        delta = f"{(result['ops_per_sec'] / expected - 1.0) * 100:+.1f}%" if expected else "n/a"
+        print(f"{name:<26} {result['ops_per_sec']:>14,.2f} {result['unit']:<12} vs baseline {delta}")
+
+    if args.update_baseline:
+        # Benchmarks skipped on this machine keep their previous baseline
+        baseline.update({name: r for name, r in results.items() if "ops_per_sec" in r})
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline written to {BASELINE_PATH}")
+        return 0
+
+    regressions = compare_to_baseline(results, baseline, args.tolerance)
+    if regressions:
+        print(f"Performance regressions: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,218 @@
+# File: ecosky-back/ai_model/benchmarks/stub_upstream.py
+"""
+Local stand-in for the OpenSky ``states/all`` and NOAA ``alerts/active`` APIs.
+
+Run from ``ecosky-back/ai_model``:
+
+    python -m benchmarks.stub_upstream --port 8081 --states 10000 --latency-ms 300 --error-rate 0.05
+
+and point the backend at it:
+
+    OPENSKY_API_URL=http://localhost:8081/api NOAA_API_URL=http://localhost:8081 python app.py
+
+Recorded payloads (``benchmarks/fixtures/`` by default) are replayed with a
+configurable latency, jitter, 503 error rate and 429 rate-limit rate.
+``states/all`` is stamped with the current time, so the backend installs a new
+snapshot on every fetch as it would against the live API, and honours the
+lamin/lomin/lamax/lomax bbox. ``GET /_stats`` returns request counts by path
+and status.
+"""
+
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.run_benchmarks import (NOAA_FIXTURE, OPENSKY_FIXTURE, load_fixture, scale_flight_states,
+                                       scale_weather_alerts)
+
+logger = logging.getLogger(__name__)
+
+STATES_PATH = "/api/states/all"
+ALERTS_PATH = "/alerts/active"
+
+
+class StubUpstream:
+    """
+    Replays recorded upstream payloads with injected latency and failures.
+    """
+
+    def __init__(self, flight_data, weather_data, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0,
+                 rate_limit_rate=0.0, live_time=True, seed=0):
+        """
+        Args:
+            flight_data (dict): Recorded OpenSky ``states/all`` payload.
+            weather_data (dict): Recorded NOAA ``alerts/active`` payload.
+            latency_ms (float, optional): Mean added response latency.
+            jitter_ms (float, optional): Standard deviation of the added latency.
+            error_rate (float, optional): Share of requests answered with 503.
+            rate_limit_rate (float, optional): Share of requests answered with 429.
+            live_time (bool, optional): Stamp ``states/all`` with the current time
+                instead of the recorded one.
+            seed (int, optional): Seed for latency and failure draws.
+        """
+        self.states = flight_data.get("states") or []
+        self.recorded_time = flight_data.get("time")
+        # Serialized once; whole-world responses only splice in the time
+        self._states_json = json.dumps(self.states, separators=(",", ":"))
+        self._alerts_body = json.dumps(weather_data, separators=(",", ":")).encode("utf-8")
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.live_time = live_time
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = Counter()
+
+    def _draw(self):
+        with self._lock:
+            delay = max(0.0, self._random.gauss(self.latency_ms, self.jitter_ms))
+            roll = self._random.random()
+        if roll < self.rate_limit_rate:
+            return delay, 429
+        if roll < self.rate_limit_rate + self.error_rate:
+            return delay, 503
+        return delay, 200
+
+    def _states_body(self, query):
+        snapshot_time = int(time.time()) if self.live_time else self.recorded_time
+        bbox = [query.get(name, [None])[0] for name in ("lamin", "lomin", "lamax", "lomax")]
+        if None in bbox:
+            return f'{{"time":{snapshot_time},"states":{self._states_json}}}'.encode("utf-8")
+        lamin, lomin, lamax, lomax = (float(value) for value in bbox)
+        states = [state for state in self.states
+                  if state[6] is not None and state[5] is not None
+                  and lamin <= state[6] <= lamax and lomin <= state[5] <= lomax]
+        return json.dumps({"time": snapshot_time, "states": states}, separators=(",", ":")).encode("utf-8")
+
+    def handle(self, method, url):
+        """
+        Answer one request.
+
+        Returns:
+            tuple: (status, content_type, body bytes)
+        """
+        parsed = urlparse(url)
+        if method == "GET" and parsed.path == "/_stats":
+            with self._lock:
+                stats = {f"{path} {status}": count for (path, status), count in sorted(self.requests.items())}
+            return 200, "application/json", json.dumps(stats).encode("utf-8")
+
+        if method != "GET" or parsed.path not in (STATES_PATH, ALERTS_PATH):
+            status, body = 404, b'{"error":"not found"}'
+        else:
+            delay_ms, status = self._draw()
+            time.sleep(delay_ms / 1000.0)
+            if status == 429:
+                body = b'{"error":"Too many requests"}'
+            elif status == 503:
+                body = b'{"error":"Service unavailable"}'
+            elif parsed.path == STATES_PATH:
+                body = self._states_body(parse_qs(parsed.query))
+            else:
+                body = self._alerts_body
+
+        with self._lock:
+            self.requests[(parsed.path, status)] += 1
+        return status, "application/json", body
+
+
+def make_server(stub, host="127.0.0.1", port=8081):
+    """
+    Bind a threaded HTTP server for ``stub``; call ``serve_forever`` to run it.
+
+    Args:
+        port (int, optional): 0 picks a free port (see ``server.server_address``).
+
+    Returns:
+        ThreadingHTTPServer
+    """
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            status, content_type, body = stub.handle("GET", self.path)
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+def build_stub(args, prefix=""):
+    """
+    Build a StubUpstream from options registered by ``add_stub_arguments``.
+    """
+    def option(name):
+        return getattr(args, (prefix + name).replace("-", "_"))
+
+    flight_data = load_fixture(option("states-file"))
+    weather_data = load_fixture(option("alerts-file"))
+    if option("states"):
+        flight_data = scale_flight_states(flight_data, option("states"))
+    if option("alerts"):
+        weather_data = scale_weather_alerts(weather_data, option("alerts"))
+    return StubUpstream(flight_data, weather_data, latency_ms=option("latency-ms"),
+                        jitter_ms=option("jitter-ms"), error_rate=option("error-rate"),
+                        rate_limit_rate=option("rate-limit-rate"),
+                        live_time=not option("recorded-time"), seed=option("seed"))
+
+
+def add_stub_arguments(parser, prefix=""):
+    """
+    Register the stub options on ``parser``; ``prefix`` namespaces them (e.g. "upstream-").
+    """
+    parser.add_argument(f"--{prefix}states-file", default=OPENSKY_FIXTURE,
+                        help="Recorded states/all payload to replay")
+    parser.add_argument(f"--{prefix}alerts-file", default=NOAA_FIXTURE,
+                        help="Recorded alerts/active payload to replay")
+    parser.add_argument(f"--{prefix}states", type=int, default=0,
+                        help="Scale the recorded states to this many aircraft")
+    parser.add_argument(f"--{prefix}alerts", type=int, default=0,
+                        help="Scale the recorded alerts to this many features")
+    parser.add_argument(f"--{prefix}latency-ms", type=float, default=0.0)
+    parser.add_argument(f"--{prefix}jitter-ms", type=float, default=0.0)
+    parser.add_argument(f"--{prefix}error-rate", type=float, default=0.0, help="Share of 503 responses")
+    parser.add_argument(f"--{prefix}rate-limit-rate", type=float, default=0.0, help="Share of 429 responses")
+    parser.add_argument(f"--{prefix}recorded-time", action="store_true",
+                        help="Serve the recorded snapshot time instead of the current time")
+    parser.add_argument(f"--{prefix}seed", type=int, default=0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded OpenSky and NOAA payloads locally")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    add_stub_arguments(parser)
+    args = parser.parse_args(argv)
+
+    from logging_setup import configure_logging
+    configure_logging()
+
+    server = make_server(build_stub(args), args.host, args.port)
+    host, port = server.server_address[:2]
+    logger.info(f"Stub upstream listening on http://{host}:{port} "
+                f"(OPENSKY_API_URL=http://{host}:{port}/api NOAA_API_URL=http://{host}:{port})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
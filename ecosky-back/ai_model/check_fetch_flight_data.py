@@ -1,9 +1,11 @@
-# File: ecosky-backend/data/test_fetch_flight_data.py
+# File: ecosky-back/ai_model/check_fetch_flight_data.py
+# Manual check against the live OpenSky API; not collected by pytest.
+# Run from ecosky-back/ai_model: python check_fetch_flight_data.py
 
 from ingest_api import fetch_flight_data
 from preprocess import preprocess_flight_data
 
-def test_flight_data_fetching():
+def check_flight_data_fetching():
     raw_data = fetch_flight_data()
     if raw_data:
         print("Raw Flight Data:", raw_data)
@@ -13,4 +15,4 @@ def test_flight_data_fetching():
         print("Failed to fetch flight data.")
 
 if __name__ == "__main__":
-    test_flight_data_fetching()
+    check_flight_data_fetching()
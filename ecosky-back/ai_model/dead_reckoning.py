@@ -0,0 +1,54 @@
+import numpy as np
+
+EARTH_RADIUS_M = 6371000.0
+
+# Beyond a few minutes a straight-line projection is more misleading than a stale fix
+DEFAULT_MAX_HORIZON_S = 300.0
+
+
+def extrapolate_positions(columns, at_time, fallback_time=None, max_horizon_s=DEFAULT_MAX_HORIZON_S):
+    """
+    Dead-reckon every aircraft in a snapshot to ``at_time`` in one vectorized pass.
+
+    Each aircraft moves along the great circle given by its ``true_track`` at its
+    ground ``velocity``, and climbs or descends at its ``vertical_rate``. Aircraft
+    with no reported velocity or track stay where they were last seen.
+
+    Args:
+        columns (FlightColumns): Snapshot in columnar form.
+        at_time (float): Unix time to extrapolate to.
+        fallback_time (float, optional): Position time for rows whose
+            ``time_position`` is missing, typically the snapshot ``time``.
+        max_horizon_s (float, optional): Cap on how far ahead positions are projected.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: latitude, longitude (degrees)
+        and barometric altitude (meters) at ``at_time``; altitude stays NaN where
+        none was reported.
+    """
+    position_time = columns.time_position
+    if fallback_time is not None:
+        position_time = np.where(np.isnan(position_time), fallback_time, position_time)
+    dt = np.clip(at_time - position_time, 0.0, max_horizon_s)
+    dt = np.nan_to_num(dt)
+
+    speed = np.nan_to_num(columns.velocity)
+    track = np.deg2rad(np.nan_to_num(columns.true_track))
+    delta = speed * dt / EARTH_RADIUS_M  # angular distance travelled
+
+    lat1 = np.deg2rad(columns.latitude)
+    lon1 = np.deg2rad(columns.longitude)
+    sin_lat1, cos_lat1 = np.sin(lat1), np.cos(lat1)
+    sin_delta, cos_delta = np.sin(delta), np.cos(delta)
+
+    sin_lat2 = sin_lat1 * cos_delta + cos_lat1 * sin_delta * np.cos(track)
+    lat2 = np.arcsin(np.clip(sin_lat2, -1.0, 1.0))
+    lon2 = lon1 + np.arctan2(np.sin(track) * sin_delta * cos_lat1, cos_delta - sin_lat1 * sin_lat2)
+
+    latitude = np.rad2deg(lat2)
+    longitude = (np.rad2deg(lon2) + 540.0) % 360.0 - 180.0
+
+    climb = np.where(columns.on_ground, 0.0, np.nan_to_num(columns.vertical_rate) * dt)
+    altitude = np.maximum(0.0, columns.baro_altitude + climb)
+
+    return latitude, longitude, altitude
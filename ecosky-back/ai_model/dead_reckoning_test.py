@@ -0,0 +1,38 @@
+# File: ecosky-back/ai_model/dead_reckoning_test.py
+
+import numpy as np
+
+from dead_reckoning import EARTH_RADIUS_M, extrapolate_positions
+from flight_columns import FlightColumns
+
+
+def _columns():
+    return FlightColumns.from_flights([
+        # Eastbound on the equator, climbing
+        {"icao24": "a", "latitude": 0.0, "longitude": 10.0, "baro_altitude": 1000.0,
+         "velocity": 250.0, "true_track": 90.0, "vertical_rate": 5.0, "time_position": 1000,
+         "on_ground": False},
+        # No velocity or track reported, position time missing
+        {"icao24": "b", "latitude": 45.0, "longitude": -179.99, "baro_altitude": 0,
+         "velocity": 0, "true_track": None, "vertical_rate": None, "time_position": None,
+         "on_ground": True},
+    ])
+
+
+def test_extrapolates_along_track():
+    latitude, longitude, altitude = extrapolate_positions(_columns(), at_time=1100)
+
+    assert np.isclose(latitude[0], 0.0, atol=1e-9)
+    assert np.isclose(longitude[0], 10.0 + np.rad2deg(250.0 * 100 / EARTH_RADIUS_M))
+    assert np.isclose(altitude[0], 1500.0)
+    assert (latitude[1], longitude[1], altitude[1]) == (45.0, -179.99, 0.0)
+
+
+def test_horizon_is_capped_and_past_times_do_not_rewind():
+    columns = _columns()
+    _, capped, _ = extrapolate_positions(columns, at_time=1000 + 3600, max_horizon_s=60)
+    _, limit, _ = extrapolate_positions(columns, at_time=1060)
+    _, past, _ = extrapolate_positions(columns, at_time=500, fallback_time=1000)
+
+    assert np.isclose(capped[0], limit[0])
+    assert past[0] == 10.0
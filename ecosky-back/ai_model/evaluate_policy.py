@@ -0,0 +1,244 @@
+"""
+Evaluate a route policy over many random scenarios against the great-circle baseline.
+
+Run from ``ecosky-back/ai_model``:
+
+    python evaluate_policy.py --scenarios 5000 --workers 8 --policy checkpoint
+    python evaluate_policy.py --policy great_circle --output eval.jsonl
+
+Each scenario is a random city pair plus a random storm set. The policy is
+rolled out in FlightEnv and compared with the analytically computed
+great-circle route under the same fuel model. FlightEnv steps are one second,
+so each episode's step limit scales with the great-circle distance of its
+city pair (``step_budget``) unless ``--max-steps`` fixes one.
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from fuel_model import co2_for_fuel, fuel_for_distance
+from great_circle import DEFAULT_STEP_SLACK, GreatCirclePolicy, great_circle_baseline, great_circle_route, step_budget
+from inference import build_env_config
+from rl_env import FlightEnv
+from scenario_bank import CITIES
+
+logger = logging.getLogger(__name__)
+
+_policy = None
+
+
+def generate_scenarios(num_scenarios, max_storms=4, seed=0):
+    """
+    Draw random city pairs and storm sets.
+
+    Storms are centred near points on the great circle between the two cities,
+    so the direct route is genuinely at risk of crossing them.
+
+    Returns:
+        list[dict]: Scenarios with "origin", "destination", "start", "end" and "storms".
+    """
+    rng = np.random.default_rng(seed)
+    names = list(CITIES)
+    scenarios = []
+    for scenario_id in range(num_scenarios):
+        origin, destination = rng.choice(names, size=2, replace=False)
+        start, end = CITIES[origin], CITIES[destination]
+
+        path = great_circle_route(start, end, num_points=50)
+        storms = []
+        for _ in range(rng.integers(0, max_storms + 1)):
+            lat, lon = path[rng.integers(5, 45)] + rng.normal(0.0, 1.5, size=2)
+            storms.append({"center": [float(lat), float(lon)], "radius": float(rng.uniform(20.0, 300.0))})
+
+        scenarios.append({"id": scenario_id, "origin": str(origin), "destination": str(destination),
+                          "start": start, "end": end, "storms": storms})
+    return scenarios
+
+
+def load_policy(name):
+    """
+    Returns:
+        object: Policy exposing ``compute_single_action(obs)``.
+    """
+    if name == "checkpoint":
+        from inference import load_trained_model
+        return load_trained_model()
+    if name in ("onnx", "onnx-int8"):
+        from inference import load_policy as load_runtime_policy
+        return load_runtime_policy(name)
+    if name == "great_circle":
+        return GreatCirclePolicy()
+    if name == "random":
+        env = FlightEnv()
+        return _RandomPolicy(env.action_space)
+    raise ValueError(f"Unknown policy: {name}")
+
+
+class _RandomPolicy:
+    def __init__(self, action_space):
+        self.action_space = action_space
+
+    def compute_single_action(self, obs):
+        return self.action_space.sample()
+
+
+def _init_worker(policy_name):
+    global _policy
+    logging.disable(logging.WARNING)
+    _policy = load_policy(policy_name)
+
+
+def evaluate_scenario(scenario, max_steps=None, step_slack=DEFAULT_STEP_SLACK):
+    """
+    Roll out the worker's policy on one scenario and compare it with the baseline.
+
+    Args:
+        max_steps (int, optional): Fixed episode step limit; by default it is
+            ``step_budget`` for the scenario's city pair.
+        step_slack (float, optional): Slack passed to ``step_budget``.
+
+    Returns:
+        dict: Per-scenario outcome, fuel/CO2 and savings figures.
+    """
+    if max_steps is None:
+        max_steps = step_budget(scenario["start"], scenario["end"], step_slack)
+    env = FlightEnv(build_env_config(scenario["start"], scenario["end"], scenario["storms"],
+                                     max_steps=max_steps))
+    obs, _ = env.reset()
+    baseline = great_circle_baseline(scenario["start"], scenario["end"])
+
+    fuel = 0.0
+    storm_steps = 0
+    steps = 0
+    done = truncated = False
+    info = {"dist_to_target": baseline["distance_km"]}
+    while not (done or truncated):
+        obs, _, done, truncated, info = env.step(_policy.compute_single_action(obs))
+        fuel += float(info["fuel_used"])
+        storm_steps += info["storm_penalty"] < 0
+        steps += 1
+
+    remaining_km = float(info["dist_to_target"])
+    progress_km = baseline["distance_km"] - remaining_km
+    success = bool(remaining_km < 1.0)
+
+    result = {
+        "id": scenario["id"],
+        "origin": scenario["origin"],
+        "destination": scenario["destination"],
+        "num_storms": len(scenario["storms"]),
+        "steps": steps,
+        "max_steps": max_steps,
+        "success": success,
+        "truncated": bool(truncated),
+        "out_of_fuel": bool(env.fuel <= 0.0),
+        "storm_steps": int(storm_steps),
+        "great_circle_km": baseline["distance_km"],
+        "progress_km": progress_km,
+        "policy_fuel": fuel,
+        "policy_co2": co2_for_fuel(fuel),
+        # Fuel the great circle would burn for the same progress, minus what the policy burned
+        "fuel_saved_vs_great_circle": fuel_for_distance(progress_km) - fuel,
+    }
+    result["co2_reduced_vs_great_circle"] = co2_for_fuel(result["fuel_saved_vs_great_circle"])
+    if success:
+        # Full-trip comparison only makes sense when the policy actually arrived
+        result["trip_fuel_saved"] = baseline["fuel"] - fuel
+        result["trip_co2_reduced"] = baseline["co2"] - result["policy_co2"]
+    return result
+
+
+def _evaluate_batch(args):
+    scenarios, max_steps, step_slack = args
+    return [evaluate_scenario(scenario, max_steps=max_steps, step_slack=step_slack) for scenario in scenarios]
+
+
+def run_evaluation(scenarios, policy_name="great_circle", workers=None, max_steps=None,
+                   step_slack=DEFAULT_STEP_SLACK, batch_size=16):
+    """
+    Evaluate ``scenarios`` across a process pool.
+
+    Args:
+        max_steps (int, optional): Fixed episode step limit; scaled per scenario when omitted.
+        step_slack (float, optional): Slack for the scaled limits (see ``step_budget``).
+
+    Returns:
+        tuple: (list of per-scenario results, elapsed seconds)
+    """
+    batches = [(scenarios[i:i + batch_size], max_steps, step_slack)
+               for i in range(0, len(scenarios), batch_size)]
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(policy_name,)) as pool:
+        results = [r for batch in pool.map(_evaluate_batch, batches) for r in batch]
+    return results, time.perf_counter() - start
+
+
+def _distribution(values):
+    if not values:
+        return None
+    values = np.asarray(values, dtype=float)
+    p5, p50, p95 = np.percentile(values, [5, 50, 95])
+    return {"mean": float(values.mean()), "p5": float(p5), "p50": float(p50), "p95": float(p95)}
+
+
+def summarize(results, elapsed):
+    """
+    Aggregate per-scenario results into rates, savings distributions and throughput.
+    """
+    n = len(results)
+    successes = [r for r in results if r["success"]]
+    return {
+        "scenarios": n,
+        "success_rate": len(successes) / n if n else 0.0,
+        "truncation_rate": sum(r["truncated"] for r in results) / n if n else 0.0,
+        "out_of_fuel_rate": sum(r["out_of_fuel"] for r in results) / n if n else 0.0,
+        "storm_step_rate": (sum(r["storm_steps"] for r in results) / max(sum(r["steps"] for r in results), 1)),
+        "fuel_saved_vs_great_circle": _distribution([r["fuel_saved_vs_great_circle"] for r in results]),
+        "co2_reduced_vs_great_circle": _distribution([r["co2_reduced_vs_great_circle"] for r in results]),
+        "trip_fuel_saved": _distribution([r["trip_fuel_saved"] for r in successes]),
+        "trip_co2_reduced": _distribution([r["trip_co2_reduced"] for r in successes]),
+        "scenarios_per_sec": n / elapsed if elapsed else 0.0,
+        "env_steps_per_sec": sum(r["steps"] for r in results) / elapsed if elapsed else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate a route policy against the great-circle baseline")
+    parser.add_argument("--scenarios", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--policy", choices=["checkpoint", "onnx", "onnx-int8", "great_circle", "random"], default="checkpoint")
+    parser.add_argument("--max-steps", type=int,
+                        help="Fixed episode step limit (default: scaled to each city pair's distance)")
+    parser.add_argument("--step-slack", type=float, default=DEFAULT_STEP_SLACK,
+                        help="Scaled step limit as a multiple of the direct route's cruise steps")
+    parser.add_argument("--max-storms", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write per-scenario results as JSON lines")
+    args = parser.parse_args(argv)
+
+    from logging_setup import configure_logging
+    configure_logging()
+
+    scenarios = generate_scenarios(args.scenarios, max_storms=args.max_storms, seed=args.seed)
+    logger.info(f"Evaluating policy '{args.policy}' on {len(scenarios)} scenarios "
+                f"with {args.workers} workers...")
+    results, elapsed = run_evaluation(scenarios, args.policy, workers=args.workers,
+                                      max_steps=args.max_steps, step_slack=args.step_slack)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            for result in results:
+                f.write(json.dumps(result) + "\n")
+
+    print(json.dumps(summarize(results, elapsed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+# File: ecosky-back/ai_model/evaluate_policy_test.py
+
+import evaluate_policy
+from evaluate_policy import evaluate_scenario, step_budget, summarize
+from great_circle import GreatCirclePolicy
+from scenario_bank import CITIES
+
+
+def test_step_budget_scales_with_distance():
+    short = step_budget(CITIES["Paris"], CITIES["Frankfurt"])
+    long = step_budget(CITIES["London"], CITIES["Sydney"])
+    assert short < 3500
+    # 17,000 km at 0.25 km per step needs ~68,000 steps
+    assert long > 68000
+
+
+def test_great_circle_baseline_completes_long_haul(monkeypatch):
+    monkeypatch.setattr(evaluate_policy, "_policy", GreatCirclePolicy())
+    scenario = {"id": 0, "origin": "Istanbul", "destination": "London",
+                "start": CITIES["Istanbul"], "end": CITIES["London"], "storms": []}
+
+    result = evaluate_scenario(scenario)
+
+    assert result["success"] and not result["truncated"]
+    assert result["progress_km"] > 0.99 * result["great_circle_km"]
+    summary = summarize([result], elapsed=1.0)
+    assert summary["success_rate"] == 1.0
+    assert summary["trip_fuel_saved"] is not None
@@ -0,0 +1,356 @@
+"""
+Export the trained PPO policy to ONNX (fp32 and int8) for CPU inference.
+
+Run from ``ecosky-back/ai_model``:
+
+    python export_policy.py                 # export, check accuracy, benchmark
+    python export_policy.py --skip-benchmark
+
+This writes ``saved_models/flight_optimizer.onnx`` and
+``saved_models/flight_optimizer.int8.onnx`` (dynamically quantized weights),
+both with a dynamic batch dimension. Set ``POLICY_RUNTIME=onnx`` or
+``POLICY_RUNTIME=onnx-int8`` to serve /optimize from them.
+
+Exported policies are deterministic: they return the mean of the action
+distribution, which is what RLlib computes with ``explore=False``, mapped to
+the action-space bounds the way ``Algorithm.compute_single_action`` does
+(unsquashed with ``normalize_actions``, clipped with ``clip_actions``).
+"""
+
+import argparse
+import inspect
+import json
+import logging
+import os
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SAVED_MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "saved_models")
+ONNX_POLICY_PATH = os.path.join(SAVED_MODELS_DIR, "flight_optimizer.onnx")
+ONNX_INT8_POLICY_PATH = os.path.join(SAVED_MODELS_DIR, "flight_optimizer.int8.onnx")
+
+BENCHMARK_BATCH_SIZES = (1, 4, 16, 64, 256, 1024)
+
+
+def bounded_actions(model, low, high, normalize_actions=True, clip_actions=False):
+    """
+    Map a network's raw action means to env actions inside the graph.
+
+    RLlib learns in a normalized [-1, 1] action space when ``normalize_actions``
+    is set and unsquashes to the Box bounds (then clips) before returning an
+    action; otherwise it clips if ``clip_actions`` is set.
+
+    Args:
+        model (torch.nn.Module): ``obs -> raw action`` network.
+        low (array-like): Action-space lower bounds.
+        high (array-like): Action-space upper bounds.
+
+    Returns:
+        torch.nn.Module: ``obs -> env action`` in eval mode.
+    """
+    import torch
+
+    class BoundedActions(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.model = model
+            self.register_buffer("low", torch.as_tensor(np.asarray(low, dtype=np.float32)))
+            self.register_buffer("high", torch.as_tensor(np.asarray(high, dtype=np.float32)))
+
+        def forward(self, obs):
+            action = self.model(obs)
+            if normalize_actions:
+                action = self.low + (action + 1.0) * (self.high - self.low) / 2.0
+            if normalize_actions or clip_actions:
+                action = torch.maximum(torch.minimum(action, self.high), self.low)
+            return action
+
+    return BoundedActions().eval()
+
+
+def uses_new_api_stack(algo):
+    """
+    Whether ``algo`` was configured for RLModules (the new API stack).
+
+    The flag is ``_enable_new_api_stack`` up to Ray 2.9 and
+    ``enable_rl_module_and_learner`` from Ray 2.10 on.
+    """
+    for flag in ("enable_rl_module_and_learner", "_enable_new_api_stack"):
+        if hasattr(algo.config, flag):
+            return bool(getattr(algo.config, flag))
+    return False
+
+
+def policy_network(algo, action_space):
+    """
+    Wrap the torch model of a restored algorithm as ``obs -> action``.
+
+    Uses the RLModule on the new API stack (see ``uses_new_api_stack``) and the
+    policy's ModelV2 otherwise.
+    The output goes through ``bounded_actions`` with the algorithm's
+    ``normalize_actions``/``clip_actions`` settings, so it matches
+    ``algo.compute_single_action(obs, explore=False)``.
+
+    Args:
+        algo: Restored RLlib Algorithm.
+        action_space (gym.spaces.Box): Env action space.
+
+    Returns:
+        torch.nn.Module: Deterministic policy network in eval mode.
+    """
+    import torch
+
+    action_dim = action_space.shape[0]
+
+    class DeterministicPolicy(torch.nn.Module):
+        def __init__(self, module, new_api_stack):
+            super().__init__()
+            self.module = module
+            self.new_api_stack = new_api_stack
+
+        def forward(self, obs):
+            if self.new_api_stack:
+                dist_inputs = self.module.forward_inference({"obs": obs})["action_dist_inputs"]
+            else:
+                dist_inputs, _ = self.module({"obs": obs}, [], None)
+            # Diagonal Gaussian: the distribution inputs are [mean, log_std]
+            return dist_inputs[:, :action_dim]
+
+    if uses_new_api_stack(algo):
+        # Ray 2.9 keeps the RLModule as the policy's model; later versions expose get_module
+        module = algo.get_module() if hasattr(algo, "get_module") else algo.get_policy().model
+        network = DeterministicPolicy(module, True)
+    else:
+        network = DeterministicPolicy(algo.get_policy().model, False)
+    return bounded_actions(network, action_space.low, action_space.high,
+                           normalize_actions=algo.config.normalize_actions,
+                           clip_actions=algo.config.clip_actions)
+
+
+def export_onnx(model, path, obs_dim, opset=17):
+    """
+    Export ``model`` (obs -> action) to ONNX with a dynamic batch dimension.
+    """
+    import torch
+
+    dummy = torch.zeros(1, obs_dim, dtype=torch.float32)
+    options = {}
+    # torch >= 2.5 can export through dynamo; keep the TorchScript exporter, which
+    # older releases use unconditionally and which handles the RLlib models
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        options["dynamo"] = False
+    torch.onnx.export(
+        model, (dummy,), path,
+        input_names=["obs"], output_names=["action"],
+        dynamic_axes={"obs": {0: "batch"}, "action": {0: "batch"}},
+        opset_version=opset,
+        **options,
+    )
+    logger.info(f"Exported ONNX policy to {path}")
+    return path
+
+
+def quantize_int8(onnx_path, output_path):
+    """
+    Dynamically quantize an ONNX policy's weights to int8.
+
+    Activations are quantized on the fly at run time, so no calibration data
+    is needed.
+    """
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(onnx_path, output_path, weight_type=QuantType.QInt8)
+    logger.info(f"Wrote int8 ONNX policy to {output_path}")
+    return output_path
+
+
+class OnnxPolicy:
+    """
+    ONNX Runtime policy exposing the same ``compute_single_action`` interface as
+    an RLlib algorithm, plus ``compute_actions`` for batches.
+    """
+
+    def __init__(self, path, num_threads=None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.path = path
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        # None when the graph was exported without a fixed observation size
+        obs_dim = self.session.get_inputs()[0].shape[-1]
+        self.obs_dim = obs_dim if isinstance(obs_dim, int) else None
+
+    def compute_actions(self, obs_batch):
+        """
+        Returns:
+            np.ndarray: (batch, action_dim) actions.
+        """
+        obs_batch = np.ascontiguousarray(obs_batch, dtype=np.float32)
+        return self.session.run(None, {self.input_name: obs_batch})[0]
+
+    def compute_single_action(self, obs):
+        return self.compute_actions(np.asarray(obs, dtype=np.float32)[None, :])[0]
+
+
+def sample_observations(num_samples, seed=0):
+    """
+    Observations gathered from FlightEnv rollouts of the heuristic great-circle
+    policy over random scenarios, so accuracy is checked on realistic inputs.
+    """
+    from great_circle import GreatCirclePolicy
+    from inference import build_env_config
+    from rl_env import FlightEnv
+    from scenario_bank import generate_scenario_bank, scenario_from_record
+
+    policy = GreatCirclePolicy()
+    observations = []
+    for record in generate_scenario_bank(max(num_samples // 100, 1), seed=seed):
+        start, target, storms = scenario_from_record(record)
+        env = FlightEnv(build_env_config(start.tolist(), target.tolist(), storms, max_steps=100))
+        obs, _ = env.reset(seed=seed)
+        done = truncated = False
+        while not (done or truncated):
+            observations.append(obs)
+            obs, _, done, truncated, _ = env.step(policy.compute_single_action(obs))
+    return np.array(observations[:num_samples], dtype=np.float32)
+
+
+def reference_actions(policy, observations):
+    """
+    Deterministic actions of the original policy, one ``compute_single_action`` per observation.
+
+    Args:
+        policy: Restored RLlib Algorithm (or anything with the same method).
+        observations (np.ndarray): (n, obs_dim) inputs.
+
+    Returns:
+        np.ndarray: (n, action_dim) actions in env units.
+    """
+    return np.array([policy.compute_single_action(obs, explore=False) for obs in observations],
+                    dtype=np.float32)
+
+
+def check_accuracy(reference, candidate, observations):
+    """
+    Compare a candidate runtime with the reference actions.
+
+    Args:
+        reference (np.ndarray): (n, action_dim) actions from the original policy.
+        candidate: Exported policy (``OnnxPolicy``) or a batch ``compute_actions`` function.
+        observations (np.ndarray): (n, obs_dim) inputs that produced ``reference``.
+
+    Returns:
+        dict: Max and mean absolute error overall and per action dimension.
+    """
+    compute_actions = getattr(candidate, "compute_actions", candidate)
+    error = np.abs(compute_actions(observations) - reference)
+    return {
+        "max_abs_error": float(error.max()),
+        "mean_abs_error": float(error.mean()),
+        "max_abs_error_per_dim": error.max(axis=0).tolist(),
+    }
+
+
+def benchmark(compute_actions, observations, batch_sizes=BENCHMARK_BATCH_SIZES, min_seconds=0.5):
+    """
+    Measure CPU latency and throughput of ``compute_actions`` per batch size.
+
+    Returns:
+        dict: batch_size -> {"latency_ms_p50", "latency_ms_p95", "obs_per_sec"}.
+    """
+    results = {}
+    for batch_size in batch_sizes:
+        batch = np.resize(observations, (batch_size, observations.shape[1])).astype(np.float32)
+        compute_actions(batch)  # warm-up
+        timings = []
+        total_start = time.perf_counter()
+        while time.perf_counter() - total_start < min_seconds or len(timings) < 5:
+            start = time.perf_counter()
+            compute_actions(batch)
+            timings.append(time.perf_counter() - start)
+        timings = np.array(timings) * 1000.0
+        results[batch_size] = {
+            "latency_ms_p50": round(float(np.percentile(timings, 50)), 4),
+            "latency_ms_p95": round(float(np.percentile(timings, 95)), 4),
+            "obs_per_sec": round(float(batch_size / (timings.mean() / 1000.0)), 1),
+        }
+    return results
+
+
+def torch_compute_actions(model):
+    import torch
+
+    def compute_actions(obs_batch):
+        with torch.no_grad():
+            return model(torch.from_numpy(np.ascontiguousarray(obs_batch, dtype=np.float32))).numpy()
+    return compute_actions
+
+
+def export_policy(model, obs_dim, reference_policy, onnx_path=ONNX_POLICY_PATH,
+                  int8_path=ONNX_INT8_POLICY_PATH, num_samples=4096, run_benchmark=True):
+    """
+    Export ``model`` to fp32 and int8 ONNX, check both against the original policy
+    and optionally benchmark.
+
+    Args:
+        model (torch.nn.Module): ``obs -> action`` network from ``policy_network``.
+        obs_dim (int): Observation size.
+        reference_policy: Original policy; its ``compute_single_action(obs, explore=False)``
+            actions are the accuracy reference for torch, ONNX and int8 ONNX alike.
+
+    Returns:
+        dict: Report with "accuracy" and, if requested, "benchmark" per runtime.
+    """
+    export_onnx(model, onnx_path, obs_dim)
+    quantize_int8(onnx_path, int8_path)
+
+    observations = sample_observations(num_samples)
+    reference = reference_actions(reference_policy, observations)
+    torch_actions = torch_compute_actions(model)
+    runtimes = {"onnx": OnnxPolicy(onnx_path), "onnx-int8": OnnxPolicy(int8_path)}
+
+    report = {
+        "files": {name: {"path": policy.path, "bytes": os.path.getsize(policy.path)}
+                  for name, policy in runtimes.items()},
+        "accuracy": {name: check_accuracy(reference, policy, observations)
+                     for name, policy in dict(runtimes, torch=torch_actions).items()},
+    }
+    if run_benchmark:
+        report["benchmark"] = {"torch": benchmark(torch_actions, observations)}
+        for name, policy in runtimes.items():
+            report["benchmark"][name] = benchmark(policy.compute_actions, observations)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the PPO policy to ONNX and int8 ONNX")
+    parser.add_argument("--onnx-path", default=ONNX_POLICY_PATH)
+    parser.add_argument("--int8-path", default=ONNX_INT8_POLICY_PATH)
+    parser.add_argument("--samples", type=int, default=4096, help="Observations used for the accuracy check")
+    parser.add_argument("--skip-benchmark", action="store_true")
+    args = parser.parse_args(argv)
+
+    from logging_setup import configure_logging
+    configure_logging()
+
+    from inference import load_trained_model
+    from rl_env import FlightEnv
+
+    env = FlightEnv()
+    algo = load_trained_model()
+    model = policy_network(algo, env.action_space)
+
+    report = export_policy(model, env.observation_space.shape[0], algo, onnx_path=args.onnx_path,
+                           int8_path=args.int8_path, num_samples=args.samples,
+                           run_benchmark=not args.skip_benchmark)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
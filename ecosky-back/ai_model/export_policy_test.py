@@ -0,0 +1,110 @@
+# File: ecosky-back/ai_model/export_policy_test.py
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("onnxruntime")
+
+from export_policy import (OnnxPolicy, benchmark, bounded_actions, check_accuracy, export_onnx, export_policy,
+                           quantize_int8, sample_observations, torch_compute_actions)
+from rl_env import FlightEnv
+
+
+class TinyPolicyNetwork(torch.nn.Module):
+    """Stand-in for the exported RLModule: obs -> action mean."""
+
+    def __init__(self, obs_dim=8, action_dim=3):
+        super().__init__()
+        torch.manual_seed(0)
+        self.scale = torch.tensor([90.0, 180.0, 20000.0, 360.0, 500.0, 10000.0, 90.0, 180.0])
+        self.net = torch.nn.Sequential(torch.nn.Linear(obs_dim, 64), torch.nn.ReLU(),
+                                       torch.nn.Linear(64, 64), torch.nn.ReLU(),
+                                       torch.nn.Linear(64, action_dim))
+
+    def forward(self, obs):
+        return self.net(obs / self.scale)
+
+
+class NormalizedActionsAlgo:
+    """Stand-in for a restored Algorithm with normalize_actions=True: unsquashes in NumPy like RLlib."""
+
+    def __init__(self, network, action_space):
+        self.network = network
+        self.action_space = action_space
+
+    def compute_single_action(self, obs, explore=None):
+        with torch.no_grad():
+            raw = self.network(torch.from_numpy(np.asarray(obs, dtype=np.float32))[None, :])[0].numpy()
+        low, high = self.action_space.low, self.action_space.high
+        return np.clip(low + (raw + 1.0) * (high - low) / 2.0, low, high)
+
+
+def test_export_checks_onnx_against_original_policy(tmp_path):
+    network = TinyPolicyNetwork().eval()
+    action_space = FlightEnv().action_space
+    algo = NormalizedActionsAlgo(network, action_space)
+    model = bounded_actions(network, action_space.low, action_space.high, normalize_actions=True)
+
+    report = export_policy(model, 8, algo, onnx_path=str(tmp_path / "policy.onnx"),
+                           int8_path=str(tmp_path / "policy.int8.onnx"), num_samples=256,
+                           run_benchmark=False)
+
+    assert report["accuracy"]["torch"]["max_abs_error"] < 1e-4
+    assert report["accuracy"]["onnx"]["max_abs_error"] < 1e-3
+    # Actions come out in env units (±10°, ±0.2, ±50 m), not the normalized space
+    actions = OnnxPolicy(str(tmp_path / "policy.onnx")).compute_actions(sample_observations(256))
+    assert np.all(actions >= action_space.low) and np.all(actions <= action_space.high)
+    assert np.abs(actions[:, 2]).max() > 1.0
+
+
+def test_onnx_export_matches_torch(tmp_path):
+    model = TinyPolicyNetwork().eval()
+    onnx_path = export_onnx(model, str(tmp_path / "policy.onnx"), obs_dim=8)
+    int8_path = quantize_int8(onnx_path, str(tmp_path / "policy.int8.onnx"))
+
+    observations = sample_observations(256)
+    reference = torch_compute_actions(model)(observations)
+
+    fp32 = OnnxPolicy(onnx_path)
+    assert check_accuracy(reference, fp32, observations)["max_abs_error"] < 1e-4
+    # Dynamic batch axis: single observations and large batches share one graph
+    assert fp32.compute_single_action(observations[0]).shape == (3,)
+    assert fp32.compute_actions(np.resize(observations, (1024, 8))).shape == (1024, 3)
+
+    int8 = check_accuracy(reference, OnnxPolicy(int8_path), observations)
+    assert int8["mean_abs_error"] < 0.05 * np.abs(reference).mean() + 1e-3
+
+
+def test_benchmark_reports_each_batch_size():
+    model = TinyPolicyNetwork().eval()
+    results = benchmark(torch_compute_actions(model), np.zeros((4, 8), dtype=np.float32),
+                        batch_sizes=(1, 16), min_seconds=0.01)
+    assert set(results) == {1, 16}
+    assert all(r["obs_per_sec"] > 0 for r in results.values())
+
+
+def test_rllib_export_round_trip_matches_compute_single_action(tmp_path):
+    pytest.importorskip("ray.rllib")
+    from ray.rllib.algorithms.ppo import PPOConfig
+
+    from export_policy import policy_network
+
+    config = (PPOConfig().environment(env=FlightEnv, env_config={}).framework("torch")
+              .training(model={"fcnet_hiddens": [16, 16]}))
+    if hasattr(config, "env_runners"):
+        config = config.env_runners(num_env_runners=0)
+    else:
+        config = config.rollouts(num_rollout_workers=0)
+    algo = config.build()
+    try:
+        action_space = FlightEnv().action_space
+        model = policy_network(algo, action_space)
+        report = export_policy(model, 8, algo, onnx_path=str(tmp_path / "policy.onnx"),
+                               int8_path=str(tmp_path / "policy.int8.onnx"), num_samples=128,
+                               run_benchmark=False)
+    finally:
+        algo.stop()
+
+    assert report["accuracy"]["torch"]["max_abs_error"] < 1e-4
+    assert report["accuracy"]["onnx"]["max_abs_error"] < 1e-3
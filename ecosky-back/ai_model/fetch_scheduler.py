@@ -0,0 +1,430 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # no flock (Windows): every process acts as its own leader
+    fcntl = None
+
+import numpy as np
+
+from flight_columns import FlightColumns
+from metrics import span
+from opensky_stream import payload_columns
+
+logger = logging.getLogger(__name__)
+
+# OpenSky credit cost of one states/all call by bbox area in square degrees;
+# the whole world (no bbox) costs the top tier
+CREDIT_TIERS = ((25.0, 1), (100.0, 2), (400.0, 3))
+GLOBAL_CREDIT_COST = 4
+
+# OpenSky daily credit allowances
+AUTHENTICATED_CREDITS_PER_DAY = 4000
+ANONYMOUS_CREDITS_PER_DAY = 400
+
+DEFAULT_STATE_DIR = os.path.join(tempfile.gettempdir(), "ecosky-fetch")
+
+# A region that is still being viewed is re-persisted at most this often; the
+# view TTL is much longer, so the leader never sees it lapse in between
+VIEW_WRITE_INTERVAL_S = 5.0
+
+
+def credit_cost(bbox=None):
+    """
+    OpenSky credits charged for a states/all request over ``bbox``.
+
+    Args:
+        bbox (tuple, optional): (lamin, lomin, lamax, lomax) in degrees.
+
+    Returns:
+        int: Credits, 1-4.
+    """
+    if bbox is None:
+        return GLOBAL_CREDIT_COST
+    lamin, lomin, lamax, lomax = bbox
+    area = abs(lamax - lamin) * abs(lomax - lomin)
+    for limit, cost in CREDIT_TIERS:
+        if area <= limit:
+            return cost
+    return GLOBAL_CREDIT_COST
+
+
+def parse_bbox(args):
+    """
+    Parse optional lamin/lomin/lamax/lomax query parameters.
+
+    Args:
+        args: Werkzeug ``MultiDict`` of query parameters (``request.args``).
+
+    Returns:
+        tuple: (lamin, lomin, lamax, lomax), or None if no bbox was given.
+
+    Raises:
+        ValueError: If the bbox is incomplete or invalid.
+    """
+    bbox = tuple(args.get(name, type=float) for name in ("lamin", "lomin", "lamax", "lomax"))
+    if all(value is None for value in bbox):
+        return None
+    if None in bbox or not (-90.0 <= bbox[0] < bbox[2] <= 90.0 and -180.0 <= bbox[1] < bbox[3] <= 180.0):
+        raise ValueError("lamin, lomin, lamax and lomax must describe a valid bounding box")
+    return bbox
+
+
+def bbox_contains(bbox, lat, lon):
+    lamin, lomin, lamax, lomax = bbox
+    return lat is not None and lon is not None and lamin <= lat <= lamax and lomin <= lon <= lomax
+
+
+def merge_states(base, regional, bbox):
+    """
+    Overlay a fresh regional states/all payload on an older global one.
+
+    Either payload may be raw (``states``) or streamed (``columns``); the
+    result is streamed if either is.
+
+    Aircraft inside ``bbox`` (or present in the regional payload) come from
+    ``regional``; everything else is kept from ``base``.
+
+    Returns:
+        dict: Merged payload stamped with the regional ``time``.
+    """
+    if not base or not (base.get("states") or "columns" in base):
+        return regional
+    # Snapshots are keyed on time; two regions fetched within one OpenSky time
+    # step must still produce distinct snapshots
+    base_time = base.get("time") or 0
+    merged_time = max(regional.get("time") or base_time, base_time + 1)
+
+    if "columns" in base or "columns" in regional:
+        # Streamed payloads: the same overlay as one vectorized pass over the columns
+        base_columns, fresh = payload_columns(base), payload_columns(regional)
+        lamin, lomin, lamax, lomax = bbox
+        lat, lon = base_columns.latitude, base_columns.longitude
+        inside = (lat >= lamin) & (lat <= lamax) & (lon >= lomin) & (lon <= lomax)
+        kept = ~inside & ~np.isin(base_columns.icao24, fresh.icao24)
+        return {"time": merged_time,
+                "columns": FlightColumns.concatenate([base_columns.select(kept), fresh])}
+
+    fresh = regional.get("states") or []
+    fresh_ids = {state[0] for state in fresh}
+    kept = [state for state in base["states"]
+            if state[0] not in fresh_ids and not bbox_contains(bbox, state[6], state[5])]
+    return {"time": merged_time, "states": kept + fresh}
+
+
+def snapshot_json(flight_data):
+    """
+    Serialize a payload for followers, as a raw ``{"time", "states"}`` document.
+    """
+    if "columns" in flight_data:
+        flight_data = {"time": flight_data.get("time"), "states": flight_data["columns"].to_states()}
+    return json.dumps(flight_data, separators=(",", ":"))
+
+
+class TokenBucket:
+    """
+    Token bucket modelling the OpenSky credit allowance.
+
+    Credits refill continuously at the daily allowance spread over 24 hours.
+    The bucket holds at most ``capacity`` credits (one hour's worth by
+    default), so bursts for viewed regions cannot drain the whole day.
+    """
+
+    def __init__(self, credits_per_day, capacity=None, clock=time.time):
+        self.rate = credits_per_day / 86400.0
+        self.capacity = capacity if capacity is not None else max(credits_per_day / 24.0, GLOBAL_CREDIT_COST)
+        self.clock = clock
+        self.tokens = self.capacity
+        self.updated_at = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def available(self):
+        self._refill()
+        return self.tokens
+
+    def try_consume(self, cost, reserve=0.0):
+        """
+        Spend ``cost`` credits if at least ``cost + reserve`` are available.
+
+        Returns:
+            bool: Whether the credits were spent.
+        """
+        self._refill()
+        if self.tokens < cost + reserve:
+            return False
+        self.tokens -= cost
+        return True
+
+    def load(self, path):
+        """Resume from state saved by a previous leader, if any."""
+        try:
+            with open(path) as f:
+                state = json.load(f)
+            self.tokens = min(self.capacity, float(state["tokens"]))
+            self.updated_at = float(state["updated_at"])
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def save(self, path):
+        _write_atomic(path, json.dumps({"tokens": self.tokens, "updated_at": self.updated_at}))
+
+
+def _write_atomic(path, text):
+    # A unique temp file per call: request threads of one worker write concurrently
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".",
+                                    prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class LeaderLock:
+    """
+    Non-blocking exclusive ``flock`` on a file in the shared state directory.
+
+    The OS drops the lock when the holder exits, so a follower takes over on
+    its next attempt if the leader dies.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    @property
+    def held(self):
+        return self._file is not None
+
+    def try_acquire(self):
+        if self._file is not None:
+            return True
+        lock_file = open(self.path, "a+")
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                return False
+        self._file = lock_file
+        return True
+
+    def release(self):
+        if self._file is not None:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+
+class FetchScheduler:
+    """
+    Single-fetcher coordination of OpenSky polling across worker processes.
+
+    Every worker calls ``tick`` periodically. The worker holding the leader
+    lock is the only one that calls OpenSky: it refreshes the whole world on a
+    slow cadence and recently viewed bbox regions on a fast one, within a
+    token-bucket credit budget, and publishes each merged snapshot to a shared
+    file. Followers only reload that file when it changes.
+    """
+
+    def __init__(self, store, fetch, state_dir=DEFAULT_STATE_DIR,
+                 credits_per_day=AUTHENTICATED_CREDITS_PER_DAY, global_interval_s=300.0,
+                 view_interval_s=15.0, view_ttl_s=60.0, max_views=8, clock=time.time):
+        """
+        Args:
+            store (SnapshotStore): Where snapshots are installed in this process.
+            fetch (callable): ``fetch(bbox)`` returning a raw states/all payload or a
+                streamed ``{"time", "columns"}`` one (``bbox`` None for the whole
+                world); empty on failure.
+            state_dir (str): Directory shared by all workers on the host.
+            credits_per_day (int, optional): OpenSky daily credit allowance.
+            global_interval_s (float, optional): Target cadence of whole-world refreshes.
+            view_interval_s (float, optional): Target cadence for each viewed region.
+            view_ttl_s (float, optional): How long a region counts as viewed after its last request.
+            max_views (int, optional): Most recently viewed regions refreshed at the fast cadence.
+        """
+        self.store = store
+        self.fetch = fetch
+        self.state_dir = state_dir
+        self.view_interval_s = view_interval_s
+        self.view_ttl_s = view_ttl_s
+        self.max_views = max_views
+        self.clock = clock
+
+        self.bucket = TokenBucket(credits_per_day, clock=clock)
+        # Never plan global refreshes faster than the budget can sustain
+        self.global_interval_s = max(global_interval_s, GLOBAL_CREDIT_COST / self.bucket.rate)
+
+        os.makedirs(os.path.join(state_dir, "views"), exist_ok=True)
+        self.lock = LeaderLock(os.path.join(state_dir, "leader.lock"))
+        self.snapshot_path = os.path.join(state_dir, "snapshot.json")
+        self.bucket_path = os.path.join(state_dir, "bucket.json")
+        self.views_path = os.path.join(state_dir, "views", f"{os.getpid()}-{id(self)}.json")
+
+        self._tick_lock = threading.Lock()
+        self._views_lock = threading.Lock()
+        self._views = {}  # rounded bbox -> last viewed at
+        self._views_written = {}  # rounded bbox -> view time last written to views_path
+        self._raw = None
+        self._snapshot_mtime = None
+        self._last_global = float("-inf")
+        self._last_view_fetch = {}
+        self._backoff_until = float("-inf")
+        self._failures = 0
+
+    @property
+    def is_leader(self):
+        return self.lock.held
+
+    def register_view(self, bbox):
+        """
+        Note that a client is looking at ``bbox`` so the leader refreshes it faster.
+
+        The worker's views file is only rewritten for a new region or one last
+        written more than ``VIEW_WRITE_INTERVAL_S`` ago, so busy viewports don't
+        cost a disk write per request.
+
+        Args:
+            bbox (tuple): (lamin, lomin, lamax, lomax) in degrees.
+        """
+        # Round outwards to whole degrees so nearby viewports share one region
+        lamin, lomin, lamax, lomax = bbox
+        key = (max(-90, int(lamin // 1)), max(-180, int(lomin // 1)),
+               min(90, -int(-lamax // 1)), min(180, -int(-lomax // 1)))
+        now = self.clock()
+        with self._views_lock:
+            self._views[key] = now
+            if now - self._views_written.get(key, float("-inf")) < VIEW_WRITE_INTERVAL_S:
+                return
+            self._views = {k: t for k, t in self._views.items() if now - t <= self.view_ttl_s}
+            _write_atomic(self.views_path, json.dumps([[list(k), t] for k, t in self._views.items()]))
+            self._views_written = dict(self._views)
+
+    def _active_views(self):
+        """Regions viewed within ``view_ttl_s`` by any worker, most recent first."""
+        now = self.clock()
+        latest = {}
+        views_dir = os.path.dirname(self.views_path)
+        for name in os.listdir(views_dir):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(views_dir, name)) as f:
+                    entries = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for bbox, viewed_at in entries:
+                if now - viewed_at <= self.view_ttl_s:
+                    key = tuple(bbox)
+                    latest[key] = max(viewed_at, latest.get(key, viewed_at))
+        return sorted(latest, key=latest.get, reverse=True)[:self.max_views]
+
+    def tick(self):
+        """
+        Run one scheduling step: lead (fetch and publish) or follow (reload).
+
+        Safe to call from several threads; concurrent calls return immediately.
+
+        Returns:
+            FlightSnapshot: The current snapshot in this process, or None.
+        """
+        if not self._tick_lock.acquire(blocking=False):
+            return self.store.current
+        try:
+            if self.lock.held:
+                self._lead()
+            elif self.lock.try_acquire():
+                # New leader: resume the budget and snapshot of the previous one
+                logger.info(f"Process {os.getpid()} is now the OpenSky fetch leader.")
+                self.bucket.load(self.bucket_path)
+                self._sync()
+                self._lead()
+            else:
+                self._sync()
+        except Exception as e:
+            logger.error(f"Fetch scheduler tick failed: {e}")
+        finally:
+            self._tick_lock.release()
+        return self.store.current
+
+    def _sync(self):
+        try:
+            mtime = os.stat(self.snapshot_path).st_mtime_ns
+        except OSError:
+            return
+        if mtime == self._snapshot_mtime:
+            return
+        with open(self.snapshot_path) as f:
+            raw = json.load(f)
+        self._snapshot_mtime = mtime
+        self._raw = raw
+        self.store.update(raw)
+
+    def _lead(self):
+        now = self.clock()
+        if now < self._backoff_until:
+            return
+
+        if self._raw is None or now - self._last_global >= self.global_interval_s:
+            if self.bucket.try_consume(GLOBAL_CREDIT_COST):
+                self._fetch_and_publish(None)
+            return
+
+        for bbox in self._active_views():
+            if now - self._last_view_fetch.get(bbox, float("-inf")) < self.view_interval_s:
+                continue
+            # Keep enough credits for the next whole-world refresh
+            if not self.bucket.try_consume(credit_cost(bbox), reserve=GLOBAL_CREDIT_COST):
+                break
+            self._last_view_fetch[bbox] = now
+            if not self._fetch_and_publish(bbox):
+                break
+
+    def _fetch_and_publish(self, bbox):
+        now = self.clock()
+        self.bucket.save(self.bucket_path)
+        with span("scheduled_fetch"):
+            raw = self.fetch(bbox)
+
+        if not raw or ("states" not in raw and "columns" not in raw):
+            self._failures += 1
+            delay = min(600.0, self.view_interval_s * 2 ** self._failures)
+            self._backoff_until = now + delay
+            logger.warning(f"OpenSky fetch failed; backing off {delay:.0f}s.")
+            return False
+        self._failures = 0
+
+        if bbox is None:
+            self._last_global = now
+        else:
+            raw = merge_states(self._raw, raw, bbox)
+
+        self._raw = raw
+        _write_atomic(self.snapshot_path, snapshot_json(raw))
+        self._snapshot_mtime = os.stat(self.snapshot_path).st_mtime_ns
+        self.store.update(raw)
+        logger.info(f"Published {'global' if bbox is None else f'regional {bbox}'} snapshot "
+                    f"({self.bucket.available():.1f} credits left).")
+        return True
+
+    def close(self):
+        self.lock.release()
+        try:
+            os.remove(self.views_path)
+        except OSError:
+            pass
@@ -0,0 +1,170 @@
+# File: ecosky-back/ai_model/fetch_scheduler_test.py
+
+import os
+import threading
+
+import fetch_scheduler
+from fetch_scheduler import FetchScheduler, TokenBucket, credit_cost, merge_states
+from opensky_stream import columns_from_states
+from snapshot import SnapshotStore
+
+
+class FakeClock:
+    def __init__(self, now=1700000000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _state(icao24, lat, lon):
+    return [icao24, "TEST", "Nowhere", None, None, lon, lat, 10000.0, False, 230.0,
+            90.0, 0.0, None, None, None, False, 0]
+
+
+class FakeOpenSky:
+    def __init__(self, clock):
+        self.clock = clock
+        self.calls = []
+
+    def __call__(self, bbox):
+        self.calls.append(bbox)
+        if bbox is None:
+            states = [_state("global1", 10.0, 10.0), _state("global2", 50.5, 8.5)]
+        else:
+            states = [_state("regional", (bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2)]
+        return {"time": int(self.clock()), "states": states}
+
+
+def _store():
+    return SnapshotStore(lambda raw: [{"icao24": s[0]} for s in raw["states"]])
+
+
+def test_credit_cost_follows_bbox_area():
+    assert credit_cost(None) == 4
+    assert credit_cost((50.0, 8.0, 55.0, 13.0)) == 1
+    assert credit_cost((40.0, 0.0, 50.0, 10.0)) == 2
+    assert credit_cost((30.0, 0.0, 50.0, 20.0)) == 3
+    assert credit_cost((0.0, 0.0, 30.0, 30.0)) == 4
+
+
+def test_token_bucket_refills_at_daily_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(credits_per_day=86400, capacity=10, clock=clock)
+    assert bucket.try_consume(10)
+    assert not bucket.try_consume(1)
+    clock.now += 3
+    assert bucket.try_consume(2, reserve=1)
+    assert not bucket.try_consume(1, reserve=1)
+
+
+def test_merge_replaces_states_inside_region():
+    base = {"time": 100, "states": [_state("a", 10.0, 10.0), _state("b", 50.5, 8.5)]}
+    regional = {"time": 100, "states": [_state("c", 51.0, 9.0)]}
+    merged = merge_states(base, regional, (50.0, 8.0, 52.0, 10.0))
+    assert [s[0] for s in merged["states"]] == ["a", "c"]
+    assert merged["time"] == 101
+
+
+def test_merge_overlays_streamed_columns():
+    base = {"time": 100, "states": [_state("a", 10.0, 10.0), _state("b", 50.5, 8.5)]}
+    regional = {"time": 100, "columns": columns_from_states([_state("c", 51.0, 9.0)])}
+    merged = merge_states(base, regional, (50.0, 8.0, 52.0, 10.0))
+    assert merged["columns"].icao24.tolist() == ["a", "c"]
+    assert merged["time"] == 101
+
+
+def test_only_the_leader_fetches_and_followers_share_its_snapshot(tmp_path):
+    clock = FakeClock()
+    leader_api, follower_api = FakeOpenSky(clock), FakeOpenSky(clock)
+    leader = FetchScheduler(_store(), leader_api, state_dir=str(tmp_path), clock=clock)
+    follower = FetchScheduler(_store(), follower_api, state_dir=str(tmp_path), clock=clock)
+
+    leader_snapshot = leader.tick()
+    follower_snapshot = follower.tick()
+
+    assert leader.is_leader and not follower.is_leader
+    assert leader_api.calls == [None] and follower_api.calls == []
+    assert follower_snapshot.time == leader_snapshot.time
+    assert [f["icao24"] for f in follower_snapshot.flights] == ["global1", "global2"]
+
+    # Nothing is due yet: no further calls
+    clock.now += 5
+    leader.tick()
+    assert leader_api.calls == [None]
+
+    # A region viewed through a follower is refreshed by the leader on the fast cadence
+    follower.register_view((50.2, 8.1, 52.7, 10.9))
+    clock.now += 15
+    leader.tick()
+    assert leader_api.calls == [None, (50, 8, 53, 11)]
+    clock.now += 1
+    follower.tick()
+    assert [f["icao24"] for f in follower.store.current.flights] == ["global1", "regional"]
+
+    # The global refresh keeps its slow cadence
+    clock.now += 300
+    leader.tick()
+    assert leader_api.calls[-1] is None and len(leader_api.calls) == 3
+
+    # When the leader goes away a follower takes over
+    leader.close()
+    follower.tick()
+    assert follower.is_leader
+    follower.close()
+
+
+def test_leader_stops_fetching_when_credits_run_out(tmp_path):
+    clock = FakeClock()
+    api = FakeOpenSky(clock)
+    scheduler = FetchScheduler(_store(), api, state_dir=str(tmp_path), credits_per_day=96,
+                               view_interval_s=1.0, clock=clock)
+    scheduler.tick()  # global fetch: 4 of the 4-credit hourly capacity
+    scheduler.register_view((50.0, 8.0, 51.0, 9.0))
+    clock.now += 2
+    scheduler.tick()
+    assert api.calls == [None]
+    scheduler.close()
+
+
+def test_concurrent_view_registrations_do_not_collide(tmp_path):
+    clock = FakeClock()
+    scheduler = FetchScheduler(_store(), FakeOpenSky(clock), state_dir=str(tmp_path), clock=clock)
+    errors = []
+
+    def view(i):
+        try:
+            for j in range(200):
+                fetch_scheduler._write_atomic(scheduler.views_path, f"[{i}, {j}]")
+        except OSError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=view, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert not [name for name in os.listdir(tmp_path / "views") if name.endswith(".tmp")]
+    scheduler.close()
+
+
+def test_repeated_views_are_written_at_most_every_few_seconds(tmp_path, monkeypatch):
+    clock = FakeClock()
+    scheduler = FetchScheduler(_store(), FakeOpenSky(clock), state_dir=str(tmp_path), clock=clock)
+    writes = []
+    write_atomic = fetch_scheduler._write_atomic
+    monkeypatch.setattr(fetch_scheduler, "_write_atomic",
+                        lambda path, text: writes.append(path) or write_atomic(path, text))
+
+    for _ in range(10):
+        scheduler.register_view((50.0, 8.0, 51.0, 9.0))
+        clock.now += 0.1
+    assert len(writes) == 1
+    scheduler.register_view((10.0, 8.0, 11.0, 9.0))  # a new region is written at once
+    assert len(writes) == 2
+    clock.now += fetch_scheduler.VIEW_WRITE_INTERVAL_S
+    scheduler.register_view((50.0, 8.0, 51.0, 9.0))
+    assert len(writes) == 3
+    assert scheduler._active_views()[0] == (50, 8, 51, 9)
+    scheduler.close()
@@ -0,0 +1,117 @@
+import logging
+import numpy as np
+
+from fuel_model import CO2_PER_FUEL, FUEL_PER_KM, co2_for_fuel, fuel_for_distance
+
+logger = logging.getLogger(__name__)
+
+# Upper edges (meters, barometric) of the altitude bands used for aggregation
+ALTITUDE_BAND_EDGES_M = (3000.0, 6000.0, 9000.0, 12000.0)
+
+# Side of the latitude/longitude grid cells used as regions, in degrees
+REGION_CELL_DEG = 30.0
+
+UNKNOWN = "Unknown"
+
+
+def _altitude_band_labels(edges):
+    bounds = (0.0,) + tuple(edges)
+    labels = [f"{int(lo)}-{int(hi)} m" for lo, hi in zip(bounds[:-1], bounds[1:])]
+    return labels + [f"{int(edges[-1])}+ m"]
+
+
+def _aggregate(keys, fuel, co2):
+    """
+    Sum per-aircraft fuel and CO2 rates for each distinct key in one pass.
+
+    Returns:
+        list[dict]: {"key", "aircraft", "fuel_per_hour", "co2_per_hour"} per key,
+        highest CO2 first.
+    """
+    if len(keys) == 0:
+        return []
+    unique, inverse = np.unique(keys, return_inverse=True)
+    counts = np.bincount(inverse, minlength=len(unique))
+    fuel_sums = np.bincount(inverse, weights=fuel, minlength=len(unique))
+    co2_sums = np.bincount(inverse, weights=co2, minlength=len(unique))
+    order = np.argsort(-co2_sums, kind="stable")
+    return [
+        {"key": unique[i].item(),
+         "aircraft": int(counts[i]),
+         "fuel_per_hour": round(float(fuel_sums[i]), 3),
+         "co2_per_hour": round(float(co2_sums[i]), 3)}
+        for i in order
+    ]
+
+
+def estimate_fleet_emissions(columns, altitude_edges=ALTITUDE_BAND_EDGES_M, cell_deg=REGION_CELL_DEG):
+    """
+    Estimate the current fuel burn and CO2 rate of every airborne aircraft.
+
+    Each aircraft's hourly burn is the ``FlightEnv`` fuel model applied to the
+    distance it covers in an hour at its reported ground speed. Everything is
+    computed as vectorized passes over the snapshot columns and then summed by
+    origin country, altitude band and ``cell_deg`` latitude/longitude cell.
+
+    Args:
+        columns (FlightColumns): Snapshot in columnar form.
+        altitude_edges (tuple, optional): Upper edges of the altitude bands in meters.
+        cell_deg (float, optional): Region grid cell size in degrees.
+
+    Returns:
+        dict: Totals plus "by_country", "by_altitude_band" and "by_region" lists.
+    """
+    airborne = ~columns.on_ground & np.isfinite(columns.velocity)
+
+    # m/s -> km covered per hour
+    km_per_hour = columns.velocity[airborne] * 3.6
+    fuel = fuel_for_distance(km_per_hour)
+    co2 = co2_for_fuel(fuel)
+
+    countries = columns.origin_country[airborne]
+    countries = np.where(countries == None, UNKNOWN, countries).astype(str)  # noqa: E711
+
+    altitude = columns.baro_altitude[airborne]
+    band_labels = np.array(_altitude_band_labels(altitude_edges) + [UNKNOWN])
+    band_index = np.searchsorted(np.asarray(altitude_edges), altitude, side="right")
+    band_index = np.where(np.isnan(altitude), len(band_labels) - 1, band_index)
+
+    lat = columns.latitude[airborne]
+    lon = columns.longitude[airborne]
+    has_position = np.isfinite(lat) & np.isfinite(lon)
+    cells_per_row = int(np.ceil(360.0 / cell_deg))
+    lat_cell = np.floor((np.clip(lat, -90.0, 90.0 - 1e-9) + 90.0) / cell_deg)
+    lon_cell = np.floor((np.clip(lon, -180.0, 180.0 - 1e-9) + 180.0) / cell_deg)
+    cell_ids = np.where(has_position, lat_cell * cells_per_row + lon_cell, -1).astype(np.int64)
+
+    by_band = _aggregate(band_index, fuel, co2)
+    for row in by_band:
+        row["altitude_band"] = str(band_labels[row.pop("key")])
+
+    by_region = []
+    for row in _aggregate(cell_ids, fuel, co2):
+        cell = row.pop("key")
+        if cell < 0:
+            row["region"] = UNKNOWN
+        else:
+            lat_min = (cell // cells_per_row) * cell_deg - 90.0
+            lon_min = (cell % cells_per_row) * cell_deg - 180.0
+            row["region"] = {"lat_min": lat_min, "lat_max": lat_min + cell_deg,
+                             "lon_min": lon_min, "lon_max": lon_min + cell_deg}
+        by_region.append(row)
+
+    by_country = _aggregate(countries, fuel, co2)
+    for row in by_country:
+        row["origin_country"] = row.pop("key")
+
+    logger.info(f"Estimated emissions for {int(airborne.sum())} airborne aircraft.")
+    return {
+        "model": {"fuel_per_km": FUEL_PER_KM, "co2_per_fuel": CO2_PER_FUEL,
+                  "basis": "hourly rate at current ground speed"},
+        "totals": {"aircraft": int(airborne.sum()),
+                   "fuel_per_hour": round(float(fuel.sum()), 3),
+                   "co2_per_hour": round(float(co2.sum()), 3)},
+        "by_country": by_country,
+        "by_altitude_band": by_band,
+        "by_region": by_region,
+    }
@@ -0,0 +1,66 @@
+# File: ecosky-back/ai_model/fleet_emissions_test.py
+
+import pytest
+
+from fleet_emissions import estimate_fleet_emissions
+from flight_columns import FlightColumns
+from opensky_stream import columns_from_states
+from preprocess import preprocess_flight_data
+
+
+def _flight(country, lat, lon, altitude, velocity, on_ground=False):
+    return {"icao24": "abc123", "callsign": "TEST", "origin_country": country,
+            "latitude": lat, "longitude": lon, "baro_altitude": altitude,
+            "velocity": velocity, "on_ground": on_ground}
+
+
+def test_fleet_emissions_aggregates():
+    columns = FlightColumns.from_flights([
+        _flight("Germany", 50.0, 8.0, 11000.0, 250.0),
+        _flight("Germany", 52.0, 13.0, 2000.0, 100.0),
+        _flight("France", -10.0, -170.0, None, 200.0),
+        _flight("France", 49.0, 2.5, 0.0, 10.0, on_ground=True),
+        _flight(None, None, None, 8000.0, 150.0),
+    ])
+    result = estimate_fleet_emissions(columns)
+
+    # 0.1 fuel per km at ground speed for one hour
+    expected_fuel = 0.1 * 3.6 * (250.0 + 100.0 + 200.0 + 150.0)
+    assert result["totals"]["aircraft"] == 4
+    assert result["totals"]["fuel_per_hour"] == pytest.approx(expected_fuel)
+    assert result["totals"]["co2_per_hour"] == pytest.approx(expected_fuel * 3.16)
+
+    countries = {row["origin_country"]: row for row in result["by_country"]}
+    assert countries["Germany"]["aircraft"] == 2
+    assert countries["France"]["aircraft"] == 1
+    assert countries["Unknown"]["aircraft"] == 1
+    assert result["by_country"][0]["origin_country"] == "Germany"
+
+    bands = {row["altitude_band"]: row["aircraft"] for row in result["by_altitude_band"]}
+    assert bands == {"9000-12000 m": 1, "0-3000 m": 1, "6000-9000 m": 1, "Unknown": 1}
+
+    regions = [row["region"] for row in result["by_region"]]
+    assert {"lat_min": 30.0, "lat_max": 60.0, "lon_min": 0.0, "lon_max": 30.0} in regions
+    assert {"lat_min": -30.0, "lat_max": 0.0, "lon_min": -180.0, "lon_max": -150.0} in regions
+    assert "Unknown" in regions
+    assert sum(row["fuel_per_hour"] for row in result["by_region"]) == pytest.approx(expected_fuel)
+
+
+def test_fleet_emissions_empty_snapshot():
+    result = estimate_fleet_emissions(FlightColumns.from_flights([]))
+    assert result["totals"] == {"aircraft": 0, "fuel_per_hour": 0.0, "co2_per_hour": 0.0}
+    assert result["by_country"] == []
+
+
+def test_unreported_altitude_and_speed_stay_unknown():
+    # OpenSky rows with null baro_altitude and velocity, then a reported one
+    states = [["abc123", "TEST", "Germany", None, None, 8.0, 50.0, None, False, 240.0, None, None],
+              ["def456", "TEST", "Germany", None, None, 9.0, 51.0, 11000.0, False, None, None, None],
+              ["789abc", "TEST", "Germany", None, None, 9.0, 51.0, 11000.0, False, 200.0, None, None]]
+    for columns in (FlightColumns.from_flights(preprocess_flight_data({"states": states})),
+                    columns_from_states(states)):
+        result = estimate_fleet_emissions(columns)
+        # No reported speed: not counted as a zero-burn aircraft
+        assert result["totals"]["aircraft"] == 2
+        bands = {row["altitude_band"]: row["aircraft"] for row in result["by_altitude_band"]}
+        assert bands == {"Unknown": 1, "9000-12000 m": 1}
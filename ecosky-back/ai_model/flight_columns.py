@@ -0,0 +1,116 @@
+import numpy as np
+
+# Float columns hold NaN where OpenSky reported null
+FLOAT_FIELDS = ('latitude', 'longitude', 'baro_altitude', 'velocity',
+                'true_track', 'vertical_rate', 'time_position')
+OBJECT_FIELDS = ('icao24', 'callsign', 'origin_country')
+
+
+class FlightColumns:
+    """
+    Column-oriented view of a processed flight snapshot.
+
+    Each field is one NumPy array with a row per aircraft, so fleet-wide
+    computations (extrapolation, emissions, aggregation) run as vectorized
+    passes instead of per-flight Python loops.
+    """
+
+    def __init__(self, **columns):
+        for name in OBJECT_FIELDS + FLOAT_FIELDS + ('on_ground',):
+            setattr(self, name, columns[name])
+
+    def __len__(self):
+        return len(self.latitude)
+
+    @classmethod
+    def from_flights(cls, flights):
+        """
+        Build columns from the dicts produced by ``preprocess_flight_data``.
+
+        Args:
+            flights (list[dict]): Processed flights.
+
+        Returns:
+            FlightColumns
+        """
+        columns = {}
+        for name in OBJECT_FIELDS:
+            columns[name] = np.array([f.get(name) for f in flights], dtype=object)
+        for name in FLOAT_FIELDS:
+            values = [f.get(name) for f in flights]
+            columns[name] = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+        columns['on_ground'] = np.array([bool(f.get('on_ground')) for f in flights], dtype=bool)
+        return cls(**columns)
+
+    def select(self, mask):
+        """
+        Rows where ``mask`` (boolean array or index array) selects them.
+
+        Returns:
+            FlightColumns
+        """
+        return FlightColumns(**{name: getattr(self, name)[mask]
+                                for name in OBJECT_FIELDS + FLOAT_FIELDS + ('on_ground',)})
+
+    @classmethod
+    def concatenate(cls, parts):
+        """
+        Stack several column sets row-wise.
+
+        Returns:
+            FlightColumns
+        """
+        return cls(**{name: np.concatenate([getattr(part, name) for part in parts])
+                      for name in OBJECT_FIELDS + FLOAT_FIELDS + ('on_ground',)})
+
+    def to_flights(self):
+        """
+        Flight dicts in the format produced by ``preprocess_flight_data``.
+
+        Returns:
+            list[dict]
+        """
+        def optional(values):
+            return [None if np.isnan(v) else v for v in values.tolist()]
+
+        velocity = optional(self.velocity)
+        baro_altitude = optional(self.baro_altitude)
+        true_track = optional(self.true_track)
+        vertical_rate = optional(self.vertical_rate)
+        time_position = [None if v is None else int(v) for v in optional(self.time_position)]
+        return [
+            {
+                'icao24': icao24,
+                'callsign': callsign,
+                'origin_country': origin_country,
+                'longitude': longitude,
+                'latitude': latitude,
+                'velocity': velocity,
+                'baro_altitude': baro_altitude,
+                'on_ground': on_ground,
+                'true_track': track,
+                'vertical_rate': rate,
+                'time_position': position_time
+            }
+            for icao24, callsign, origin_country, longitude, latitude, velocity, baro_altitude,
+            on_ground, track, rate, position_time in zip(
+                self.icao24.tolist(), self.callsign.tolist(), self.origin_country.tolist(),
+                self.longitude.tolist(), self.latitude.tolist(), velocity,
+                baro_altitude, self.on_ground.tolist(),
+                true_track, vertical_rate, time_position
+            )
+        ]
+
+    def to_states(self):
+        """
+        OpenSky ``states`` rows carrying the fields kept here; the others are null.
+
+        Returns:
+            list[list]
+        """
+        return [
+            [flight['icao24'], flight['callsign'], flight['origin_country'], flight['time_position'],
+             None, flight['longitude'], flight['latitude'], flight['baro_altitude'], flight['on_ground'],
+             flight['velocity'], flight['true_track'], flight['vertical_rate'], None, None, None, None, None]
+            for flight in self.to_flights()
+        ]
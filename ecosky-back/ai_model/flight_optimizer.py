@@ -1,21 +1,77 @@
 from flask import Blueprint, request, jsonify
 import logging
-import sys
 import os
+import threading
+import time
 import numpy as np
 
-# Add parent directory to Python path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fetch_scheduler import parse_bbox
+from great_circle import great_circle_baseline
+from live_traffic import current_flight_snapshot
+from metrics import span
+from route_store import RouteStore
 
-# Import from ai_model
-from inference import optimize_flight_route
-from ingest_api import fetch_flight_data
-
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 flight_optimizer_bp = Blueprint('flight_optimizer', __name__)
 
+# Server-side defaults for the anytime rollout budgets; unset means unbounded
+DEFAULT_MAX_MS = float(os.getenv('OPTIMIZE_MAX_MS', 0)) or None
+DEFAULT_MAX_STEPS = int(os.getenv('OPTIMIZE_MAX_STEPS', 0)) or None
+
+ROUTE_STORE_PATH = os.getenv(
+    'ROUTE_STORE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'routes.db')
+)
+MAX_ROUTES_PER_QUERY = 1000
+# Upper bound on beam_width * num_samples branches simulated per /optimize request
+MAX_SEARCH_BRANCHES = 64
+
+_route_store = None
+_route_store_lock = threading.Lock()
+
+
+def get_route_store():
+    """
+    Open the route store on first use.
+
+    Returns:
+        RouteStore: Store shared by this process.
+    """
+    global _route_store
+    if _route_store is None:
+        with _route_store_lock:
+            if _route_store is None:
+                _route_store = RouteStore(ROUTE_STORE_PATH)
+    return _route_store
+
+
+@flight_optimizer_bp.teardown_app_request
+def close_route_store_connection(exc):
+    """
+    Close the request thread's SQLite connection; the dev server and threaded
+    WSGI servers may start a new thread per request, which would otherwise
+    leave one open connection behind for every thread.
+    """
+    if _route_store is not None:
+        _route_store.close()
+
+
+def _positive_budget(data, key, default, cast):
+    """
+    Read an optional positive budget from the payload.
+
+    Returns:
+        tuple: (value or None, error message or None)
+    """
+    value = data.get(key, default)
+    if value is None:
+        return None, None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+        return None, f"{key} must be a positive number"
+    return cast(value), None
+
+
 @flight_optimizer_bp.route('/optimize', methods=['POST'])
 def optimize():
     """
@@ -25,9 +81,28 @@ def optimize():
     {
         "start": [latitude, longitude],
         "end": [latitude, longitude],
-        "weather": "storm"  # or "clear"
+        "weather": "storm",  # or "clear"
+        "traffic_aware": false,  # optional; adds the live-traffic density channel (400 unless
+                                 # the served policy was trained with it)
+        "max_ms": 250,  # optional latency budget for the policy rollout
+        "max_steps": 1000,  # optional step budget for the policy rollout
+        "beam_width": 4,  # optional; beams kept by beam search (default 1: greedy)
+        "num_samples": 4  # optional; branches per beam (default 1; at least 2 when beam_width > 1)
     }
 
+    With num_samples K > 1, every beam branches into its policy action plus
+    K - 1 noisy samples and the best beam_width branches survive; beam_width 1
+    with num_samples K is best-of-K sampling. beam_width > 1 with num_samples 1
+    is rejected with 400, since each beam would only follow its own greedy path.
+
+    When a budget runs out the route is completed along the great circle and
+    the response has "partial": true. Every route is stored with its inputs
+    and model version; "route_id" identifies it for GET /routes/<route_id>.
+
+    "fuel" and "co2" are what the route burns and emits; "fuel_saved" and
+    "co2_reduced" compare them with the great-circle route (negative when the
+    optimized route costs more).
+
     Returns:
         JSON response with optimized path and savings metrics
     """
@@ -49,38 +124,144 @@ def optimize():
         if not isinstance(end, list) or len(end) != 2:
             return jsonify({"error": "Invalid end coordinates format"}), 400
 
-        # Fetch real-time data
-        fetched_data = fetch_flight_data(
-            username=os.getenv('OPENSKY_USERNAME'),
-            password=os.getenv('OPENSKY_PASSWORD')
-        )
+        max_ms, error = _positive_budget(data, 'max_ms', DEFAULT_MAX_MS, float)
+        if error is None:
+            max_steps, error = _positive_budget(data, 'max_steps', DEFAULT_MAX_STEPS, int)
+        if error is None:
+            beam_width, error = _positive_budget(data, 'beam_width', 1, int)
+        if error is None:
+            num_samples, error = _positive_budget(data, 'num_samples', 1, int)
+        if error is None:
+            beam_width, num_samples = beam_width or 1, num_samples or 1
+            if beam_width * num_samples > MAX_SEARCH_BRANCHES:
+                error = f"beam_width * num_samples must be at most {MAX_SEARCH_BRANCHES}"
+            elif beam_width > 1 and num_samples == 1:
+                # A single unperturbed child per beam never widens the search
+                error = "num_samples must be at least 2 when beam_width > 1"
+        if error:
+            return jsonify({"error": error}), 400
 
-        # Extract flights and storms data
-        processed_flights = fetched_data.get('flights', [])
-        processed_storms = fetched_data.get('storms', [])
+        # Live traffic comes from the shared, already-indexed snapshot
+        snapshot = current_flight_snapshot()
+        processed_flights = snapshot.flights if snapshot else []
+        traffic_index = snapshot.derived.get("traffic_index") if snapshot else None
+
+        # OpenSky carries no storm data; storms stay empty until a weather feed is wired in
+        processed_storms = []
+
+        # Imported on first use so traffic-only workers never load the RL stack
+        from inference import load_policy, optimize_flight_route, policy_version, supports_traffic_channel
+
+        algo = load_policy()
+        traffic_aware = bool(data.get('traffic_aware', False))
+        if traffic_aware and not supports_traffic_channel(algo):
+            return jsonify({"error": "traffic_aware requires a policy trained with the traffic channel"}), 400
 
         # Call the optimize_flight_route function
-        optimized_path, fuel_saved, co2_reduced = optimize_flight_route(
-            start=start,
-            end=end,
-            flights=processed_flights,
-            storms=processed_storms,
-            trigger=weather_trigger
-        )
+        with span("optimize_flight_route"):
+            optimized_path, fuel, co2, rollout = optimize_flight_route(
+                start=start,
+                end=end,
+                flights=processed_flights,
+                storms=processed_storms,
+                trigger=weather_trigger,
+                algo=algo,
+                traffic_index=traffic_index,
+                traffic_channel=traffic_aware,
+                max_ms=max_ms,
+                max_steps=max_steps,
+                beam_width=beam_width,
+                num_samples=num_samples
+            )
 
         # Convert numpy arrays to lists for JSON serialization
         if isinstance(optimized_path, np.ndarray):
             optimized_path = optimized_path.tolist()
 
+        # Savings are relative to flying the great circle under the same fuel model
+        baseline = great_circle_baseline(start, end)
+
         # Prepare the response
         response = {
             "optimized_path": optimized_path,
-            "fuel_saved": float(fuel_saved),
-            "co2_reduced": float(co2_reduced)
+            "fuel": float(fuel),
+            "co2": float(co2),
+            "fuel_saved": float(baseline["fuel"] - fuel),
+            "co2_reduced": float(baseline["co2"] - co2),
+            "partial": rollout["partial"],
+            "steps": rollout["steps"],
+            "route_id": None
         }
 
-        return jsonify(response), 200
+        # Persisting is best effort: a storage failure must not fail the request
+        try:
+            with span("route_store_save"):
+                response["route_id"] = get_route_store().save(
+                    start, end, optimized_path, fuel, co2, inputs=data,
+                    model_version=policy_version(), partial=rollout["partial"],
+                    steps=rollout["steps"]
+                )
+        except Exception as e:
+            logger.error(f"Failed to store optimized route: {str(e)}")
+
+        with span("jsonify"):
+            body = jsonify(response)
+        return body, 200
 
     except Exception as e:
         logger.error(f"Optimization failed: {str(e)}")
         return jsonify({"error": "Internal server error", "details": str(e)}), 500
+
+
+@flight_optimizer_bp.route('/routes', methods=['GET'])
+def list_routes():
+    """
+    Query stored routes, newest first.
+
+    Query Parameters:
+        lamin, lomin, lamax, lomax: optional region the routes must cross
+        hours: optional; only routes optimized in the last N hours
+        limit: maximum number of routes (default 100, at most 1000)
+        include_path: "true" to include each route's [latitude, longitude] path
+
+    Returns:
+        JSON response with the matching routes
+    """
+    try:
+        bbox = parse_bbox(request.args)
+        hours = request.args.get('hours', type=float)
+        limit = request.args.get('limit', default=100, type=int)
+        if hours is not None and hours <= 0:
+            raise ValueError("hours must be a positive number")
+        if not 1 <= limit <= MAX_ROUTES_PER_QUERY:
+            raise ValueError(f"limit must be between 1 and {MAX_ROUTES_PER_QUERY}")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        with span("route_store_query"):
+            routes = get_route_store().query(
+                bbox=bbox,
+                since=time.time() - hours * 3600.0 if hours is not None else None,
+                limit=limit,
+                include_path=request.args.get('include_path', '').lower() == 'true'
+            )
+        return jsonify({"routes": routes, "count": len(routes)}), 200
+    except Exception as e:
+        logger.error(f"Route query failed: {str(e)}")
+        return jsonify({"error": "Internal server error", "details": str(e)}), 500
+
+
+@flight_optimizer_bp.route('/routes/<int:route_id>', methods=['GET'])
+def get_route(route_id):
+    """
+    Fetch one stored route with its path, inputs and model version.
+    """
+    try:
+        route = get_route_store().get(route_id)
+    except Exception as e:
+        logger.error(f"Route lookup failed: {str(e)}")
+        return jsonify({"error": "Internal server error", "details": str(e)}), 500
+    if route is None:
+        return jsonify({"error": f"Route {route_id} not found"}), 404
+    return jsonify(route), 200
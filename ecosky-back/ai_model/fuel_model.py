@@ -0,0 +1,22 @@
+# Fuel and emissions model shared by FlightEnv, the great-circle baseline and
+# fleet-wide estimates, so every number the API reports uses the same units.
+
+# Fuel units burned per kilometre flown (FlightEnv.step: 0.1 * km)
+FUEL_PER_KM = 0.1
+
+# CO2 emitted per unit of fuel burned (ICAO: 3.16 kg CO2 per kg of jet fuel)
+CO2_PER_FUEL = 3.16
+
+
+def fuel_for_distance(distance_km):
+    """
+    Fuel burned over ``distance_km``. Works on scalars and NumPy arrays.
+    """
+    return FUEL_PER_KM * distance_km
+
+
+def co2_for_fuel(fuel):
+    """
+    CO2 emitted by burning ``fuel``. Works on scalars and NumPy arrays.
+    """
+    return CO2_PER_FUEL * fuel
@@ -0,0 +1,127 @@
+import numpy as np
+
+from fuel_model import co2_for_fuel, fuel_for_distance
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def great_circle_distance_km(start, end):
+    """
+    Haversine distance between two [latitude, longitude] points in kilometers.
+    """
+    lat1, lon1, lat2, lon2 = np.deg2rad([start[0], start[1], end[0], end[1]])
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return float(2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a)))
+
+
+def great_circle_route(start, end, num_points=100):
+    """
+    Evenly spaced points along the great circle from ``start`` to ``end``.
+
+    Args:
+        start (list): [latitude, longitude] in degrees.
+        end (list): [latitude, longitude] in degrees.
+        num_points (int, optional): Number of points including both endpoints.
+
+    Returns:
+        np.ndarray: (num_points, 2) array of [latitude, longitude].
+    """
+    lat1, lon1, lat2, lon2 = np.deg2rad([start[0], start[1], end[0], end[1]])
+    p1 = np.array([np.cos(lat1) * np.cos(lon1), np.cos(lat1) * np.sin(lon1), np.sin(lat1)])
+    p2 = np.array([np.cos(lat2) * np.cos(lon2), np.cos(lat2) * np.sin(lon2), np.sin(lat2)])
+    omega = np.arccos(np.clip(np.dot(p1, p2), -1.0, 1.0))
+
+    t = np.linspace(0.0, 1.0, max(num_points, 2))[:, None]
+    if omega < 1e-12:
+        points = np.repeat(p1[None, :], len(t), axis=0)
+    else:
+        # Spherical linear interpolation between the two unit vectors
+        points = (np.sin((1 - t) * omega) * p1 + np.sin(t * omega) * p2) / np.sin(omega)
+
+    latitude = np.rad2deg(np.arcsin(np.clip(points[:, 2], -1.0, 1.0)))
+    longitude = np.rad2deg(np.arctan2(points[:, 1], points[:, 0]))
+    return np.stack([latitude, longitude], axis=1)
+
+
+def great_circle_baseline(start, end):
+    """
+    Analytic fuel and CO2 for flying the great circle under the FlightEnv fuel model.
+
+    Returns:
+        dict: distance_km, fuel and co2 for the direct route.
+    """
+    distance_km = great_circle_distance_km(start, end)
+    fuel = fuel_for_distance(distance_km)
+    return {"distance_km": distance_km, "fuel": fuel, "co2": co2_for_fuel(fuel)}
+
+
+# Distance the great-circle baseline covers per one-second step at its 250 m/s cruise
+CRUISE_KM_PER_STEP = 0.25
+# Headroom over the direct route for the climb, turns and storm avoidance
+DEFAULT_STEP_SLACK = 1.5
+# Fixed allowance for the take-off climb and the final approach
+MIN_EPISODE_STEPS = 500
+
+
+def step_budget(start, end, slack=DEFAULT_STEP_SLACK):
+    """
+    Episode step limit long enough to fly from ``start`` to ``end`` at cruise speed.
+
+    Args:
+        slack (float, optional): Multiple of the direct-route step count to allow.
+
+    Returns:
+        int: Maximum FlightEnv steps for the scenario.
+    """
+    return int(np.ceil(great_circle_distance_km(start, end) / CRUISE_KM_PER_STEP * slack)) + MIN_EPISODE_STEPS
+
+
+def initial_bearing(lat1, lon1, lat2, lon2):
+    """
+    Initial great-circle bearing in degrees clockwise from north. Vectorized.
+    """
+    lat1, lon1, lat2, lon2 = (np.deg2rad(v) for v in (lat1, lon1, lat2, lon2))
+    dlon = lon2 - lon1
+    x = np.sin(dlon) * np.cos(lat2)
+    y = np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * np.cos(lat2) * np.cos(dlon)
+    return np.rad2deg(np.arctan2(x, y)) % 360.0
+
+
+class GreatCirclePolicy:
+    """
+    Heuristic FlightEnv controller that steers onto the great-circle bearing to
+    the target, holds cruise speed and climbs to the optimal altitude. Useful as
+    a Ray-free stand-in policy and as a simulated baseline.
+    """
+
+    def __init__(self, cruise_velocity=250.0, cruise_altitude=10000.0):
+        self.cruise_velocity = cruise_velocity
+        self.cruise_altitude = cruise_altitude
+
+    def compute_actions(self, obs_batch):
+        """
+        Vectorized ``compute_single_action`` over an (n, obs_dim) batch.
+        """
+        obs_batch = np.asarray(obs_batch, dtype=np.float64)
+        lat, lon, altitude, heading, velocity = (obs_batch[:, i] for i in range(5))
+        turn = (initial_bearing(lat, lon, obs_batch[:, 6], obs_batch[:, 7]) - heading + 180.0) % 360.0 - 180.0
+        throttle = (self.cruise_velocity - velocity) / np.maximum(velocity, 1.0)
+        climb = self.cruise_altitude - altitude
+        return np.stack([
+            np.clip(turn, -10.0, 10.0),
+            np.clip(throttle, -0.2, 0.2),
+            np.clip(climb, -50.0, 50.0)
+        ], axis=1).astype(np.float32)
+
+    def compute_single_action(self, obs):
+        lat, lon, altitude, heading, velocity = obs[0], obs[1], obs[2], obs[3], obs[4]
+        target_lat, target_lon = obs[6], obs[7]
+
+        turn = (initial_bearing(lat, lon, target_lat, target_lon) - heading + 180.0) % 360.0 - 180.0
+        throttle = (self.cruise_velocity - velocity) / max(velocity, 1.0)
+        climb = self.cruise_altitude - altitude
+        return np.array([
+            np.clip(turn, -10.0, 10.0),
+            np.clip(throttle, -0.2, 0.2),
+            np.clip(climb, -50.0, 50.0)
+        ], dtype=np.float32)
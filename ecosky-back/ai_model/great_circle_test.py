@@ -0,0 +1,30 @@
+# File: ecosky-back/ai_model/great_circle_test.py
+
+import numpy as np
+
+from great_circle import GreatCirclePolicy, great_circle_distance_km, great_circle_route
+from rl_env import FlightEnv
+
+
+def test_route_is_evenly_spaced_great_circle():
+    start, end = [51.47, -0.45], [40.64, -73.78]
+    route = great_circle_route(start, end, num_points=11)
+
+    assert np.allclose(route[0], start) and np.allclose(route[-1], end)
+    legs = [great_circle_distance_km(a, b) for a, b in zip(route[:-1], route[1:])]
+    assert np.isclose(sum(legs), great_circle_distance_km(start, end))
+    assert np.allclose(legs, legs[0])
+
+
+def test_great_circle_policy_closes_distance():
+    env = FlightEnv({"start": [51.47, -0.45], "target": [48.0, 2.5], "max_steps": 300})
+    obs, _ = env.reset()
+    policy = GreatCirclePolicy()
+    initial = env._distance_to_target()
+
+    done = truncated = False
+    while not (done or truncated):
+        obs, _, done, truncated, info = env.step(policy.compute_single_action(obs))
+        assert "co2_emissions" in info
+
+    assert env._distance_to_target() < initial - 50.0
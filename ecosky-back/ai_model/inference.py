@@ -1,33 +1,60 @@
-import sys
 import os
+import hashlib
 import logging
+import threading
+import time
 import numpy as np
-from ray.rllib.algorithms.ppo import PPOConfig
-from ray.tune.registry import register_env
 
-# Add project root to Python path
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from beam_search import beam_search_rollout
+from fuel_model import co2_for_fuel, fuel_for_distance
+from great_circle import great_circle_distance_km, great_circle_route, initial_bearing
+from rl_env import TRAFFIC_OBS_DIM, FlightEnv
+from traffic_index import TrafficIndex
+from metrics import ROLLOUT_LENGTH, ROLLOUT_STEPS, ROLLOUTS, span, traced
 
-# Now import your custom environment
-from rl_env import FlightEnv
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s"
-)
 logger = logging.getLogger(__name__)
 
+_env_registered = False
+
+CHECKPOINT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "saved_models/flight_optimizer")
+
+# Policy backend for /optimize: "rllib" (checkpoint), "onnx" or "onnx-int8"
+# (exported by export_policy.py)
+POLICY_RUNTIME = os.getenv("POLICY_RUNTIME", "rllib")
+# Loaded policies per runtime, kept for the life of the process
+_policies = {}
+_policies_lock = threading.Lock()
+# Model file digests per runtime, taken when the policy is loaded
+_policy_versions = {}
+
+# Spacing of the great-circle points appended when a rollout runs out of budget
+CONTINUATION_SPACING_KM = 50.0
+
+
 # Environment registration
 def env_creator(env_config):
     return FlightEnv(env_config)
 
-register_env("FlightEnv", env_creator)
 
+def register_flight_env():
+    """
+    Register FlightEnv with Ray Tune. Ray is imported here rather than at module
+    import so that processes which never run inference don't pay for it.
+    """
+    global _env_registered
+    if not _env_registered:
+        from ray.tune.registry import register_env
+        register_env("FlightEnv", env_creator)
+        _env_registered = True
 
+
+@traced("load_trained_model")
 def load_trained_model():
     """Load trained PPO model from checkpoint"""
     try:
+        from ray.rllib.algorithms.ppo import PPOConfig
+
+        register_flight_env()
         logger.info("Loading PPO model from saved_models/flight_optimizer")
 
         # Recreate exact training configuration
@@ -49,11 +76,7 @@ def load_trained_model():
         )
 
         algo = config.build()
-        checkpoint_path = os.path.join(
-            os.path.dirname(os.path.abspath(__file__)),
-            "saved_models/flight_optimizer"
-        )
-        algo.restore(checkpoint_path)
+        algo.restore(CHECKPOINT_PATH)
         return algo
 
     except Exception as e:
@@ -61,62 +84,278 @@ def load_trained_model():
         raise
 
 
-def optimize_flight_route(start, end, flights, storms, trigger):
+def load_policy(runtime=None):
+    """
+    Load the policy for the configured runtime, once per process.
+
+    Restoring the RLlib checkpoint takes seconds, so it must not happen inside
+    a request's rollout budget; the restored algorithm and the ONNX sessions
+    are kept and reused by every later call.
+
+    Args:
+        runtime (str, optional): "rllib", "onnx" or "onnx-int8". Defaults to POLICY_RUNTIME.
+
+    Returns:
+        object: Policy exposing ``compute_single_action``.
+    """
+    runtime = runtime or POLICY_RUNTIME
+    if runtime not in ("rllib", "onnx", "onnx-int8"):
+        raise ValueError(f"Unknown policy runtime: {runtime}")
+
+    with _policies_lock:
+        if runtime not in _policies:
+            if runtime == "rllib":
+                _policies[runtime] = load_trained_model()
+            else:
+                from export_policy import ONNX_INT8_POLICY_PATH, ONNX_POLICY_PATH, OnnxPolicy
+
+                path = ONNX_INT8_POLICY_PATH if runtime == "onnx-int8" else ONNX_POLICY_PATH
+                logger.info(f"Loading {runtime} policy from {path}")
+                _policies[runtime] = OnnxPolicy(path)
+            # Digest the files that were just loaded, so stored routes name this policy
+            _policy_versions[runtime] = _model_digest(runtime)
+        return _policies[runtime]
+
+
+def policy_observation_dim(policy):
+    """
+    Observation size the policy was trained or exported with.
+
+    Returns:
+        int | None: None when the policy accepts any layout (e.g. GreatCirclePolicy).
+    """
+    if hasattr(policy, "get_policy"):
+        return int(policy.get_policy().observation_space.shape[0])
+    return getattr(policy, "obs_dim", None)
+
+
+def supports_traffic_channel(policy):
+    """
+    Whether ``policy`` can take observations with the live-traffic channel.
+    """
+    obs_dim = policy_observation_dim(policy)
+    return obs_dim is None or obs_dim == TRAFFIC_OBS_DIM
+
+
+def policy_version(runtime=None):
+    """
+    Identify the policy that serves /optimize, e.g. ``"onnx-int8:3fa2c1d09b1e"``.
+
+    The suffix digests the model files' names, sizes and modification times,
+    so it changes whenever a checkpoint is retrained or re-exported. It is
+    computed once per process, when the policy is loaded (or on the first
+    call), so tagging a stored route costs no file system walk. Set
+    ``POLICY_VERSION`` to report an explicit version instead.
+
+    Args:
+        runtime (str, optional): "rllib", "onnx" or "onnx-int8". Defaults to POLICY_RUNTIME.
+
+    Returns:
+        str: "<runtime>:<digest>", or "<runtime>:missing" if no model files exist.
+    """
+    if os.getenv("POLICY_VERSION"):
+        return os.getenv("POLICY_VERSION")
+    runtime = runtime or POLICY_RUNTIME
+    if runtime not in _policy_versions:
+        _policy_versions[runtime] = _model_digest(runtime)
+    return _policy_versions[runtime]
+
+
+def _model_digest(runtime):
+    if runtime == "rllib":
+        root = CHECKPOINT_PATH
+        paths = sorted(os.path.join(d, f) for d, _, files in os.walk(root) for f in files)
+    else:
+        from export_policy import ONNX_INT8_POLICY_PATH, ONNX_POLICY_PATH
+
+        root = ONNX_INT8_POLICY_PATH if runtime == "onnx-int8" else ONNX_POLICY_PATH
+        paths = [root] if os.path.exists(root) else []
+
+    if not paths:
+        return f"{runtime}:missing"
+    digest = hashlib.sha1()
+    for path in paths:
+        stat = os.stat(path)
+        digest.update(f"{os.path.relpath(path, root)}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return f"{runtime}:{digest.hexdigest()[:12]}"
+
+
+def build_env_config(start, end, storms, max_steps=2000):
+    """
+    FlightEnv configuration used for inference, matching the training setup.
+
+    Args:
+        start (list): Starting coordinates [latitude, longitude].
+        end (list): Ending coordinates [latitude, longitude].
+        storms (list): Storm dicts with "center" and "radius" (km).
+        max_steps (int, optional): Episode step limit.
+
+    Returns:
+        dict: env_config for FlightEnv.
+    """
+    return {
+        "start": start,
+        "target": end,
+        "storms_data": [
+            {"center": storm.get("center", [0, 0]), "radius": storm.get("radius", 1.0)}
+            for storm in storms
+        ],
+        "max_steps": max_steps,
+        "start_altitude": 1500.0,
+        "start_heading": 45.0,
+        "start_velocity": 120.0,
+        "start_fuel": 5000.0
+    }
+
+
+def great_circle_continuation(last_point, end, spacing_km=CONTINUATION_SPACING_KM):
+    """
+    Complete a partial route by flying the great circle from its last point to ``end``.
+
+    Points keep the observation layout of the policy route, with latitude,
+    longitude, heading and remaining fuel updated along the way.
+
+    Args:
+        last_point (list): Last observation of the partial route.
+        end (list): Ending coordinates [latitude, longitude].
+        spacing_km (float, optional): Approximate distance between appended points.
+
+    Returns:
+        tuple: (list of route points, distance in km)
+    """
+    start = [float(last_point[0]), float(last_point[1])]
+    distance_km = great_circle_distance_km(start, end)
+    path = great_circle_route(start, end, num_points=int(np.ceil(distance_km / spacing_km)) + 1)
+
+    headings = initial_bearing(path[:-1, 0], path[:-1, 1], path[1:, 0], path[1:, 1])
+    flown_km = np.arange(1, len(path)) * (distance_km / max(len(path) - 1, 1))
+    fuel_left = np.maximum(0.0, float(last_point[5]) - fuel_for_distance(flown_km))
+
+    points = []
+    for (lat, lon), heading, fuel in zip(path[1:], headings, fuel_left):
+        point = list(last_point)
+        point[0], point[1], point[3], point[5] = float(lat), float(lon), float(heading), float(fuel)
+        points.append(point)
+    return points, distance_km
+
+
+def optimize_flight_route(start, end, flights, storms, trigger, algo=None,
+                          traffic_index=None, traffic_channel=False, max_ms=None, max_steps=None,
+                          beam_width=1, num_samples=1):
     """
     Run inference with the trained model and optimize the flight route.
 
+    The rollout is anytime: when the ``max_ms`` latency budget or the
+    ``max_steps`` step budget runs out, it stops and the route is completed
+    with a great-circle continuation to ``end``, so latency stays bounded.
+    A rollout cut short by the env's episode limit is completed the same way,
+    so the route always ends at ``end`` and fuel/CO2 cover the whole trip.
+    The budget covers the rollout only; the policy is loaded (once per
+    process, see ``load_policy``) before the clock starts.
+
     Args:
         start (list): Starting coordinates [latitude, longitude].
         end (list): Ending coordinates [latitude, longitude].
         flights (list): List of current flights data.
         storms (list): List of storm data.
         trigger (str): Weather condition, e.g., "storm" or "clear".
+        algo (optional): Pre-loaded policy exposing ``compute_single_action``.
+            The POLICY_RUNTIME policy is loaded when omitted.
+        traffic_index (TrafficIndex, optional): Pre-built index over ``flights``.
+        traffic_channel (bool, optional): Add the live-traffic density channel to the
+            observation. Only valid for policies trained with that channel; a
+            ValueError is raised for the others.
+        max_ms (float, optional): Wall-clock budget in milliseconds for the rollout.
+        max_steps (int, optional): Maximum number of policy steps.
+        beam_width (int, optional): Beams kept by beam search; 1 with ``num_samples``
+            1 is the single greedy rollout.
+        num_samples (int, optional): Branches per beam (see ``beam_search_rollout``).
+            ``beam_width=1`` with ``num_samples=K`` keeps the best of K sampled branches
+            at every re-ranking. ``beam_width > 1`` needs ``num_samples >= 2``.
 
     Returns:
-        tuple: Optimized route (list of coordinates), total fuel saved, and total CO2 reduced.
+        tuple: Optimized route (list of coordinates), total fuel burned, total CO2 emitted,
+        and a dict with "partial" (bool), "steps" (policy steps taken) and "stop_reason"
+        ("deadline", "step_budget", "truncated" or None).
     """
     try:
-        algo = load_trained_model()
+        if algo is None:
+            algo = load_policy()
+        deadline = time.perf_counter() + max_ms / 1000.0 if max_ms is not None else None
 
         # Environment configuration
-        env_config = {
-            "start": start,
-            "target": end,
-            "storms_data": [
-                {"center": storm.get("center", [0, 0]), "radius": storm.get("radius", 1.0)}
-                for storm in storms
-            ],
-            "max_steps": 2000,
-            "start_altitude": 1500.0,
-            "start_heading": 45.0,
-            "start_velocity": 120.0,
-            "start_fuel": 5000.0
-        }
-
-        env = FlightEnv(env_config)
-        obs, _ = env.reset()
+        env_config = build_env_config(start, end, storms)
+        if traffic_channel:
+            if not supports_traffic_channel(algo):
+                raise ValueError("The loaded policy was not trained with the traffic channel")
+            env_config["traffic_index"] = traffic_index or TrafficIndex(flights)
+
         done = False
+        truncated = False
+        stop_reason = None
         route = []
         total_fuel = 0.0
         total_co2 = 0.0
 
-        while not done:
-            action = algo.compute_single_action(obs)
-            obs, reward, done, truncated, info = env.step(action)
-            
-            # Append the current observation (route point) to the route
-            route.append(obs.tolist() if isinstance(obs, np.ndarray) else obs)
-            total_fuel += float(info.get("fuel_used", 0))
-            total_co2 += float(info.get("co2_emissions", 0))
+        with span("policy_rollout"):
+            if beam_width > 1 or num_samples > 1:
+                # Branches start from cloned env states; one batched policy call per step
+                search = beam_search_rollout(env_config, algo, beam_width=beam_width,
+                                             num_samples=num_samples, max_steps=max_steps,
+                                             deadline=deadline)
+                route, total_fuel, total_co2 = search["route"], search["fuel"], search["co2"]
+                stop_reason, truncated = search["stop_reason"], search["truncated"]
+            else:
+                with span("env_reset"):
+                    env = FlightEnv(env_config)
+                    obs, _ = env.reset()
+                while not done:
+                    if max_steps is not None and len(route) >= max_steps:
+                        stop_reason = "step_budget"
+                        break
+                    if deadline is not None and time.perf_counter() >= deadline:
+                        stop_reason = "deadline"
+                        break
+
+                    action = algo.compute_single_action(obs)
+                    obs, reward, done, truncated, info = env.step(action)
+
+                    # Append the current observation (route point) to the route
+                    route.append(obs.tolist() if isinstance(obs, np.ndarray) else obs)
+                    total_fuel += float(info.get("fuel_used", 0))
+                    total_co2 += float(info.get("co2_emissions", 0))
 
-            if done or truncated:
-                break
+                    if done or truncated:
+                        break
+
+        if stop_reason is None and truncated:
+            # The env's episode limit ended the rollout short of ``end``
+            stop_reason = "truncated"
+
+        steps = len(route)
+        if stop_reason is not None:
+            with span("great_circle_continuation"):
+                # A budget spent before the first step continues from the start observation
+                last_point = route[-1] if route else FlightEnv(env_config).reset()[0].tolist()
+                continuation, distance_km = great_circle_continuation(last_point, end)
+                route.extend(continuation)
+                fuel = fuel_for_distance(distance_km)
+                total_fuel += fuel
+                total_co2 += co2_for_fuel(fuel)
+            logger.info(f"Rollout stopped on {stop_reason} after {steps} steps; "
+                        f"completed {distance_km:.1f} km along the great circle.")
+
+        outcome = stop_reason or ("truncated" if truncated else "done")
+        ROLLOUTS.labels(outcome=outcome).inc()
+        ROLLOUT_STEPS.inc(steps)
+        ROLLOUT_LENGTH.observe(steps)
 
         logger.info(f"Optimized route length: {len(route)} points")
-        logger.info(f"Fuel saved: {total_fuel:.2f} units")
-        logger.info(f"CO2 reduced: {total_co2:.2f} units")
+        logger.info(f"Fuel burned: {total_fuel:.2f} units")
+        logger.info(f"CO2 emitted: {total_co2:.2f} units")
 
-        return route, total_fuel, total_co2
+        rollout = {"partial": stop_reason is not None, "steps": steps, "stop_reason": stop_reason}
+        return route, total_fuel, total_co2, rollout
 
     except Exception as e:
         logger.error(f"Error during flight optimization: {str(e)}")
@@ -124,6 +363,9 @@ def optimize_flight_route(start, end, flights, storms, trigger):
 
 
 if __name__ == "__main__":
+    from logging_setup import configure_logging
+    configure_logging()
+
     try:
         # Mock test data for standalone execution
         start = [51.5074, -0.1278]  # London
@@ -132,7 +374,7 @@ if __name__ == "__main__":
         storms = [{"center": [55.0, -10.0], "radius": 2.0}]
         trigger = "clear"
 
-        route, fuel, co2 = optimize_flight_route(start, end, flights, storms, trigger)
+        route, fuel, co2, _ = optimize_flight_route(start, end, flights, storms, trigger)
         print(f"Optimization completed. First 3 points: {route[:3]}")
     except Exception as e:
         logger.error(f"Main execution failed: {str(e)}")
@@ -0,0 +1,106 @@
+# File: ecosky-back/ai_model/inference_test.py
+
+import time
+
+import numpy as np
+import pytest
+
+import inference
+
+from great_circle import GreatCirclePolicy, great_circle_distance_km
+from inference import load_policy, optimize_flight_route, policy_version, supports_traffic_channel
+
+START = [51.5074, -0.1278]  # London
+END = [40.7128, -74.0060]  # NYC
+
+
+class SlowPolicy(GreatCirclePolicy):
+    def compute_single_action(self, obs):
+        time.sleep(0.005)
+        return super().compute_single_action(obs)
+
+
+def test_step_budget_completes_route_along_great_circle():
+    route, fuel, co2, rollout = optimize_flight_route(START, END, [], [], "clear",
+                                                      algo=GreatCirclePolicy(), max_steps=5)
+
+    assert rollout == {"partial": True, "steps": 5, "stop_reason": "step_budget"}
+    assert len(route) > 5
+    assert np.allclose(route[-1][:2], END, atol=1e-3)
+    # The policy's few steps plus a great-circle remainder cost about the direct route
+    direct_fuel = 0.1 * great_circle_distance_km(START, END)
+    assert fuel == pytest.approx(direct_fuel, rel=0.01)
+    assert co2 == pytest.approx(fuel * 3.16)
+
+
+def test_latency_budget_bounds_rollout_time():
+    start = time.perf_counter()
+    route, _, _, rollout = optimize_flight_route(START, END, [], [], "clear",
+                                                 algo=SlowPolicy(), max_ms=50)
+    elapsed_ms = (time.perf_counter() - start) * 1000.0
+
+    assert rollout["partial"] and rollout["stop_reason"] == "deadline"
+    assert 0 < rollout["steps"] < 50
+    assert elapsed_ms < 500
+    assert np.allclose(route[-1][:2], END, atol=1e-3)
+
+
+def test_unbounded_rollout_is_not_partial():
+    paris, frankfurt = [49.0097, 2.5479], [50.0379, 8.5622]
+    route, _, _, rollout = optimize_flight_route(paris, frankfurt, [], [], "clear", algo=GreatCirclePolicy())
+    assert rollout["partial"] is False and rollout["stop_reason"] is None
+    assert rollout["steps"] == len(route)
+
+
+def test_truncated_long_haul_is_completed_to_destination():
+    for options in ({}, {"beam_width": 2, "num_samples": 2}):
+        route, fuel, _, rollout = optimize_flight_route(START, END, [], [], "clear",
+                                                        algo=GreatCirclePolicy(), **options)
+        # 2000 one-second steps cover ~500 km of the ~5,600 km trip
+        assert rollout == {"partial": True, "steps": 2000, "stop_reason": "truncated"}
+        assert great_circle_distance_km(route[-1][:2], END) < 1.0
+        assert fuel == pytest.approx(0.1 * great_circle_distance_km(START, END), rel=0.01)
+
+
+class EightFeaturePolicy(GreatCirclePolicy):
+    obs_dim = 8
+
+
+def test_traffic_channel_requires_a_matching_policy():
+    assert supports_traffic_channel(GreatCirclePolicy())
+    assert not supports_traffic_channel(EightFeaturePolicy())
+    with pytest.raises(ValueError):
+        optimize_flight_route(START, END, [], [], "clear", algo=EightFeaturePolicy(), traffic_channel=True)
+
+
+def test_unknown_policy_runtime_is_rejected():
+    with pytest.raises(ValueError):
+        load_policy("tensorrt")
+
+
+def test_restored_checkpoint_is_reused_across_requests(monkeypatch):
+    restores = []
+    monkeypatch.setattr(inference, "_policies", {})
+    monkeypatch.setattr(inference, "load_trained_model", lambda: restores.append(1) or GreatCirclePolicy())
+
+    first = load_policy("rllib")
+    assert load_policy("rllib") is first
+    assert len(restores) == 1
+
+
+def test_policy_version_override(monkeypatch):
+    monkeypatch.setenv("POLICY_VERSION", "ppo-2025-01")
+    assert policy_version() == "ppo-2025-01"
+    monkeypatch.delenv("POLICY_VERSION")
+    assert policy_version("rllib").startswith("rllib:")
+
+
+def test_policy_version_is_computed_once(monkeypatch):
+    walks = []
+    real_walk = inference.os.walk
+    monkeypatch.setattr(inference, "_policy_versions", {})
+    monkeypatch.setattr(inference.os, "walk", lambda root: walks.append(root) or real_walk(root))
+
+    version = policy_version("rllib")
+    assert policy_version("rllib") == version
+    assert len(walks) == 1
@@ -1,45 +1,107 @@
 # File: ecosky-back/ai_model/ingest_api.py
 
+import os
 import requests
 import logging
 from datetime import datetime, timedelta
 
-# Initialize logging
-logging.basicConfig(level=logging.INFO)
+from metrics import UPSTREAM_FETCH_ERRORS, traced
+from opensky_stream import parse_states_stream
+
 logger = logging.getLogger(__name__)
 
-def fetch_flight_data(username=None, password=None):
+# Upstream base URLs; point them at benchmarks/stub_upstream.py for load tests
+OPENSKY_API_URL = os.getenv("OPENSKY_API_URL", "https://opensky-network.org/api").rstrip("/")
+NOAA_API_URL = os.getenv("NOAA_API_URL", "https://api.weather.gov").rstrip("/")
+
+@traced("fetch_flight_data")
+def fetch_flight_data(username=None, password=None, bbox=None):
     """
     Fetch raw flight data from the OpenSky Network API.
     
     Args:
         username (str, optional): OpenSky Network username for authenticated access.
         password (str, optional): OpenSky Network password for authenticated access.
+        bbox (tuple, optional): (lamin, lomin, lamax, lomax) in degrees. Smaller
+            areas cost fewer API credits; the whole world is fetched when omitted.
     
     Returns:
         dict: Raw JSON data containing flight states.
     """
-    url = "https://opensky-network.org/api/states/all"
+    url = f"{OPENSKY_API_URL}/states/all"
+    params = dict(zip(("lamin", "lomin", "lamax", "lomax"), bbox)) if bbox else None
     try:
         if username and password:
             # Authenticated request (higher rate limits)
-            response = requests.get(url, auth=(username, password), timeout=10)
+            response = requests.get(url, auth=(username, password), params=params, timeout=10)
         else:
             # Unauthenticated request
-            response = requests.get(url, timeout=10)
+            response = requests.get(url, params=params, timeout=10)
         response.raise_for_status()
         logger.info("Successfully fetched flight data from OpenSky API.")
         return response.json()
     except requests.HTTPError as http_err:
         logger.error(f"HTTP error occurred while fetching flight data: {http_err}")
+        rate_limited = http_err.response is not None and http_err.response.status_code == 429
+        UPSTREAM_FETCH_ERRORS.labels(source="opensky", error="rate_limited" if rate_limited else "http").inc()
+    except requests.ConnectionError as conn_err:
+        logger.error(f"Connection error occurred while fetching flight data: {conn_err}")
+        UPSTREAM_FETCH_ERRORS.labels(source="opensky", error="connection").inc()
+    except requests.Timeout as timeout_err:
+        logger.error(f"Timeout error occurred while fetching flight data: {timeout_err}")
+        UPSTREAM_FETCH_ERRORS.labels(source="opensky", error="timeout").inc()
+    except requests.RequestException as req_err:
+        logger.error(f"An error occurred while fetching flight data: {req_err}")
+        UPSTREAM_FETCH_ERRORS.labels(source="opensky", error="other").inc()
+    return {}
+
+@traced("fetch_flight_data")
+def fetch_flight_columns(username=None, password=None, bbox=None, chunk_size=65536):
+    """
+    Fetch live flight data from the OpenSky Network API, parsing the response
+    as it streams in.
+
+    Unlike ``fetch_flight_data``, neither the whole body nor the nested
+    ``states`` list is ever held in memory: each state vector is decoded on
+    arrival and its fields written straight into NumPy columns.
+
+    Args:
+        username (str, optional): OpenSky Network username for authenticated access.
+        password (str, optional): OpenSky Network password for authenticated access.
+        bbox (tuple, optional): (lamin, lomin, lamax, lomax) in degrees.
+        chunk_size (int, optional): Bytes read from the socket at a time.
+
+    Returns:
+        dict: ``{"time": int, "columns": FlightColumns}``, or {} on failure.
+    """
+    url = f"{OPENSKY_API_URL}/states/all"
+    params = dict(zip(("lamin", "lomin", "lamax", "lomax"), bbox)) if bbox else None
+    auth = (username, password) if username and password else None
+    try:
+        with requests.get(url, auth=auth, params=params, timeout=10, stream=True) as response:
+            response.raise_for_status()
+            flight_data = parse_states_stream(response.iter_content(chunk_size=chunk_size))
+        logger.info(f"Streamed {len(flight_data['columns'])} flights from OpenSky API.")
+        return flight_data
+    except requests.HTTPError as http_err:
+        logger.error(f"HTTP error occurred while fetching flight data: {http_err}")
+        rate_limited = http_err.response is not None and http_err.response.status_code == 429
+        UPSTREAM_FETCH_ERRORS.labels(source="opensky", error="rate_limited" if rate_limited else "http").inc()
     except requests.ConnectionError as conn_err:
         logger.error(f"Connection error occurred while fetching flight data: {conn_err}")
+        UPSTREAM_FETCH_ERRORS.labels(source="opensky", error="connection").inc()
     except requests.Timeout as timeout_err:
         logger.error(f"Timeout error occurred while fetching flight data: {timeout_err}")
+        UPSTREAM_FETCH_ERRORS.labels(source="opensky", error="timeout").inc()
     except requests.RequestException as req_err:
         logger.error(f"An error occurred while fetching flight data: {req_err}")
+        UPSTREAM_FETCH_ERRORS.labels(source="opensky", error="other").inc()
+    except ValueError as parse_err:
+        logger.error(f"Could not parse flight data: {parse_err}")
+        UPSTREAM_FETCH_ERRORS.labels(source="opensky", error="parse").inc()
     return {}
 
+@traced("fetch_weather_alerts")
 def fetch_weather_alerts():
     """
     Fetch raw weather alerts data from the NOAA Weather API.
@@ -49,7 +111,7 @@ def fetch_weather_alerts():
     """
     # NOAA Weather API endpoint for active alerts
     # Documentation: https://www.weather.gov/documentation/services-web-api
-    url = "https://api.weather.gov/alerts/active"
+    url = f"{NOAA_API_URL}/alerts/active"
     headers = {
         'User-Agent': 'EcoskyProject/1.0 (youremail@example.com)',  # Replace with your contact info
         'Accept': 'application/geo+json'
@@ -61,14 +123,19 @@ def fetch_weather_alerts():
         return response.json()
     except requests.HTTPError as http_err:
         logger.error(f"HTTP error occurred while fetching weather alerts: {http_err}")
+        UPSTREAM_FETCH_ERRORS.labels(source="noaa", error="http").inc()
     except requests.ConnectionError as conn_err:
         logger.error(f"Connection error occurred while fetching weather alerts: {conn_err}")
+        UPSTREAM_FETCH_ERRORS.labels(source="noaa", error="connection").inc()
     except requests.Timeout as timeout_err:
         logger.error(f"Timeout error occurred while fetching weather alerts: {timeout_err}")
+        UPSTREAM_FETCH_ERRORS.labels(source="noaa", error="timeout").inc()
     except requests.RequestException as req_err:
         logger.error(f"An error occurred while fetching weather alerts: {req_err}")
+        UPSTREAM_FETCH_ERRORS.labels(source="noaa", error="other").inc()
     return {}
 
+@traced("fetch_historical_flight_data")
 def fetch_historical_flight_data(time_window_minutes=10, username=None, password=None):
     """
     Fetch historical flight data from the OpenSky Network API within a specific time window.
@@ -81,7 +148,7 @@ def fetch_historical_flight_data(time_window_minutes=10, username=None, password
     Returns:
         dict: Raw JSON data containing flight states.
     """
-    url = "https://opensky-network.org/api/states/all"
+    url = f"{OPENSKY_API_URL}/states/all"
     current_time = datetime.utcnow()
     past_time = current_time - timedelta(minutes=time_window_minutes)
     try:
@@ -97,10 +164,14 @@ def fetch_historical_flight_data(time_window_minutes=10, username=None, password
         return response.json()
     except requests.HTTPError as http_err:
         logger.error(f"HTTP error occurred while fetching historical flight data: {http_err}")
+        UPSTREAM_FETCH_ERRORS.labels(source="opensky", error="http").inc()
     except requests.ConnectionError as conn_err:
         logger.error(f"Connection error occurred while fetching historical flight data: {conn_err}")
+        UPSTREAM_FETCH_ERRORS.labels(source="opensky", error="connection").inc()
     except requests.Timeout as timeout_err:
         logger.error(f"Timeout error occurred while fetching historical flight data: {timeout_err}")
+        UPSTREAM_FETCH_ERRORS.labels(source="opensky", error="timeout").inc()
     except requests.RequestException as req_err:
         logger.error(f"An error occurred while fetching historical flight data: {req_err}")
+        UPSTREAM_FETCH_ERRORS.labels(source="opensky", error="other").inc()
     return {}
@@ -0,0 +1,43 @@
+# File: ecosky-back/ai_model/ingest_api_test.py
+
+import threading
+
+import pytest
+
+import ingest_api
+from benchmarks.run_benchmarks import NOAA_FIXTURE, OPENSKY_FIXTURE, load_fixture
+from benchmarks.stub_upstream import StubUpstream, make_server
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    stub = StubUpstream(load_fixture(OPENSKY_FIXTURE), load_fixture(NOAA_FIXTURE), live_time=False)
+    server = make_server(stub, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    monkeypatch.setattr(ingest_api, "OPENSKY_API_URL", f"{url}/api")
+    monkeypatch.setattr(ingest_api, "NOAA_API_URL", url)
+    yield stub
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetches_replayed_payloads_from_configured_upstreams(stub):
+    recorded = load_fixture(OPENSKY_FIXTURE)
+
+    assert ingest_api.fetch_flight_data() == recorded
+    assert len(ingest_api.fetch_flight_columns()["columns"]) == len(
+        [s for s in recorded["states"] if s[5] is not None and s[6] is not None])
+    assert ingest_api.fetch_weather_alerts()["features"]
+
+    regional = ingest_api.fetch_flight_data(bbox=(0.0, 0.0, 90.0, 180.0))
+    assert regional["states"]
+    assert all(state[6] >= 0 and state[5] >= 0 for state in regional["states"])
+    assert len(regional["states"]) < len(recorded["states"])
+
+
+def test_injected_upstream_failures_return_empty_payloads(stub):
+    stub.rate_limit_rate = 1.0
+    assert ingest_api.fetch_flight_data() == {}
+    assert ingest_api.fetch_flight_columns() == {}
+    assert stub.requests[("/api/states/all", 429)] == 2
@@ -0,0 +1,71 @@
+import logging
+import os
+
+from fetch_scheduler import (ANONYMOUS_CREDITS_PER_DAY, AUTHENTICATED_CREDITS_PER_DAY, DEFAULT_STATE_DIR,
+                             FetchScheduler)
+from fleet_emissions import estimate_fleet_emissions
+from flight_columns import FlightColumns
+from ingest_api import fetch_flight_columns, fetch_flight_data
+from metrics import span
+from preprocess import preprocess_flight_data
+from snapshot import SnapshotStore
+from traffic_index import TrafficIndex
+
+logger = logging.getLogger(__name__)
+
+# Latest processed OpenSky snapshot, shared by all request threads
+snapshot_store = SnapshotStore(preprocess_flight_data, derive={
+    "columns": FlightColumns.from_flights,
+    "traffic_index": TrafficIndex,
+    "emissions": ("columns", estimate_fleet_emissions),
+})
+
+
+def _fetch_states(bbox=None):
+    # Streaming parses the response into columns as it arrives, without
+    # holding the whole body and state list in memory
+    fetch = fetch_flight_columns if os.getenv('OPENSKY_STREAMING', '0') == '1' else fetch_flight_data
+    return fetch(
+        username=os.getenv('OPENSKY_USERNAME'),
+        password=os.getenv('OPENSKY_PASSWORD'),
+        bbox=bbox
+    )
+
+
+def _credits_per_day():
+    default = (AUTHENTICATED_CREDITS_PER_DAY if os.getenv('OPENSKY_USERNAME')
+               else ANONYMOUS_CREDITS_PER_DAY)
+    return int(os.getenv('OPENSKY_CREDITS_PER_DAY', default))
+
+
+# One process per host polls OpenSky; the others load its published snapshots
+fetch_scheduler = FetchScheduler(
+    snapshot_store,
+    lambda bbox: _fetch_states(bbox),
+    state_dir=os.getenv('FETCH_STATE_DIR', DEFAULT_STATE_DIR),
+    credits_per_day=_credits_per_day(),
+    global_interval_s=float(os.getenv('FETCH_GLOBAL_INTERVAL_S', 300)),
+    view_interval_s=float(os.getenv('FETCH_VIEW_INTERVAL_S', 15)),
+)
+
+
+def refresh_flight_snapshot():
+    """
+    Run one fetch-scheduler step: the leader fetches from OpenSky when its
+    cadence and credit budget allow; followers pick up the leader's snapshot.
+
+    Returns:
+        FlightSnapshot: The latest snapshot, or None if nothing has been fetched yet.
+    """
+    with span("snapshot_update"):
+        return fetch_scheduler.tick()
+
+
+def current_flight_snapshot():
+    """
+    Return the cached snapshot, running a scheduler step only if nothing has been loaded yet.
+
+    Returns:
+        FlightSnapshot: The latest snapshot, or None if the upstream fetch failed.
+    """
+    return snapshot_store.current or refresh_flight_snapshot()
@@ -0,0 +1,105 @@
+import atexit
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+
+LOG_FORMAT = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+
+_listener = None
+_listener_lock = threading.Lock()
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that never blocks the caller: when the queue is full the
+    record is dropped and counted instead of waiting for the writer thread.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Let at most ``burst`` records per call site through every ``interval`` seconds.
+
+    Call sites are keyed on (pathname, lineno), so a message logged from a hot
+    loop is throttled without affecting other log statements. The first record
+    let through after a quiet period reports how many were suppressed.
+    """
+
+    def __init__(self, burst=20, interval=10.0):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            window_start, count, suppressed = self._windows.get(key, (now, 0, 0))
+            if now - window_start >= self.interval:
+                window_start, count = now, 0
+            if count >= self.burst:
+                self._windows[key] = (window_start, count, suppressed + 1)
+                return False
+            self._windows[key] = (window_start, count + 1, 0)
+
+        if suppressed:
+            record.msg = f"{record.msg} ({suppressed} similar messages suppressed)"
+        return True
+
+
+def configure_logging(log_file=None, level=logging.INFO, queue_size=10000,
+                      burst=20, interval=10.0):
+    """
+    Configure process-wide logging once.
+
+    Records are handed to a bounded in-memory queue and written to stderr (and
+    ``log_file`` if given) by a background listener thread, so request threads
+    and rollout workers never block on disk I/O. Repeated calls are no-ops.
+
+    Args:
+        log_file (str, optional): File to append log records to.
+        level (int, optional): Root log level. Defaults to INFO.
+        queue_size (int, optional): Records buffered before new ones are dropped.
+        burst (int, optional): Records allowed per call site per ``interval``.
+        interval (float, optional): Rate-limit window in seconds.
+    """
+    global _listener
+
+    with _listener_lock:
+        if _listener is not None:
+            return
+
+        formatter = logging.Formatter(LOG_FORMAT)
+        handlers = [logging.StreamHandler()]
+        if log_file:
+            handlers.append(logging.FileHandler(log_file))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        log_queue = queue.Queue(maxsize=queue_size)
+        queue_handler = DroppingQueueHandler(log_queue)
+        queue_handler.addFilter(RateLimitFilter(burst=burst, interval=interval))
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(queue_handler)
+        root.setLevel(level)
+
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
@@ -0,0 +1,28 @@
+# File: ecosky-back/ai_model/metrics_test.py
+
+from metrics import MetricsRegistry
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    latency = registry.histogram("test_latency_seconds", "Test latency.", labelnames=("stage",),
+                                 buckets=(0.1, 1.0))
+    latency.labels("fetch").observe(0.05)
+    latency.labels("fetch").observe(0.5)
+    latency.labels("fetch").observe(5.0)
+
+    text = registry.render()
+    assert '# TYPE test_latency_seconds histogram' in text
+    assert 'test_latency_seconds_bucket{stage="fetch",le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{stage="fetch",le="1.0"} 2' in text
+    assert 'test_latency_seconds_bucket{stage="fetch",le="+Inf"} 3' in text
+    assert 'test_latency_seconds_count{stage="fetch"} 3' in text
+
+
+def test_counter_labels_are_escaped():
+    registry = MetricsRegistry()
+    errors = registry.counter("test_errors_total", "Test errors.", labelnames=("source",))
+    errors.labels(source='open"sky').inc()
+    errors.labels(source='open"sky').inc(2)
+
+    assert 'test_errors_total{source="open\\"sky"} 3.0' in registry.render()
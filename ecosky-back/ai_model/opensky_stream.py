@@ -0,0 +1,270 @@
+"""
+Incremental parser for OpenSky ``states/all`` responses.
+
+``response.json()`` holds the raw body, the full nested list of state vectors
+and then the processed dicts in memory at once. ``StatesStreamParser`` instead
+consumes the body chunk by chunk as it arrives, decodes one state vector at a
+time and writes only the fields the backend uses into preallocated NumPy
+columns, so the peak is one network chunk plus the columns themselves.
+"""
+
+import codecs
+import json
+import re
+
+import numpy as np
+
+from flight_columns import FLOAT_FIELDS, OBJECT_FIELDS, FlightColumns
+
+# Rows preallocated up front; a global snapshot has ~10k aircraft
+DEFAULT_CAPACITY = 16384
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+_START, _KEY, _VALUE, _STATES, _ROWS, _DONE = range(6)
+
+
+class StatesStreamParser:
+    """
+    Push parser for a ``{"time": ..., "states": [[...], ...]}`` payload.
+
+    Feed it body chunks with ``feed`` and call ``finish`` once the body is
+    complete. Rows without a position are skipped, as in
+    ``preprocess_flight_data``.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        """
+        Args:
+            capacity (int, optional): Rows to preallocate. The columns double in
+                size if a snapshot has more aircraft.
+        """
+        self.time = None
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._state = _START
+        self._key = None
+        self._size = 0
+        self._columns = self._allocate(max(int(capacity), 1))
+
+    @staticmethod
+    def _allocate(capacity):
+        columns = {name: np.empty(capacity, dtype=object) for name in OBJECT_FIELDS}
+        columns.update({name: np.empty(capacity, dtype=np.float64) for name in FLOAT_FIELDS})
+        columns['on_ground'] = np.empty(capacity, dtype=bool)
+        return columns
+
+    def _grow(self):
+        grown = self._allocate(2 * len(self._columns['latitude']))
+        for name, values in self._columns.items():
+            grown[name][:self._size] = values[:self._size]
+        self._columns = grown
+
+    def append_state(self, state):
+        """Write one decoded state vector into the columns, unless it has no position."""
+        self.append_states([state])
+
+    def append_states(self, states):
+        """Write decoded state vectors into the columns, skipping those without a position."""
+        # OpenSky state vector fields:
+        # [0] icao24, [1] callsign, [2] origin_country, [3] time_position,
+        # [5] longitude, [6] latitude, [7] baro_altitude, [8] on_ground,
+        # [9] velocity, [10] true_track, [11] vertical_rate
+        states = [state for state in states if state[5] is not None and state[6] is not None]
+        while self._size + len(states) > len(self._columns['latitude']):
+            self._grow()
+        rows, columns = slice(self._size, self._size + len(states)), self._columns
+        columns['icao24'][rows] = [state[0] for state in states]
+        columns['callsign'][rows] = [state[1].strip() if state[1] else '' for state in states]
+        columns['origin_country'][rows] = [state[2] for state in states]
+        columns['longitude'][rows] = [state[5] for state in states]
+        columns['latitude'][rows] = [state[6] for state in states]
+        columns['baro_altitude'][rows] = [np.nan if state[7] is None else state[7] for state in states]
+        columns['on_ground'][rows] = [bool(state[8]) for state in states]
+        columns['velocity'][rows] = [np.nan if state[9] is None else state[9] for state in states]
+        columns['true_track'][rows] = [np.nan if state[10] is None else state[10] for state in states]
+        columns['vertical_rate'][rows] = [np.nan if state[11] is None else state[11] for state in states]
+        columns['time_position'][rows] = [np.nan if state[3] is None else state[3] for state in states]
+        self._size += len(states)
+
+    def _decode_rows(self, pos):
+        """
+        Decode every complete row from ``pos`` in one ``json.loads`` call.
+
+        Returns:
+            int: Position after the last decoded row (``pos`` if none was decoded).
+        """
+        # Cutting at the last "]," gives a run of whole rows, unless the cut
+        # falls inside a string or nested array; then the parse fails and the
+        # caller decodes row by row.
+        cut = self._buffer.rfind("],", pos)
+        if cut < 0:
+            return pos
+        try:
+            states = json.loads("[" + self._buffer[pos:cut + 1] + "]")
+        except json.JSONDecodeError:
+            return pos
+        self.append_states(states)
+        return cut + 2
+
+    def _decode(self, pos, final):
+        """
+        Decode one JSON value at ``pos``; None if the buffer ends inside it.
+        """
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, pos)
+        except json.JSONDecodeError:
+            if final:
+                raise ValueError("Truncated or malformed OpenSky states payload")
+            return None
+        # A number at the end of the buffer may continue in the next chunk
+        if end == len(self._buffer) and not final:
+            return None
+        return value, end
+
+    def _consume(self, final=False):
+        buffer, pos = self._buffer, 0
+        while True:
+            pos = _WHITESPACE.match(buffer, pos).end()
+            if pos == len(buffer):
+                break
+            char = buffer[pos]
+            if self._state == _START:
+                if char != "{":
+                    raise ValueError("OpenSky states payload is not a JSON object")
+                self._state, pos = _KEY, pos + 1
+            elif self._state == _KEY:
+                if char == "}":
+                    self._state, pos = _DONE, pos + 1
+                    continue
+                if char == ",":
+                    pos += 1
+                    continue
+                decoded = self._decode(pos, final)
+                if decoded is None:
+                    break
+                key, end = decoded
+                end = _WHITESPACE.match(buffer, end).end()
+                if end == len(buffer):
+                    break
+                if buffer[end] != ":":
+                    raise ValueError("Malformed OpenSky states payload")
+                self._key = key
+                self._state = _STATES if key == "states" else _VALUE
+                pos = end + 1
+            elif self._state == _VALUE:
+                decoded = self._decode(pos, final)
+                if decoded is None:
+                    break
+                value, pos = decoded
+                if self._key == "time":
+                    self.time = value
+                self._state = _KEY
+            elif self._state == _STATES:
+                if char == "[":
+                    self._state, pos = _ROWS, pos + 1
+                else:
+                    # "states": null when no aircraft match
+                    decoded = self._decode(pos, final)
+                    if decoded is None:
+                        break
+                    pos, self._state = decoded[1], _KEY
+            elif self._state == _ROWS:
+                if char == "]":
+                    self._state, pos = _KEY, pos + 1
+                    continue
+                if char == ",":
+                    pos += 1
+                    continue
+                end = self._decode_rows(pos)
+                if end != pos:
+                    pos = end
+                    continue
+                decoded = self._decode(pos, final)
+                if decoded is None:
+                    break
+                state, pos = decoded
+                self.append_state(state)
+            else:
+                raise ValueError("Unexpected data after the OpenSky states payload")
+        self._buffer = buffer[pos:]
+
+    def feed(self, chunk):
+        """
+        Parse the next piece of the body.
+
+        Args:
+            chunk (bytes | str): Body bytes as received (or already decoded text).
+        """
+        self._buffer += self._utf8.decode(chunk) if isinstance(chunk, bytes) else chunk
+        self._consume()
+
+    def finish(self):
+        """
+        Returns:
+            FlightColumns: Columns for every aircraft with a position.
+
+        Raises:
+            ValueError: If the body was truncated or malformed.
+        """
+        self._buffer += self._utf8.decode(b"", final=True)
+        self._consume(final=True)
+        if self._state != _DONE:
+            raise ValueError("Truncated OpenSky states payload")
+        return self.columns()
+
+    def columns(self):
+        """
+        Returns:
+            FlightColumns: The rows parsed so far.
+        """
+        columns = {name: values[:self._size] for name, values in self._columns.items()}
+        # Keep small snapshots from pinning the whole preallocated buffer
+        if self._size < len(self._columns['latitude']) // 2:
+            columns = {name: values.copy() for name, values in columns.items()}
+        return FlightColumns(**columns)
+
+
+def parse_states_stream(chunks, capacity=DEFAULT_CAPACITY):
+    """
+    Parse an OpenSky ``states/all`` body from an iterable of chunks.
+
+    Args:
+        chunks (iterable): Body pieces, e.g. ``response.iter_content(65536)``.
+        capacity (int, optional): Rows to preallocate.
+
+    Returns:
+        dict: ``{"time": int, "columns": FlightColumns}``, the columnar
+        counterpart of a raw ``{"time", "states"}`` payload.
+    """
+    parser = StatesStreamParser(capacity)
+    for chunk in chunks:
+        parser.feed(chunk)
+    columns = parser.finish()
+    return {"time": parser.time, "columns": columns}
+
+
+def columns_from_states(states):
+    """
+    Columns for a raw ``states`` list (rows without a position are skipped).
+
+    Returns:
+        FlightColumns
+    """
+    parser = StatesStreamParser(len(states or ()))
+    for state in states or ():
+        parser.append_state(state)
+    return parser.columns()
+
+
+def payload_columns(flight_data):
+    """
+    Columns of a raw payload or of one produced by ``parse_states_stream``.
+
+    Returns:
+        FlightColumns
+    """
+    if "columns" in flight_data:
+        return flight_data["columns"]
+    return columns_from_states(flight_data.get("states"))
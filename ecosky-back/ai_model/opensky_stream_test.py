@@ -0,0 +1,47 @@
+# File: ecosky-back/ai_model/opensky_stream_test.py
+
+import json
+import os
+
+import numpy as np
+import pytest
+
+from opensky_stream import StatesStreamParser, parse_states_stream
+from preprocess import preprocess_flight_data
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "benchmarks", "fixtures", "opensky_states.json")
+
+
+def _chunks(body, size):
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_streamed_columns_match_preprocessed_flights(chunk_size):
+    with open(FIXTURE, "rb") as f:
+        body = f.read()
+
+    flight_data = parse_states_stream(_chunks(body, chunk_size))
+
+    assert flight_data["time"] == json.loads(body)["time"]
+    assert flight_data["columns"].to_flights() == preprocess_flight_data(json.loads(body))
+
+
+def test_rows_without_position_are_skipped_and_columns_grow():
+    states = [[f"{i:06x}", None, "Nowhere", None, None, None if i % 3 == 0 else 1.0 * i, 45.0,
+               None, False, None, None, None, None, None, None, False, 0] for i in range(10)]
+    parser = StatesStreamParser(capacity=2)
+    parser.feed(json.dumps({"states": states, "time": 7}).encode())
+    columns = parser.finish()
+
+    assert parser.time == 7
+    assert columns.icao24.tolist() == [f"{i:06x}" for i in range(10) if i % 3]
+    # Unreported speeds stay NaN rather than reading as stationary
+    assert np.isnan(columns.velocity).all()
+    assert all(flight["velocity"] is None for flight in columns.to_flights())
+
+
+def test_null_states_and_truncated_bodies():
+    assert len(parse_states_stream([b'{"time": 5, "states": null}'])["columns"]) == 0
+    with pytest.raises(ValueError):
+        parse_states_stream([b'{"time": 5, "states": [["abc", null'])
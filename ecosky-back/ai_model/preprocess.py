@@ -1,8 +1,6 @@
 import numpy as np
 import logging
 
-# Initialize logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def preprocess_flight_data(flight_data):
@@ -10,13 +8,19 @@ def preprocess_flight_data(flight_data):
     Preprocess flight data for the AI model.
 
     Args:
-        flight_data (dict): Raw JSON data from OpenSky API.
+        flight_data (dict): Raw JSON data from OpenSky API, or a streamed
+            ``{"time", "columns"}`` payload from ``fetch_flight_columns``.
 
     Returns:
         list: List of dictionaries with relevant flight information.
     """
     processed_flights = []
 
+    if flight_data and 'columns' in flight_data:
+        processed_flights = flight_data['columns'].to_flights()
+        logger.info(f"Processed {len(processed_flights)} flights.")
+        return processed_flights
+
     if not flight_data or 'states' not in flight_data:
         logger.warning("No flight data available to preprocess.")
         return processed_flights
@@ -38,9 +42,14 @@ def preprocess_flight_data(flight_data):
             'origin_country': state[2],
             'longitude': state[5],
             'latitude': state[6],
-            'velocity': state[9] if state[9] else 0,  # km/h
-            'baro_altitude': state[7] if state[7] else 0,  # meters
-            'on_ground': state[8]
+            # None when not reported, so consumers can tell "unknown" from ground level
+            'velocity': state[9],  # m/s
+            'baro_altitude': state[7],  # meters
+            'on_ground': state[8],
+            # Kept for dead reckoning between snapshots; None when not reported
+            'true_track': state[10],  # degrees clockwise from north
+            'vertical_rate': state[11],  # m/s
+            'time_position': state[3]  # unix seconds of the last position update
         }
 
         processed_flights.append(flight_info)
@@ -137,6 +146,9 @@ if __name__ == "__main__":
     """
     Test the preprocessing scripts with sample data.
     """
+    from logging_setup import configure_logging
+    configure_logging()
+
     # Import ingest_api functions for testing
     try:
         from ingest_api import fetch_flight_data, fetch_weather_alerts
@@ -3,8 +3,23 @@ import gymnasium as gym
 import numpy as np
 import logging
 
+from fuel_model import co2_for_fuel, fuel_for_distance
+from great_circle import DEFAULT_STEP_SLACK, step_budget
+from scenario_bank import load_scenario_bank, scenario_from_record
+
 logger = logging.getLogger(__name__)
 
+# Layout of FlightEnv.get_state(); the scenario (start, target, storms) is config, not state
+STATE_FIELDS = ("current_step", "latitude", "longitude", "altitude", "heading", "velocity", "fuel")
+
+# Observation sizes without and with the live-traffic channel
+OBS_DIM = 8
+TRAFFIC_OBS_DIM = OBS_DIM + 1
+
+# An episode arrives within ARRIVAL_RADIUS_KM of the target and earns ARRIVAL_BONUS
+ARRIVAL_RADIUS_KM = 1.0
+ARRIVAL_BONUS = 1000.0
+
 class FlightEnv(gym.Env):
     
 
@@ -22,6 +37,23 @@ class FlightEnv(gym.Env):
         self.start_velocity = config.get("start_velocity", 100.0)   # m/s
         self.start_fuel = config.get("start_fuel", 10000.0)         # arbitrary units
 
+        # Per-episode log lines are costly across large training runs; opt in explicitly
+        self.log_episodes = config.get("log_episodes", False)
+
+        # Optional live-traffic channel: aircraft count within traffic_radius_km,
+        # looked up in a TrafficIndex (k-d tree) so each step stays O(log n)
+        self.traffic_index = config.get("traffic_index")
+        self.traffic_radius_km = config.get("traffic_radius_km", 50.0)
+
+        # Optional pre-generated scenario bank (path to a .npy from scenario_bank.py).
+        # It is memory-mapped, so every env runner shares the same pages and each
+        # reset draws a fresh start/target/storm set in O(1).
+        bank_path = config.get("scenario_bank")
+        self.scenario_bank = load_scenario_bank(bank_path) if bank_path else None
+        # Bank scenarios span a few hundred to ~17,000 km, so each episode's step
+        # limit is sized to its city pair instead of the fixed max_steps
+        self.step_slack = config.get("step_slack", DEFAULT_STEP_SLACK)
+
         self._reset_internal()
 
         self.action_space = gym.spaces.Box(
@@ -31,10 +63,16 @@ class FlightEnv(gym.Env):
             dtype=np.float32
         )
 
+        obs_low = [-180.0, -180.0,   0.0,   0.0,   0.0,   0.0, -180.0, -180.0]
+        obs_high = [ 180.0,  180.0, 20000.0, 360.0, 500.0, 200000.0, 180.0, 180.0]
+        if self.traffic_index is not None:
+            obs_low.append(0.0)
+            obs_high.append(100000.0)
+
         self.observation_space = gym.spaces.Box(
-            low=np.array([-180.0, -180.0,   0.0,   0.0,   0.0,   0.0, -180.0, -180.0], dtype=np.float32),
-            high=np.array([ 180.0,  180.0, 20000.0, 360.0, 500.0, 200000.0, 180.0, 180.0], dtype=np.float32),
-            shape=(8,),
+            low=np.array(obs_low, dtype=np.float32),
+            high=np.array(obs_high, dtype=np.float32),
+            shape=(len(obs_low),),
             dtype=np.float32
         )
 
@@ -43,15 +81,48 @@ class FlightEnv(gym.Env):
         Internal method to reset environment variables.
         """
         self.current_step = 0
-        self.latitude = self.start[0]
-        self.longitude = self.start[1]
+        # Plain floats, so the state stays float64 like get_state (see step)
+        self.latitude = float(self.start[0])
+        self.longitude = float(self.start[1])
         self.altitude = self.start_altitude
         self.heading = self.start_heading % 360.0
         self.velocity = self.start_velocity
         self.fuel = self.start_fuel
 
+    def get_state(self):
+        """
+        Snapshot the dynamic state as a fixed-size vector laid out as STATE_FIELDS.
+
+        Together with the env config this is everything ``step`` depends on, so
+        branching a rollout costs one 7-float copy instead of a deepcopy.
+
+        Returns:
+            np.ndarray: (7,) float64 array.
+        """
+        return np.array([self.current_step, self.latitude, self.longitude, self.altitude,
+                         self.heading, self.velocity, self.fuel], dtype=np.float64)
+
+    def set_state(self, state):
+        """
+        Restore a vector from ``get_state`` (possibly taken on another env with the same config).
+
+        Returns:
+            np.ndarray: The observation at the restored state.
+        """
+        self.current_step = int(state[0])
+        (self.latitude, self.longitude, self.altitude,
+         self.heading, self.velocity, self.fuel) = (float(value) for value in state[1:7])
+        return self._get_obs()
+
     def reset(self, *, seed=None, options=None):
         super().reset(seed=seed)
+        if self.scenario_bank is not None:
+            options = options or {}
+            index = options.get("scenario_index")
+            if index is None:
+                index = self.np_random.integers(len(self.scenario_bank))
+            self.start, self.target, self.storms = scenario_from_record(self.scenario_bank[index])
+            self.max_steps = step_budget(self.start, self.target, self.step_slack)
         self._reset_internal()
         obs = self._get_obs()
         info = {}
@@ -61,7 +132,7 @@ class FlightEnv(gym.Env):
         """
         Build the current observation vector.
         """
-        return np.array([
+        obs = [
             self.latitude,
             self.longitude,
             self.altitude,
@@ -70,7 +141,11 @@ class FlightEnv(gym.Env):
             self.fuel,
             self.target[0],
             self.target[1]
-        ], dtype=np.float32)
+        ]
+        if self.traffic_index is not None:
+            obs.append(self.traffic_index.count_within(self.latitude, self.longitude,
+                                                       self.traffic_radius_km))
+        return np.array(obs, dtype=np.float32)
 
     def step(self, action):
         """
@@ -78,9 +153,11 @@ class FlightEnv(gym.Env):
         """
         self.current_step += 1
 
-        # 1) Clip the action to ensure it's within the action space
+        # 1) Clip the action to ensure it's within the action space. Working in
+        #    float64 keeps the state in one precision whatever the action dtype,
+        #    so get_state/set_state round trips are exact
         dh, dthrottle, dalt = np.clip(
-            action,
+            np.asarray(action, dtype=np.float64),
             self.action_space.low,
             self.action_space.high
         )
@@ -119,7 +196,7 @@ class FlightEnv(gym.Env):
 
         # 6) Fuel usage
         # Simple model: fuel used = distance_traveled (km) * 0.1
-        fuel_used = 0.1 * (distance_traveled / 1000.0)  # units
+        fuel_used = fuel_for_distance(distance_traveled / 1000.0)  # units
         self.fuel = max(0.0, self.fuel - fuel_used)
 
         # 7) Compute reward
@@ -159,18 +236,21 @@ class FlightEnv(gym.Env):
         done = False
         truncated = False
 
-        if dist_to_target < 1.0:
-            reward += 1000.0  # Large bonus for reaching the target
+        if dist_to_target < ARRIVAL_RADIUS_KM:
+            reward += ARRIVAL_BONUS  # Large bonus for reaching the target
             done = True
-            logger.info("Target reached successfully.")
+            if self.log_episodes:
+                logger.info("Target reached successfully.")
         elif self.fuel <= 0.0:
             reward -= 1000.0  # Large penalty for running out of fuel
             done = True
-            logger.info("Out of fuel. Simulation terminated.")
+            if self.log_episodes:
+                logger.info("Out of fuel. Simulation terminated.")
         elif self.current_step >= self.max_steps:
             truncated = True
             done = True
-            logger.info("Maximum steps reached. Simulation terminated.")
+            if self.log_episodes:
+                logger.info("Maximum steps reached. Simulation terminated.")
 
         # Prepare observation and info
         obs = self._get_obs()
@@ -178,6 +258,7 @@ class FlightEnv(gym.Env):
             "dist_to_target": dist_to_target,
             "storm_penalty": storm_penalty,
             "fuel_used": fuel_used,
+            "co2_emissions": co2_for_fuel(fuel_used),
             "alt_deviation": alt_deviation
         }
 
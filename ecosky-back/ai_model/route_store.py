@@ -0,0 +1,266 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS routes (
+    id INTEGER PRIMARY KEY,
+    created_at REAL NOT NULL,
+    start_lat REAL NOT NULL,
+    start_lon REAL NOT NULL,
+    end_lat REAL NOT NULL,
+    end_lon REAL NOT NULL,
+    model_version TEXT,
+    fuel REAL NOT NULL,
+    co2 REAL NOT NULL,
+    partial INTEGER NOT NULL DEFAULT 0,
+    steps INTEGER,
+    inputs TEXT NOT NULL,
+    path BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS routes_created_at ON routes (created_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS route_segments USING rtree (
+    id, min_lat, max_lat, min_lon, max_lon, +route_id INTEGER
+);
+"""
+
+# Points per indexed path chunk. A long-haul route's overall bbox covers half
+# a hemisphere; chunk bboxes hug the path so the R-tree yields few false hits.
+CHUNK_POINTS = 16
+
+SUMMARY_COLUMNS = ("id", "created_at", "start_lat", "start_lon", "end_lat", "end_lon",
+                   "model_version", "fuel", "co2", "partial", "steps", "inputs")
+
+
+def route_bbox(path):
+    """
+    Bounding box of a [latitude, longitude] path.
+
+    Routes crossing the antimeridian get the full longitude range, which keeps
+    the R-tree filter conservative.
+
+    Returns:
+        tuple: (min_lat, max_lat, min_lon, max_lon)
+    """
+    lat, lon = path[:, 0], path[:, 1]
+    if len(lon) > 1 and np.any(np.abs(np.diff(lon)) > 180.0):
+        return float(lat.min()), float(lat.max()), -180.0, 180.0
+    return float(lat.min()), float(lat.max()), float(lon.min()), float(lon.max())
+
+
+def chunk_bboxes(path, chunk_points=CHUNK_POINTS):
+    """
+    Bounding boxes of consecutive path chunks, overlapping by one point so the
+    segments joining chunks are covered too.
+
+    Returns:
+        list[tuple]: (min_lat, max_lat, min_lon, max_lon) per chunk.
+    """
+    step = max(chunk_points - 1, 1)
+    return [route_bbox(path[i:i + chunk_points]) for i in range(0, max(len(path) - 1, 1), step)]
+
+
+def _split_at_antimeridian(p0, p1):
+    """
+    Replace segments that wrap across ±180° longitude with their two halves,
+    one ending on each side of the antimeridian.
+
+    Returns:
+        tuple: (segment starts, segment ends)
+    """
+    wraps = np.abs(p1[:, 1] - p0[:, 1]) > 180.0
+    if not wraps.any():
+        return p0, p1
+    a, b = p0[wraps], p1[wraps]
+    edge = np.where(a[:, 1] > 0, 180.0, -180.0)
+    # Unwrap the far end so the segment is continuous, then cut it at the edge
+    t = (edge - a[:, 1]) / (b[:, 1] + 2.0 * edge - a[:, 1])
+    crossing_lat = a[:, 0] + t * (b[:, 0] - a[:, 0])
+    near_edge = np.stack([crossing_lat, edge], axis=1)
+    far_edge = np.stack([crossing_lat, -edge], axis=1)
+    return (np.concatenate([p0[~wraps], a, far_edge]),
+            np.concatenate([p1[~wraps], near_edge, b]))
+
+
+def path_crosses_region(path, lamin, lomin, lamax, lomax):
+    """
+    Whether any point or segment of ``path`` lies inside the region.
+
+    Segments are clipped against the box in the latitude/longitude plane
+    (Liang-Barsky), one vectorized pass over the whole path. Segments crossing
+    the antimeridian are split there first.
+    """
+    path = np.asarray(path, dtype=np.float64)
+    lat, lon = path[:, 0], path[:, 1]
+    if np.any((lat >= lamin) & (lat <= lamax) & (lon >= lomin) & (lon <= lomax)):
+        return True
+    if len(path) < 2:
+        return False
+
+    p0, p1 = _split_at_antimeridian(path[:-1], path[1:])
+    delta = p1 - p0
+    t_low = np.zeros(len(p0))
+    t_high = np.ones(len(p0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for axis, low, high in ((0, lamin, lamax), (1, lomin, lomax)):
+            d = delta[:, axis]
+            t0 = (low - p0[:, axis]) / d
+            t1 = (high - p0[:, axis]) / d
+            t_low = np.fmax(t_low, np.where(d != 0, np.minimum(t0, t1), -np.inf))
+            t_high = np.fmin(t_high, np.where(d != 0, np.maximum(t0, t1), np.inf))
+            # Parallel to this axis and outside the slab: no intersection
+            outside = (d == 0) & ((p0[:, axis] < low) | (p0[:, axis] > high))
+            t_high = np.where(outside, -np.inf, t_high)
+    return bool(np.any(t_low <= t_high))
+
+
+class RouteStore:
+    """
+    SQLite store of optimized routes.
+
+    Each route keeps its request inputs, model version, fuel, CO2 and path
+    (float32 [latitude, longitude] pairs). An R-tree over the bounding boxes of
+    short path chunks answers region queries and a B-tree on ``created_at``
+    answers time-window queries, so lookups stay in the millisecond range as
+    the table grows.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): SQLite database file (":memory:" for a throwaway, per-thread store).
+        """
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connection(self):
+        # sqlite3 connections are per thread; WAL lets workers read while one writes
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.row_factory = sqlite3.Row
+            if self.path != ":memory:":
+                conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def save(self, start, end, route, fuel, co2, inputs, model_version=None,
+             partial=False, steps=None, created_at=None):
+        """
+        Persist one optimized route.
+
+        Args:
+            start (list): [latitude, longitude] of the origin.
+            end (list): [latitude, longitude] of the destination.
+            route (list): Route points; the first two values of each are latitude, longitude.
+            fuel (float): Fuel estimate for the route.
+            co2 (float): CO2 estimate for the route.
+            inputs (dict): Request payload that produced the route.
+            model_version (str, optional): Policy that computed the route.
+            partial (bool, optional): Whether the route was completed along the great circle.
+            steps (int, optional): Policy steps taken.
+            created_at (float, optional): Unix time; defaults to now.
+
+        Returns:
+            int: The new route id.
+        """
+        points = np.array([[p[0], p[1]] for p in route] or [start, end], dtype=np.float32)
+        conn = self._connection()
+        with conn:
+            cursor = conn.execute(
+                "INSERT INTO routes (created_at, start_lat, start_lon, end_lat, end_lon, model_version, "
+                "fuel, co2, partial, steps, inputs, path) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (created_at if created_at is not None else time.time(),
+                 float(start[0]), float(start[1]), float(end[0]), float(end[1]), model_version,
+                 float(fuel), float(co2), int(bool(partial)), steps,
+                 json.dumps(inputs), points.tobytes())
+            )
+            route_id = cursor.lastrowid
+            conn.executemany("INSERT INTO route_segments (min_lat, max_lat, min_lon, max_lon, route_id) "
+                             "VALUES (?, ?, ?, ?, ?)",
+                             [bbox + (route_id,) for bbox in chunk_bboxes(points)])
+        return route_id
+
+    @staticmethod
+    def _row_to_dict(row, include_path):
+        route = {name: row[name] for name in SUMMARY_COLUMNS}
+        route["partial"] = bool(route["partial"])
+        route["inputs"] = json.loads(route["inputs"])
+        if include_path:
+            route["path"] = np.frombuffer(row["path"], dtype=np.float32).reshape(-1, 2).tolist()
+        return route
+
+    def get(self, route_id):
+        """
+        Returns:
+            dict: The route with its path, or None if it does not exist.
+        """
+        row = self._connection().execute("SELECT * FROM routes WHERE id = ?", (route_id,)).fetchone()
+        return self._row_to_dict(row, include_path=True) if row else None
+
+    def query(self, bbox=None, since=None, limit=100, include_path=False):
+        """
+        Find routes crossing a region and/or created after a time, newest first.
+
+        Args:
+            bbox (tuple, optional): (lamin, lomin, lamax, lomax) region in degrees.
+                Candidates come from the R-tree; each is then checked against its path.
+            since (float, optional): Only routes created at or after this Unix time.
+            limit (int, optional): Maximum number of routes.
+            include_path (bool, optional): Include each route's [lat, lon] path.
+
+        Returns:
+            list[dict]: Matching routes.
+        """
+        clauses, params = [], []
+        if bbox is not None:
+            lamin, lomin, lamax, lomax = bbox
+            clauses.append("id IN (SELECT route_id FROM route_segments "
+                           "WHERE max_lat >= ? AND min_lat <= ? AND max_lon >= ? AND min_lon <= ?)")
+            params += [lamin, lamax, lomin, lomax]
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        summary = ", ".join(SUMMARY_COLUMNS)
+        conn = self._connection()
+
+        if bbox is None:
+            columns = summary + (", path" if include_path else "")
+            rows = conn.execute(f"SELECT {columns} FROM routes{where} ORDER BY created_at DESC LIMIT ?",
+                                params + [limit])
+            return [self._row_to_dict(row, include_path) for row in rows]
+
+        # R-tree candidates newest first, ids only; each path blob is read and
+        # checked only while fewer than ``limit`` routes have matched
+        routes = []
+        for candidate in conn.execute(f"SELECT id FROM routes{where} ORDER BY created_at DESC", params):
+            blob = conn.execute("SELECT path FROM routes WHERE id = ?", (candidate["id"],)).fetchone()
+            path = np.frombuffer(blob["path"], dtype=np.float32).reshape(-1, 2)
+            if not path_crosses_region(path, *bbox):
+                continue
+            row = conn.execute(f"SELECT {summary} FROM routes WHERE id = ?", (candidate["id"],)).fetchone()
+            route = self._row_to_dict(row, include_path=False)
+            if include_path:
+                route["path"] = path.tolist()
+            routes.append(route)
+            if len(routes) >= limit:
+                break
+        return routes
+
+    def close(self):
+        """
+        Close the calling thread's connection; the next call on that thread reopens it.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
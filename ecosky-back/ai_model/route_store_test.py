@@ -0,0 +1,91 @@
+# File: ecosky-back/ai_model/route_store_test.py
+
+import numpy as np
+
+from great_circle import great_circle_route
+from route_store import RouteStore, chunk_bboxes, path_crosses_region, route_bbox
+
+LONDON = [51.5074, -0.1278]
+NYC = [40.7128, -74.0060]
+TOKYO = [35.5494, 139.7798]
+ANCHORAGE = [61.1743, -149.9982]
+
+
+def _save(store, start, end, created_at):
+    path = great_circle_route(start, end, num_points=60).tolist()
+    return store.save(start, end, path, fuel=100.0, co2=316.0, inputs={"start": start, "end": end},
+                      model_version="test:1", created_at=created_at)
+
+
+def test_segment_crossing_counts_even_without_points_inside():
+    path = np.array([[10.0, -10.0], [10.0, 10.0]])
+    assert path_crosses_region(path, 9.0, -1.0, 11.0, 1.0)
+    assert not path_crosses_region(path, 20.0, -1.0, 21.0, 1.0)
+
+
+def test_antimeridian_routes_get_full_longitude_range():
+    path = great_circle_route(TOKYO, ANCHORAGE, num_points=50)
+    assert route_bbox(path)[2:] == (-180.0, 180.0)
+    assert max(b[3] - b[2] for b in chunk_bboxes(path)) == 360.0
+    assert not path_crosses_region(path, -10.0, -10.0, 10.0, 10.0)
+
+
+def test_segments_crossing_the_antimeridian_are_split_not_dropped():
+    path = np.array([[50.0, 170.0], [52.0, -170.0]])
+    # The segment crosses 180° at latitude 51
+    assert path_crosses_region(path, 50.5, 178.0, 51.5, 180.0)
+    assert path_crosses_region(path, 50.5, -180.0, 51.5, -178.0)
+    assert not path_crosses_region(path, 40.0, 178.0, 45.0, 180.0)
+    assert not path_crosses_region(path, 50.5, -10.0, 51.5, 10.0)
+
+    store = RouteStore(":memory:")
+    store.save([50.0, 170.0], [52.0, -170.0], path.tolist(), fuel=1.0, co2=3.16, inputs={})
+    assert len(store.query(bbox=(50.5, 178.0, 51.5, 180.0))) == 1
+
+
+def test_region_and_time_queries():
+    store = RouteStore(":memory:")
+    atlantic = _save(store, LONDON, NYC, created_at=1000.0)
+    pacific = _save(store, TOKYO, ANCHORAGE, created_at=2000.0)
+    _save(store, NYC, LONDON, created_at=3000.0)
+
+    # Mid-Atlantic box: both transatlantic routes, newest first
+    found = store.query(bbox=(45.0, -45.0, 60.0, -20.0))
+    assert [r["id"] for r in found] == [3, atlantic]
+    assert found[0]["inputs"] == {"start": NYC, "end": LONDON}
+    assert "path" not in found[0]
+
+    # A box inside the Atlantic route's bbox that the great circle doesn't cross
+    assert store.query(bbox=(40.0, -20.0, 42.0, -15.0)) == []
+
+    assert [r["id"] for r in store.query(since=1500.0)] == [3, pacific]
+    assert [r["id"] for r in store.query(bbox=(45.0, -45.0, 60.0, -20.0), since=1500.0)] == [3]
+    assert len(store.query(limit=1)) == 1
+
+    route = store.get(pacific)
+    assert route["model_version"] == "test:1" and route["partial"] is False
+    assert np.allclose(route["path"][0], TOKYO, atol=1e-4)
+    assert store.get(999) is None
+
+
+def test_region_query_stops_reading_paths_at_the_limit():
+    store = RouteStore(":memory:")
+    for i in range(20):
+        _save(store, LONDON, NYC, created_at=float(i))
+    path_reads = []
+    store._connection().set_trace_callback(
+        lambda sql: path_reads.append(sql) if sql.startswith("SELECT path") else None)
+
+    found = store.query(bbox=(45.0, -45.0, 60.0, -20.0), limit=3, include_path=True)
+
+    assert [r["created_at"] for r in found] == [19.0, 18.0, 17.0]
+    assert np.allclose(found[0]["path"][0], LONDON, atol=1e-4)
+    assert len(path_reads) == 3
+
+
+def test_closed_connection_is_reopened_on_next_use(tmp_path):
+    store = RouteStore(str(tmp_path / "routes.db"))
+    store.save([0.0, 0.0], [1.0, 1.0], [[0.0, 0.0], [1.0, 1.0]], fuel=1.0, co2=3.16, inputs={})
+    store.close()
+    assert len(store.query(bbox=(-1.0, -1.0, 2.0, 2.0))) == 1
+    store.close()
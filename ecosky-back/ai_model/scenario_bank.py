@@ -0,0 +1,243 @@
+"""
+Pre-generate a bank of start/target/storm-set scenarios for FlightEnv resets.
+
+Run from ``ecosky-back/ai_model``:
+
+    python scenario_bank.py --scenarios 1000000 --output saved_models/scenario_bank.npy
+    python scenario_bank.py --flights-archive states_*.json --alerts-archive alerts_*.json
+
+The bank is a fixed-width NumPy record array saved as ``.npy``. FlightEnv opens
+it with ``mmap_mode="r"``, so a reset reads one record in O(1) and every env
+runner on a machine shares the same page-cached file instead of its own copy.
+"""
+
+import argparse
+import json
+import logging
+
+import numpy as np
+
+from preprocess import preprocess_flight_data, preprocess_weather_alerts
+
+logger = logging.getLogger(__name__)
+
+# Storm slots per scenario; unused slots are ignored via ``num_storms``
+MAX_STORMS = 8
+
+SCENARIO_DTYPE = np.dtype([
+    ("start", np.float32, (2,)),             # [latitude, longitude]
+    ("target", np.float32, (2,)),            # [latitude, longitude]
+    ("num_storms", np.int32),
+    ("storms", np.float32, (MAX_STORMS, 3)),  # [latitude, longitude, radius_km]
+])
+
+# Major hubs used to draw origin/destination pairs: name -> [latitude, longitude]
+CITIES = {
+    "London": [51.4700, -0.4543],
+    "New York": [40.6413, -73.7781],
+    "Paris": [49.0097, 2.5479],
+    "Frankfurt": [50.0379, 8.5622],
+    "Madrid": [40.4983, -3.5676],
+    "Istanbul": [41.2753, 28.7519],
+    "Dubai": [25.2532, 55.3657],
+    "Delhi": [28.5562, 77.1000],
+    "Singapore": [1.3644, 103.9915],
+    "Hong Kong": [22.3080, 113.9185],
+    "Tokyo": [35.5494, 139.7798],
+    "Sydney": [-33.9399, 151.1753],
+    "Los Angeles": [33.9416, -118.4085],
+    "Chicago": [41.9742, -87.9073],
+    "Atlanta": [33.6407, -84.4277],
+    "Toronto": [43.6777, -79.6248],
+    "Mexico City": [19.4361, -99.0719],
+    "Sao Paulo": [-23.4356, -46.4731],
+    "Johannesburg": [-26.1367, 28.2411],
+    "Cairo": [30.1219, 31.4056],
+    "Reykjavik": [63.9850, -22.6056],
+    "Anchorage": [61.1743, -149.9982],
+}
+
+
+def _to_unit_vectors(points):
+    lat, lon = np.deg2rad(points[:, 0]), np.deg2rad(points[:, 1])
+    return np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def _points_along_routes(starts, targets, fractions):
+    """
+    Points at ``fractions`` of the way along each start->target great circle.
+
+    Args:
+        starts, targets (np.ndarray): (n, 2) [latitude, longitude] arrays.
+        fractions (np.ndarray): (n, k) values in [0, 1].
+
+    Returns:
+        np.ndarray: (n, k, 2) [latitude, longitude] array.
+    """
+    p1 = _to_unit_vectors(starts)[:, None, :]
+    p2 = _to_unit_vectors(targets)[:, None, :]
+    omega = np.arccos(np.clip(np.sum(p1 * p2, axis=-1, keepdims=True), -1.0, 1.0))
+    t = fractions[..., None]
+    sin_omega = np.sin(omega)
+    safe = sin_omega > 1e-9
+    # Spherical linear interpolation; falls back to the start for coincident endpoints
+    points = np.where(safe,
+                      (np.sin((1 - t) * omega) * p1 + np.sin(t * omega) * p2) / np.where(safe, sin_omega, 1.0),
+                      p1)
+    latitude = np.rad2deg(np.arcsin(np.clip(points[..., 2], -1.0, 1.0)))
+    longitude = np.rad2deg(np.arctan2(points[..., 1], points[..., 0]))
+    return np.stack([latitude, longitude], axis=-1)
+
+
+def traffic_positions(flight_data):
+    """
+    Airborne aircraft positions from an archived OpenSky ``states/all`` payload.
+
+    Returns:
+        np.ndarray: (n, 2) [latitude, longitude] array.
+    """
+    positions = [[f["latitude"], f["longitude"]] for f in preprocess_flight_data(flight_data)
+                 if not f.get("on_ground")]
+    return np.array(positions, dtype=float).reshape(-1, 2)
+
+
+def storm_centers(weather_data):
+    """
+    Storm centres from an archived NOAA ``alerts/active`` payload.
+
+    Returns:
+        np.ndarray: (n, 2) [latitude, longitude] array.
+    """
+    centers = [[a["latitude"], a["longitude"]] for a in preprocess_weather_alerts(weather_data)
+               if a["latitude"] is not None and a["longitude"] is not None]
+    return np.array(centers, dtype=float).reshape(-1, 2)
+
+
+def generate_scenario_bank(num_scenarios, max_storms=MAX_STORMS, seed=0, traffic=None, alerts=None,
+                           traffic_fraction=0.5, alert_fraction=0.5):
+    """
+    Draw ``num_scenarios`` random scenarios in vectorized batches.
+
+    Targets are hub airports. Starts are other hubs or, when ``traffic`` is
+    given, archived aircraft positions (mid-flight re-routing). Storms are
+    centred near the direct route so it is genuinely at risk, or, when
+    ``alerts`` is given, on archived NOAA storm centres.
+
+    Args:
+        num_scenarios (int): Number of scenarios to generate.
+        max_storms (int, optional): Upper bound on storms per scenario (<= MAX_STORMS).
+        seed (int, optional): Random seed.
+        traffic (np.ndarray, optional): (n, 2) archived aircraft positions.
+        alerts (np.ndarray, optional): (n, 2) archived storm centres.
+        traffic_fraction (float, optional): Share of starts drawn from ``traffic``.
+        alert_fraction (float, optional): Share of storms drawn from ``alerts``.
+
+    Returns:
+        np.ndarray: Record array with dtype SCENARIO_DTYPE.
+    """
+    if not 0 <= max_storms <= MAX_STORMS:
+        raise ValueError(f"max_storms must be between 0 and {MAX_STORMS}")
+
+    rng = np.random.default_rng(seed)
+    hubs = np.array(list(CITIES.values()), dtype=float)
+    n = num_scenarios
+
+    # Distinct origin/destination hubs: offset the origin by 1..len-1
+    target_idx = rng.integers(0, len(hubs), size=n)
+    origin_idx = (target_idx + rng.integers(1, len(hubs), size=n)) % len(hubs)
+    targets = hubs[target_idx]
+    starts = hubs[origin_idx]
+    if traffic is not None and len(traffic):
+        from_traffic = rng.random(n) < traffic_fraction
+        starts[from_traffic] = traffic[rng.integers(0, len(traffic), size=int(from_traffic.sum()))]
+
+    # Storms near 10-90% of the way along the direct route, jittered by ~1.5 degrees
+    storms = np.zeros((n, MAX_STORMS, 3), dtype=float)
+    along = _points_along_routes(starts, targets, rng.uniform(0.1, 0.9, size=(n, MAX_STORMS)))
+    storms[..., :2] = along + rng.normal(0.0, 1.5, size=(n, MAX_STORMS, 2))
+    if alerts is not None and len(alerts):
+        from_alerts = rng.random((n, MAX_STORMS)) < alert_fraction
+        picked = alerts[rng.integers(0, len(alerts), size=int(from_alerts.sum()))]
+        storms[from_alerts, :2] = picked + rng.normal(0.0, 0.25, size=picked.shape)
+    storms[..., 0] = np.clip(storms[..., 0], -90.0, 90.0)
+    storms[..., 1] = (storms[..., 1] + 540.0) % 360.0 - 180.0
+    storms[..., 2] = rng.uniform(20.0, 300.0, size=(n, MAX_STORMS))
+
+    num_storms = rng.integers(0, max_storms + 1, size=n)
+    storms[np.arange(MAX_STORMS)[None, :] >= num_storms[:, None]] = 0.0
+
+    bank = np.empty(n, dtype=SCENARIO_DTYPE)
+    bank["start"] = starts
+    bank["target"] = targets
+    bank["num_storms"] = num_storms
+    bank["storms"] = storms
+    return bank
+
+
+def save_scenario_bank(path, bank):
+    """Write a bank as a ``.npy`` file that can be memory-mapped."""
+    np.save(path, bank, allow_pickle=False)
+    logger.info(f"Saved {len(bank)} scenarios ({bank.nbytes / 1e6:.1f} MB) to {path}")
+
+
+def load_scenario_bank(path):
+    """
+    Memory-map a saved bank read-only.
+
+    Returns:
+        np.memmap: Record array with dtype SCENARIO_DTYPE. Nothing is read from
+        disk until a record is accessed.
+    """
+    bank = np.load(path, mmap_mode="r", allow_pickle=False)
+    if bank.dtype != SCENARIO_DTYPE:
+        raise ValueError(f"{path} is not a scenario bank (dtype {bank.dtype})")
+    return bank
+
+
+def scenario_from_record(record):
+    """
+    Convert one bank record into FlightEnv start/target/storms_data values.
+
+    Returns:
+        tuple: (start, target, storms) with storms as [{"center", "radius"}, ...].
+    """
+    storms = [{"center": [float(lat), float(lon)], "radius": float(radius)}
+              for lat, lon, radius in record["storms"][:record["num_storms"]]]
+    return np.array(record["start"], dtype=np.float32), np.array(record["target"], dtype=np.float32), storms
+
+
+def _load_archives(paths, extract):
+    arrays = []
+    for path in paths or []:
+        with open(path) as f:
+            arrays.append(extract(json.load(f)))
+    return np.concatenate(arrays) if arrays else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-generate a memory-mapped FlightEnv scenario bank")
+    parser.add_argument("--output", default="saved_models/scenario_bank.npy")
+    parser.add_argument("--scenarios", type=int, default=1000000)
+    parser.add_argument("--max-storms", type=int, default=MAX_STORMS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--flights-archive", nargs="*", help="Archived OpenSky states/all JSON files")
+    parser.add_argument("--alerts-archive", nargs="*", help="Archived NOAA alerts/active JSON files")
+    args = parser.parse_args(argv)
+
+    from logging_setup import configure_logging
+    configure_logging()
+
+    traffic = _load_archives(args.flights_archive, traffic_positions)
+    alerts = _load_archives(args.alerts_archive, storm_centers)
+    if traffic is not None:
+        logger.info(f"Seeding starts from {len(traffic)} archived aircraft positions.")
+    if alerts is not None:
+        logger.info(f"Seeding storms from {len(alerts)} archived NOAA storm centres.")
+
+    bank = generate_scenario_bank(args.scenarios, max_storms=args.max_storms, seed=args.seed,
+                                  traffic=traffic, alerts=alerts)
+    save_scenario_bank(args.output, bank)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# File: ecosky-back/ai_model/scenario_bank_test.py
+
+import numpy as np
+
+from great_circle import GreatCirclePolicy, great_circle_distance_km
+from rl_env import FlightEnv
+from scenario_bank import MAX_STORMS, generate_scenario_bank, load_scenario_bank, save_scenario_bank
+
+
+def test_generated_bank_is_well_formed():
+    alerts = np.array([[33.4, -104.6]])
+    bank = generate_scenario_bank(500, max_storms=4, seed=1, alerts=alerts)
+
+    assert len(bank) == 500
+    assert (bank["num_storms"] >= 0).all() and (bank["num_storms"] <= 4).all()
+    assert not np.all(bank["start"] == bank["target"], axis=1).any()
+    unused = np.arange(MAX_STORMS)[None, :] >= bank["num_storms"][:, None]
+    assert (bank["storms"][unused] == 0).all()
+    radii = bank["storms"][~unused][:, 2]
+    assert ((radii >= 20.0) & (radii <= 300.0)).all()
+
+
+def test_flight_env_resets_from_memory_mapped_bank(tmp_path):
+    path = str(tmp_path / "bank.npy")
+    bank = generate_scenario_bank(100, seed=2)
+    save_scenario_bank(path, bank)
+    assert isinstance(load_scenario_bank(path), np.memmap)
+
+    env = FlightEnv({"scenario_bank": path})
+    obs, _ = env.reset(seed=0, options={"scenario_index": 7})
+    assert np.allclose(obs[:2], bank["start"][7])
+    assert np.allclose(obs[6:8], bank["target"][7])
+    assert len(env.storms) == bank["num_storms"][7]
+
+    targets = {tuple(env.reset()[0][6:8]) for _ in range(20)}
+    assert len(targets) > 1
+
+
+def test_bank_episodes_get_step_limits_sized_to_their_city_pair(tmp_path):
+    path = str(tmp_path / "bank.npy")
+    bank = generate_scenario_bank(50, seed=3)
+    save_scenario_bank(path, bank)
+    distances = [great_circle_distance_km(s, t) for s, t in zip(bank["start"], bank["target"])]
+
+    env = FlightEnv({"scenario_bank": path, "max_steps": 2000})
+    env.reset(options={"scenario_index": int(np.argmax(distances))})
+    # 250 m/s cruise covers 0.25 km per one-second step
+    assert env.max_steps > max(distances) / 0.25
+
+    obs, _ = env.reset(options={"scenario_index": int(np.argmin(distances))})
+    policy, done, truncated = GreatCirclePolicy(), False, False
+    while not (done or truncated):
+        obs, _, done, truncated, info = env.step(policy.compute_single_action(obs))
+    assert not truncated and info["dist_to_target"] < 1.0
@@ -0,0 +1,132 @@
+import gzip
+import hashlib
+import json
+import logging
+import threading
+import time
+from email.utils import formatdate
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+
+class FlightSnapshot:
+    """
+    One processed OpenSky snapshot together with its pre-encoded response bodies.
+
+    The JSON body is serialized once and compressed once per supported encoding
+    when the snapshot is built, so every request for the same snapshot reuses
+    the same bytes.
+    """
+
+    def __init__(self, version, snapshot_time, flights, derived=None):
+        self.version = version
+        self.time = snapshot_time
+        self.flights = flights
+        # Per-snapshot structures (spatial index, columnar arrays, ...) keyed by name
+        self.derived = derived or {}
+
+        body = json.dumps(
+            {"status": "success", "data": flights},
+            separators=(",", ":")
+        ).encode("utf-8")
+        digest = hashlib.sha1(body).hexdigest()[:16]
+
+        # Weak tag: the gzip/brotli variants are the same representation
+        self.etag = f"{snapshot_time}-{digest}"
+        self.last_modified = formatdate(snapshot_time, usegmt=True)
+
+        self.bodies = {"identity": body, "gzip": gzip.compress(body, compresslevel=6)}
+        if brotli is not None:
+            self.bodies["br"] = brotli.compress(body, quality=5)
+
+    def negotiate(self, accept_encodings):
+        """
+        Pick the best pre-compressed body for a request.
+
+        Args:
+            accept_encodings: Werkzeug ``Accept`` object from ``request.accept_encodings``.
+
+        Returns:
+            tuple: (content_encoding, body_bytes). ``content_encoding`` is None for identity.
+        """
+        for encoding in ("br", "gzip"):
+            if encoding in self.bodies and accept_encodings.quality(encoding) > 0:
+                return encoding, self.bodies[encoding]
+        return None, self.bodies["identity"]
+
+
+class SnapshotStore:
+    """
+    Holds the latest processed flight snapshot, keyed on the OpenSky ``time`` field.
+
+    Feeding the store a payload whose ``time`` matches the current snapshot is a
+    no-op, so repeated polls of an unchanged upstream snapshot skip preprocessing
+    and compression entirely.
+    """
+
+    def __init__(self, preprocess, derive=None):
+        """
+        Args:
+            preprocess (callable): Turns a raw OpenSky payload into a list of flight dicts.
+            derive (dict, optional): name -> callable taking the flight list. Each runs
+                once per new snapshot and its result is stored in ``snapshot.derived``.
+                A value may also be a ``(source_name, callable)`` pair, in which case the
+                callable receives the earlier derived structure ``source_name`` instead.
+        """
+        self._preprocess = preprocess
+        self._derive = derive or {}
+        self._lock = threading.Lock()
+        self._version = 0
+        self._current = None
+
+    @property
+    def current(self):
+        """The most recent FlightSnapshot, or None if nothing has been loaded yet."""
+        return self._current
+
+    def update(self, flight_data):
+        """
+        Install a raw OpenSky payload as the current snapshot.
+
+        Args:
+            flight_data (dict): Raw JSON data from the OpenSky API, or a streamed
+                ``{"time", "columns"}`` payload.
+
+        Returns:
+            FlightSnapshot: The current snapshot (possibly unchanged), or None if
+            no usable data has been received yet.
+        """
+        if not flight_data or ('states' not in flight_data and 'columns' not in flight_data):
+            return self._current
+
+        snapshot_time = int(flight_data.get('time') or time.time())
+
+        current = self._current
+        if current is not None and current.time == snapshot_time:
+            return current
+
+        with self._lock:
+            # Another thread may have installed this snapshot while we waited
+            if self._current is not None and self._current.time == snapshot_time:
+                return self._current
+
+            flights = self._preprocess(flight_data)
+            derived = {}
+            for name, build in self._derive.items():
+                if isinstance(build, tuple):
+                    source, build = build
+                    derived[name] = build(derived[source])
+                else:
+                    derived[name] = build(flights)
+            self._version += 1
+            snapshot = FlightSnapshot(self._version, snapshot_time, flights, derived)
+            self._current = snapshot
+
+        logger.info(f"Installed flight snapshot v{snapshot.version} (time={snapshot_time}, "
+                    f"{len(flights)} flights, {len(snapshot.bodies['identity'])} bytes).")
+        return snapshot
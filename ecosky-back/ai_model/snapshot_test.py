@@ -0,0 +1,56 @@
+# File: ecosky-back/ai_model/snapshot_test.py
+
+import gzip
+import json
+
+from snapshot import SnapshotStore
+
+
+def _raw(snapshot_time):
+    return {
+        "time": snapshot_time,
+        "states": [["4b1816", "SWR123  ", "Switzerland", snapshot_time, snapshot_time,
+                    8.5, 47.4, 10000.0, False, 230.0, 90.0, 0.0, None, 10100.0, None, False, 0]]
+    }
+
+
+def test_unchanged_snapshot_skips_preprocessing():
+    calls = []
+
+    def preprocess(raw):
+        calls.append(raw["time"])
+        return [{"icao24": s[0]} for s in raw["states"]]
+
+    store = SnapshotStore(preprocess)
+    first = store.update(_raw(1700000000))
+    again = store.update(_raw(1700000000))
+    newer = store.update(_raw(1700000010))
+
+    assert first is again
+    assert calls == [1700000000, 1700000010]
+    assert newer.version == first.version + 1
+    assert newer.etag != first.etag
+
+
+def test_empty_payload_keeps_last_snapshot():
+    store = SnapshotStore(lambda raw: [])
+    assert store.update({}) is None
+    snapshot = store.update(_raw(1700000000))
+    assert store.update({}) is snapshot
+
+
+def test_compressed_bodies_match_identity():
+    store = SnapshotStore(lambda raw: [{"icao24": "4b1816"}])
+    snapshot = store.update(_raw(1700000000))
+    body = snapshot.bodies["identity"]
+    assert gzip.decompress(snapshot.bodies["gzip"]) == body
+    assert json.loads(body) == {"status": "success", "data": [{"icao24": "4b1816"}]}
+
+
+def test_derived_structures_can_build_on_each_other():
+    store = SnapshotStore(lambda raw: [{"icao24": s[0]} for s in raw["states"]], derive={
+        "ids": lambda flights: [f["icao24"] for f in flights],
+        "id_count": ("ids", len),
+    })
+    snapshot = store.update(_raw(1700000000))
+    assert snapshot.derived == {"ids": ["4b1816"], "id_count": 1}
@@ -0,0 +1,105 @@
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def _to_unit_vectors(lat, lon):
+    """
+    Convert latitude/longitude in degrees to points on the unit sphere.
+    """
+    lat_rad = np.deg2rad(np.asarray(lat, dtype=float))
+    lon_rad = np.deg2rad(np.asarray(lon, dtype=float))
+    cos_lat = np.cos(lat_rad)
+    return np.stack([cos_lat * np.cos(lon_rad), cos_lat * np.sin(lon_rad), np.sin(lat_rad)], axis=-1)
+
+
+def _km_to_chord(distance_km):
+    angle = np.minimum(np.asarray(distance_km, dtype=float) / EARTH_RADIUS_KM, np.pi)
+    return 2.0 * np.sin(angle / 2.0)
+
+
+def _chord_to_km(chord):
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.clip(np.asarray(chord) / 2.0, 0.0, 1.0))
+
+
+class TrafficIndex:
+    """
+    k-d tree over live aircraft positions for proximity queries.
+
+    Positions are embedded on the unit sphere, where straight-line (chord)
+    distance is monotonic in great-circle distance, so nearest-N and
+    within-radius queries are exact and take O(log n) to locate candidates.
+    """
+
+    def __init__(self, flights):
+        """
+        Args:
+            flights (list[dict]): Processed flights with 'latitude' and 'longitude' keys.
+        """
+        # scipy is only needed once a snapshot is indexed; keep it off the import path
+        from scipy.spatial import cKDTree
+
+        self.flights = [f for f in flights
+                        if f.get('latitude') is not None and f.get('longitude') is not None]
+        self.latitudes = np.array([f['latitude'] for f in self.flights], dtype=float)
+        self.longitudes = np.array([f['longitude'] for f in self.flights], dtype=float)
+        points = _to_unit_vectors(self.latitudes, self.longitudes).reshape(-1, 3)
+        self._tree = cKDTree(points) if len(self.flights) else None
+        logger.info(f"Indexed {len(self.flights)} aircraft positions.")
+
+    def __len__(self):
+        return len(self.flights)
+
+    def nearest(self, lat, lon, k=10, max_radius_km=None):
+        """
+        Find the ``k`` aircraft closest to a point.
+
+        Args:
+            lat (float): Query latitude in degrees.
+            lon (float): Query longitude in degrees.
+            k (int, optional): Maximum number of aircraft to return. Defaults to 10.
+            max_radius_km (float, optional): Ignore aircraft farther than this.
+
+        Returns:
+            list[tuple]: (distance_km, flight) pairs, nearest first.
+        """
+        if self._tree is None or k <= 0:
+            return []
+        k = min(k, len(self.flights))
+        upper = _km_to_chord(max_radius_km) if max_radius_km is not None else np.inf
+        chords, indices = self._tree.query(_to_unit_vectors(lat, lon), k=k, distance_upper_bound=upper)
+        chords, indices = np.atleast_1d(chords), np.atleast_1d(indices)
+        found = np.isfinite(chords)
+        return [(float(d), self.flights[i])
+                for d, i in zip(_chord_to_km(chords[found]), indices[found])]
+
+    def within_radius(self, lat, lon, radius_km):
+        """
+        Find every aircraft within ``radius_km`` of a point.
+
+        Returns:
+            list[tuple]: (distance_km, flight) pairs, nearest first.
+        """
+        if self._tree is None:
+            return []
+        query = _to_unit_vectors(lat, lon)
+        indices = self._tree.query_ball_point(query, _km_to_chord(radius_km))
+        if not indices:
+            return []
+        indices = np.asarray(indices)
+        chords = np.linalg.norm(self._tree.data[indices] - query, axis=1)
+        order = np.argsort(chords)
+        return [(float(d), self.flights[i])
+                for d, i in zip(_chord_to_km(chords[order]), indices[order])]
+
+    def count_within(self, lat, lon, radius_km):
+        """
+        Count aircraft within ``radius_km`` of a point without materialising them.
+        """
+        if self._tree is None:
+            return 0
+        return int(self._tree.query_ball_point(_to_unit_vectors(lat, lon), _km_to_chord(radius_km),
+                                               return_length=True))
@@ -0,0 +1,48 @@
+# File: ecosky-back/ai_model/traffic_index_test.py
+
+import numpy as np
+
+from rl_env import FlightEnv
+from traffic_index import TrafficIndex
+
+
+def _random_flights(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [{"icao24": f"{i:06x}", "latitude": float(lat), "longitude": float(lon)}
+            for i, (lat, lon) in enumerate(zip(rng.uniform(-80, 80, n), rng.uniform(-180, 180, n)))]
+
+
+def _brute_force_km(flights, lat, lon):
+    return np.array([FlightEnv._haversine(lat, lon, f["latitude"], f["longitude"]) for f in flights])
+
+
+def test_nearest_matches_brute_force():
+    flights = _random_flights(2000)
+    index = TrafficIndex(flights)
+    expected = np.sort(_brute_force_km(flights, 51.5, -0.12))[:5]
+
+    found = index.nearest(51.5, -0.12, k=5)
+    assert np.allclose([d for d, _ in found], expected, atol=1e-6)
+
+
+def test_within_radius_crosses_antimeridian():
+    flights = [
+        {"icao24": "a", "latitude": 10.0, "longitude": 179.9},
+        {"icao24": "b", "latitude": 10.0, "longitude": -179.9},
+        {"icao24": "c", "latitude": 10.0, "longitude": 170.0},
+    ]
+    index = TrafficIndex(flights)
+
+    found = index.within_radius(10.0, 180.0, 50.0)
+    assert sorted(f["icao24"] for _, f in found) == ["a", "b"]
+    assert index.count_within(10.0, 180.0, 50.0) == 2
+    assert index.nearest(10.0, 180.0, k=3, max_radius_km=50.0)[-1][1]["icao24"] in ("a", "b")
+
+
+def test_env_traffic_channel_extends_observation():
+    flights = [{"icao24": "a", "latitude": 51.51, "longitude": -0.13}]
+    env = FlightEnv({"traffic_index": TrafficIndex(flights), "traffic_radius_km": 10.0})
+    obs, _ = env.reset()
+
+    assert env.observation_space.shape == (9,)
+    assert obs[-1] == 1.0
@@ -4,9 +4,10 @@ from ray.rllib.algorithms.ppo import PPOConfig
 from ray.tune.registry import register_env
 
 # Import your custom environment and utilities
-from ai_model.ingest_api import fetch_flight_data, fetch_weather_alerts
-from data.preprocess import preprocess_flight_data, preprocess_weather_alerts
-from ai_model.rl_env import FlightEnv  # Ensure this path is correct
+from ingest_api import fetch_flight_data, fetch_weather_alerts
+from preprocess import preprocess_flight_data, preprocess_weather_alerts
+from rl_env import FlightEnv
+from logging_setup import configure_logging
 
 # Load environment variables
 from dotenv import load_dotenv
@@ -15,16 +16,16 @@ import os
 load_dotenv()
 
 # Initialize logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-    handlers=[
-        logging.FileHandler("train_model.log"),
-        logging.StreamHandler()
-    ]
-)
+configure_logging(log_file="train_model.log")
 logger = logging.getLogger(__name__)
 
+# Pre-generated training scenarios (python scenario_bank.py); falls back to the
+# single London -> NYC scenario when no bank has been generated yet
+SCENARIO_BANK_PATH = os.getenv(
+    "SCENARIO_BANK_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "saved_models", "scenario_bank.npy")
+)
+
 def env_creator(env_config):
     """
     Creator function for RLlib to build our advanced FlightEnv.
@@ -46,6 +47,12 @@ def train_model():
         # Build the PPO config
         config = PPOConfig()
 
+        scenario_bank = SCENARIO_BANK_PATH if os.path.exists(SCENARIO_BANK_PATH) else None
+        if scenario_bank:
+            logger.info(f"Drawing training scenarios from {scenario_bank}")
+        else:
+            logger.warning("No scenario bank found; training on the default London -> NYC scenario.")
+
         # Configure the environment
         config = config.environment(
             env="FlightEnv",
@@ -56,11 +63,12 @@ def train_model():
                     {"center": [55.0, -10.0], "radius": 2.0},   # Sample storms
                     {"center": [60.0, -20.0], "radius": 1.5}
                 ],
-                "max_steps": 2000,
+                "max_steps": 2000,  # default scenario only; bank draws use step_budget
                 "start_altitude": 1500.0,
                 "start_heading": 45.0,
                 "start_velocity": 120.0,
-                "start_fuel": 5000.0
+                "start_fuel": 5000.0,
+                "scenario_bank": scenario_bank
             }
         )
 
@@ -105,8 +105,8 @@ const DashboardPage = () => {
                   <Td>{f.origin_country}</Td>
                   <Td isNumeric>{f.latitude.toFixed(3)}</Td>
                   <Td isNumeric>{f.longitude.toFixed(3)}</Td>
-                  <Td isNumeric>{Math.round(f.baro_altitude)}</Td>
-                  <Td isNumeric>{Math.round(f.velocity)}</Td>
+                  <Td isNumeric>{f.baro_altitude == null ? '-' : Math.round(f.baro_altitude)}</Td>
+                  <Td isNumeric>{f.velocity == null ? '-' : Math.round(f.velocity)}</Td>
                   <Td>
                     <Badge colorScheme={f.on_ground ? 'yellow' : 'green'}>
                       {f.on_ground ? 'Ground' : 'Airborne'}
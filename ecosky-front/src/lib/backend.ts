@@ -4,9 +4,12 @@ export interface Flight {
   origin_country: string;
   longitude: number;
   latitude: number;
-  velocity: number;
-  baro_altitude: number;
+  velocity: number | null;
+  baro_altitude: number | null;
   on_ground: boolean;
+  true_track: number | null;
+  vertical_rate: number | null;
+  time_position: number | null;
 }
 
 interface FlightsResponse {
@@ -15,6 +18,27 @@ interface FlightsResponse {
   message?: string;
 }
 
+export interface EmissionsGroup {
+  aircraft: number;
+  fuel_per_hour: number;
+  co2_per_hour: number;
+}
+
+export interface FleetEmissions {
+  totals: EmissionsGroup;
+  by_country: (EmissionsGroup & { origin_country: string })[];
+  by_altitude_band: (EmissionsGroup & { altitude_band: string })[];
+  by_region: (EmissionsGroup & {
+    region: { lat_min: number; lat_max: number; lon_min: number; lon_max: number } | 'Unknown';
+  })[];
+}
+
+interface EmissionsResponse {
+  status: 'success' | 'error';
+  data?: FleetEmissions | null;
+  message?: string;
+}
+
 const DEFAULT_BASE_URL = 'http://localhost:4000';
 
 export const getBackendBaseUrl = () =>
@@ -42,4 +66,24 @@ export async function fetchAllFlights(): Promise<Flight[]> {
   return json.data;
 }
 
+export async function fetchFleetEmissions(): Promise<FleetEmissions | null> {
+  const baseUrl = getBackendBaseUrl().replace(/\/+$/, '');
+  const res = await fetch(`${baseUrl}/flights/emissions`, {
+    method: 'GET',
+    headers: {
+      'Accept': 'application/json',
+    },
+  });
+
+  if (!res.ok) {
+    throw new Error(`Backend request failed with status ${res.status}`);
+  }
 
+  const json = (await res.json()) as EmissionsResponse;
+
+  if (json.status !== 'success') {
+    throw new Error(json.message || 'Unexpected backend response format');
+  }
+
+  return json.data ?? null;
+}